@@ -7,9 +7,18 @@ from pydantic import BaseModel
 from typing import Optional
 import json
 import os
+import stat
+import sys
 import hmac
+import tempfile
 from dotenv import load_dotenv
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from crew.workflow_catalog import build_index, workflow_catalog
+
 load_dotenv()
 
 app = FastAPI()
@@ -22,12 +31,7 @@ class ConfigUpdateRequest(BaseModel):
 async def get_config():
     """Get current workflow configuration"""
     try:
-        workflows_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'workflows.json')
-        
-        with open(workflows_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        return JSONResponse(content=data)
+        return JSONResponse(content=workflow_catalog.index().data)
     
     except Exception as e:
         return JSONResponse(
@@ -51,13 +55,32 @@ async def update_config(request: ConfigUpdateRequest):
         if not hmac.compare_digest(request.password, admin_password):
             return JSONResponse(status_code=403, content={"error": "Forbidden"})
         
-        # Update workflows.json
-        workflows_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'workflows.json')
-        
         new_config = {"workflows": request.workflows}
-        
-        with open(workflows_path, 'w', encoding='utf-8') as f:
-            json.dump(new_config, f, ensure_ascii=False, indent=2)
+        try:
+            build_index(new_config)
+        except ValueError as error:
+            return JSONResponse(status_code=400, content={"error": str(error)})
+
+        # Replace workflows.json atomically so concurrent readers never parse
+        # a half-written file; the catalog reloads on the new inode.
+        # A uniquely named temp file keeps concurrent updates from sharing one.
+        workflows_path = workflow_catalog.path
+        try:
+            mode = stat.S_IMODE(os.stat(workflows_path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        temp_file = tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=os.path.dirname(workflows_path),
+            prefix='.workflows.', suffix='.tmp', delete=False,
+        )
+        try:
+            with temp_file as f:
+                json.dump(new_config, f, ensure_ascii=False, indent=2)
+            os.chmod(temp_file.name, mode)
+            os.replace(temp_file.name, workflows_path)
+        except BaseException:
+            os.remove(temp_file.name)
+            raise
         
         return JSONResponse(content={"success": True, "message": "Configuration updated"})
     
@@ -0,0 +1,73 @@
+"""Bounded thread pool for running workflows off the event loop."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from crew.telemetry import queued_since
+
+
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class BoundedExecutor:
+    """Runs at most ``max_workers`` jobs at once with up to ``max_queue`` waiting.
+
+    Submissions beyond that are rejected immediately instead of piling up, so
+    the caller can answer with a retryable status.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers must be >= 1 and max_queue >= 0")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="workflow"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs that are running or queued."""
+        return self._in_flight
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorSaturated("Too many workflow runs in progress")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(_run_queued, time.monotonic(), fn, args, kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Any) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _run_queued(submitted_at: float, fn: Callable[..., Any], args: Any, kwargs: Any) -> Any:
+    # The run's telemetry reports the time spent waiting for a worker.
+    with queued_since(submitted_at):
+        return fn(*args, **kwargs)
+
+
+def executor_from_env(prefix: str, default_workers: int, default_queue: int) -> BoundedExecutor:
+    return BoundedExecutor(
+        max_workers=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(default_workers))),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", str(default_queue))),
+    )
@@ -0,0 +1,295 @@
+"""SQLite-backed store for asynchronous workflow jobs.
+
+Each job keeps its status, the progress events emitted so far and the final
+``parse_result`` output (or error). Finished and abandoned jobs expire after
+a TTL and are purged lazily when new jobs are created.
+
+The database holds topics and generated articles, so it is created 0600 in
+a directory created 0700. A job's events are written through one
+``JobEventLog`` per run, which keeps a single connection and batches bursts
+(token streams) into one transaction. Past ``MAX_EVENTS_PER_JOB`` the log
+records a ``truncated`` event instead of silently dropping the rest. Jobs
+left queued or running by a process that no longer exists are marked failed
+when a store is opened.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DEFAULT_JOB_STORE_DIR = os.path.join(tempfile.gettempdir(), "qiaoagent-jobs")
+JOB_STORE_FILENAME = "jobs.sqlite3"
+DEFAULT_JOB_TTL_SECONDS = 24 * 60 * 60
+MAX_EVENTS_PER_JOB = 2000
+EVENT_FLUSH_SECONDS = 0.2
+INTERRUPTED_ERROR = "Job interrupted: the server stopped before it finished"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = {SUCCEEDED, FAILED}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    workflow_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+"""
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        # This process just opened the store, so the job predates it.
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobEventLog:
+    """Appends one job's progress events over a single connection.
+
+    An event after a quiet period is committed at once; bursts are committed
+    together at most ``flush_interval`` seconds later, as in
+    ``crew.progress.ProgressChannel``.
+    """
+
+    def __init__(
+        self,
+        store: "JobStore",
+        job_id: str,
+        flush_interval: float = EVENT_FLUSH_SECONDS,
+        max_events: int = MAX_EVENTS_PER_JOB,
+    ):
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+        self.dropped = 0
+        # Events arrive from DAG and hedge threads; the lock serialises them.
+        self._conn = store._open(check_same_thread=False)
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        row = self._conn.execute("SELECT event_count FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        self._next_seq = row[0] if row is not None else max_events
+        self._last_flush = float("-inf")
+        self._pending = threading.Event()
+        self._closed = False
+        threading.Thread(target=self._flush_pending, name="job-events-flush", daemon=True).start()
+
+    def write(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if self._next_seq + len(self._buffer) >= self.max_events:
+                self.dropped += 1
+                return
+            if self._next_seq + len(self._buffer) == self.max_events - 1:
+                event = {
+                    "type": "truncated",
+                    "message": f"进度事件超过 {self.max_events} 条，后续事件已省略",
+                }
+            self._buffer.append(event)
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._flush_locked(now)
+            else:
+                self._pending.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked(time.monotonic())
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked(time.monotonic())
+            if self.dropped and self._next_seq == self.max_events:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE job_events SET event = json_set(event, '$.dropped', ?)"
+                        " WHERE job_id = ? AND seq = ?",
+                        (self.dropped, self.job_id, self.max_events - 1),
+                    )
+            self._closed = True
+            self._conn.close()
+        self._pending.set()
+
+    def _flush_locked(self, now: float) -> None:
+        self._last_flush = now
+        self._pending.clear()
+        if not self._buffer or self._closed:
+            return
+        rows = [
+            (self.job_id, self._next_seq + offset, json.dumps(event, ensure_ascii=False))
+            for offset, event in enumerate(self._buffer)
+        ]
+        self._buffer.clear()
+        self._next_seq += len(rows)
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO job_events (job_id, seq, event) VALUES (?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "UPDATE jobs SET event_count = ?, updated_at = ? WHERE id = ?",
+                (self._next_seq, time.time(), self.job_id),
+            )
+
+    def _flush_pending(self) -> None:
+        while True:
+            self._pending.wait()
+            if self._closed:
+                return
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+class JobStore:
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_JOB_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+        # SQLite creates its -wal/-shm files with the database file's mode.
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self.recover_interrupted()
+
+    def _open(self, **options: Any) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, **options)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = self._open()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, workflow_id: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs"
+                " (id, workflow_id, status, owner_pid, created_at, updated_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, workflow_id, QUEUED, os.getpid(), now, now, now + self.ttl_seconds),
+            )
+        return job_id
+
+    def delete(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def mark_running(self, job_id: str) -> None:
+        self._update(job_id, status=RUNNING)
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._update(job_id, status=SUCCEEDED, result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._update(job_id, status=FAILED, error=error)
+
+    @contextmanager
+    def event_log(self, job_id: str, **options: Any) -> Iterator[JobEventLog]:
+        log = JobEventLog(self, job_id, **options)
+        try:
+            yield log
+        finally:
+            log.close()
+
+    def get(self, job_id: str, after: int = -1) -> Optional[Dict[str, Any]]:
+        """Job status plus the events with a sequence number greater than ``after``."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT workflow_id, status, result, error, event_count, created_at, updated_at"
+                " FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            events: List[Dict[str, Any]] = [
+                dict(json.loads(event), seq=seq)
+                for seq, event in conn.execute(
+                    "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                    (job_id, after),
+                )
+            ]
+
+        workflow_id, status, result, error, event_count, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "workflow_id": workflow_id,
+            "status": status,
+            "events": events,
+            "event_count": event_count,
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def recover_interrupted(self) -> int:
+        """Fail the queued and running jobs whose owning process has exited."""
+        with self._connect() as conn:
+            orphans = [
+                job_id
+                for job_id, owner_pid in conn.execute(
+                    "SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+                )
+                if owner_pid is None or not _process_alive(owner_pid)
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                [(FAILED, INTERRUPTED_ERROR, time.time(), job_id) for job_id in orphans],
+            )
+        return len(orphans)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE expires_at <= ?)",
+                (now,),
+            )
+            return conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,)).rowcount
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
@@ -0,0 +1,199 @@
+"""Authenticated asynchronous job API for CrewAI workflows.
+
+POST /api/jobs queues a run and returns its id immediately, so request
+latency no longer depends on LLM latency. GET /api/jobs/{job_id} returns the
+status, the progress events so far and the parsed result once finished, and
+GET /api/jobs/{job_id}/events streams the same events as Server-Sent Events.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from typing import Optional
+
+from fastapi import FastAPI, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from api.executor import ExecutorSaturated, executor_from_env
+from api.job_store import (
+    DEFAULT_JOB_STORE_DIR,
+    DEFAULT_JOB_TTL_SECONDS,
+    JOB_STORE_FILENAME,
+    TERMINAL_STATUSES,
+    JobStore,
+)
+from api.security import is_admin_authorized
+from crew.progress import progress_sink
+from crew.run_workflow import load_allowed_workflow_ids, read_verbosity, validate_payload
+from crew.verbosity import run_verbosity
+
+
+load_dotenv()
+app = FastAPI()
+
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+job_executor = executor_from_env("JOBS", default_workers=2, default_queue=32)
+EVENT_POLL_SECONDS = 0.5
+SATURATED_RETRY_AFTER_SECONDS = 30
+
+
+def job_store() -> JobStore:
+    """The process-wide job store, opened (and recovered) on first use."""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore(
+                os.path.join(os.getenv("JOB_STORE_DIR", DEFAULT_JOB_STORE_DIR), JOB_STORE_FILENAME),
+                float(os.getenv("JOB_TTL_SECONDS", str(DEFAULT_JOB_TTL_SECONDS))),
+            )
+        return _job_store
+
+
+class CreateJobRequest(BaseModel):
+    topic: str
+    workflow_id: str
+    bypass_cache: bool = False
+    verbosity: Optional[str] = None
+
+
+def _run_job(
+    job_id: str,
+    topic: str,
+    workflow_id: str,
+    bypass_cache: bool,
+    verbosity: Optional[str] = None,
+) -> None:
+    store = job_store()
+    store.mark_running(job_id)
+    try:
+        from crew.main import run_workflow_with_progress
+
+        # The log is closed (and flushed) before the job turns terminal, so
+        # readers that stop at the final status have seen every event.
+        with store.event_log(job_id) as events, progress_sink(events.write), \
+                run_verbosity(verbosity):
+            result = run_workflow_with_progress(
+                topic, workflow_id, bypass_cache=bypass_cache
+            )
+        store.complete(job_id, result)
+    except Exception as error:
+        store.fail(job_id, str(error))
+
+
+def _forbidden(x_admin_password: Optional[str]) -> Optional[JSONResponse]:
+    if not is_admin_authorized(os.getenv("ADMIN_PASSWORD"), x_admin_password):
+        return JSONResponse(status_code=403, content={"error": "Forbidden"})
+    return None
+
+
+@app.post("/api/jobs")
+async def create_job(
+    request: CreateJobRequest,
+    x_admin_password: Optional[str] = Header(default=None, alias="X-Admin-Password"),
+):
+    """Queue an allowlisted workflow run and return its job id."""
+    forbidden = _forbidden(x_admin_password)
+    if forbidden:
+        return forbidden
+
+    try:
+        allowed_workflow_ids = load_allowed_workflow_ids()
+    except Exception:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Workflow configuration unavailable"},
+        )
+
+    try:
+        topic, workflow_id = validate_payload(
+            {"topic": request.topic, "workflow_id": request.workflow_id},
+            allowed_workflow_ids,
+        )
+        verbosity = read_verbosity({"verbosity": request.verbosity})
+    except ValueError as error:
+        status_code = 413 if "character limit" in str(error) else 400
+        return JSONResponse(status_code=status_code, content={"error": str(error)})
+
+    # SQLite calls block, so they run off the event loop.
+    store = await run_in_threadpool(job_store)
+    await run_in_threadpool(store.purge_expired)
+    job_id = await run_in_threadpool(store.create, workflow_id)
+    try:
+        job_executor.submit(
+            _run_job, job_id, topic, workflow_id, request.bypass_cache, verbosity
+        )
+    except ExecutorSaturated:
+        await run_in_threadpool(store.delete, job_id)
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Too many workflow jobs queued"},
+            headers={"Retry-After": str(SATURATED_RETRY_AFTER_SECONDS)},
+        )
+
+    return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    after: int = -1,
+    x_admin_password: Optional[str] = Header(default=None, alias="X-Admin-Password"),
+):
+    """Return job status, events newer than ``after`` and the result when done."""
+    forbidden = _forbidden(x_admin_password)
+    if forbidden:
+        return forbidden
+
+    store = await run_in_threadpool(job_store)
+    job = await run_in_threadpool(store.get, job_id, after)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return JSONResponse(content=job)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    x_admin_password: Optional[str] = Header(default=None, alias="X-Admin-Password"),
+):
+    """Stream job progress as SSE, ending with a complete or error event."""
+    forbidden = _forbidden(x_admin_password)
+    if forbidden:
+        return forbidden
+    store = await run_in_threadpool(job_store)
+    if await run_in_threadpool(store.get, job_id) is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+
+    async def events():
+        last_seq = -1
+        while True:
+            job = await run_in_threadpool(store.get, job_id, last_seq)
+            if job is None:
+                return
+            for event in job["events"]:
+                last_seq = event["seq"]
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                if job["status"] == "succeeded":
+                    final = {"type": "complete", "message": "生成完成", "result": job["result"]}
+                else:
+                    final = {"type": "error", "message": "Workflow execution failed"}
+                yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+                return
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,11 @@
 """Authenticated API endpoint to run a CrewAI workflow."""
 
+import asyncio
 import os
 import sys
 from typing import Optional
 
-from fastapi import FastAPI, Header
+from fastapi import FastAPI, Header, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
@@ -13,22 +14,57 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+from api.executor import ExecutorSaturated, executor_from_env
 from api.security import is_admin_authorized
-from crew.run_workflow import load_allowed_workflow_ids, validate_payload
+from crew.cancellation import CancellationToken
+from crew.run_workflow import load_allowed_workflow_ids, read_verbosity, validate_payload
+from crew.verbosity import run_verbosity
 
 
 load_dotenv()
 app = FastAPI()
 
+# Workflows run on a bounded thread pool so a multi-minute crew.kickoff()
+# never blocks the event loop. RUN_CREW_MAX_CONCURRENCY runs execute at once
+# and up to RUN_CREW_MAX_QUEUE more may wait; beyond that requests get a 503.
+workflow_executor = executor_from_env("RUN_CREW", default_workers=2, default_queue=8)
+DISCONNECT_POLL_SECONDS = 1.0
+SATURATED_RETRY_AFTER_SECONDS = 10
+
 
 class RunCrewRequest(BaseModel):
     topic: str
     workflow_id: str
+    bypass_cache: bool = False
+    verbosity: Optional[str] = None
+
+
+def _execute(
+    topic: str,
+    workflow_id: str,
+    cancel_token: CancellationToken,
+    bypass_cache: bool,
+    verbosity: Optional[str] = None,
+):
+    # Delay the heavy workflow import until authentication and validation
+    # have both succeeded.
+    from crew.main import run_workflow as execute_workflow
+
+    with run_verbosity(verbosity):
+        return execute_workflow(
+            topic, workflow_id, cancel_token=cancel_token, bypass_cache=bypass_cache
+        )
+
+
+def _discard_outcome(pending: "asyncio.Future") -> None:
+    if not pending.cancelled():
+        pending.exception()
 
 
 @app.post("/api/run_crew")
 async def run_crew(
     request: RunCrewRequest,
+    http_request: Request,
     x_admin_password: Optional[str] = Header(default=None, alias="X-Admin-Password"),
 ):
     """Execute an allowlisted workflow for an authenticated administrator."""
@@ -48,17 +84,36 @@ async def run_crew(
             {"topic": request.topic, "workflow_id": request.workflow_id},
             allowed_workflow_ids,
         )
+        verbosity = read_verbosity({"verbosity": request.verbosity})
     except ValueError as error:
         status_code = 413 if "character limit" in str(error) else 400
         return JSONResponse(status_code=status_code, content={"error": str(error)})
 
+    cancel_token = CancellationToken()
     try:
-        # Delay the heavy workflow import until authentication and validation
-        # have both succeeded.
-        from crew.main import run_workflow as execute_workflow
+        future = workflow_executor.submit(
+            _execute, topic, workflow_id, cancel_token, request.bypass_cache, verbosity
+        )
+    except ExecutorSaturated:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Too many workflow runs in progress"},
+            headers={"Retry-After": str(SATURATED_RETRY_AFTER_SECONDS)},
+        )
+
+    pending = asyncio.wrap_future(future)
+    while not pending.done():
+        await asyncio.wait({pending}, timeout=DISCONNECT_POLL_SECONDS)
+        if not pending.done() and await http_request.is_disconnected():
+            # A queued run is dropped outright; a running one stops at its
+            # next agent step or task boundary.
+            future.cancel()
+            cancel_token.cancel("Client disconnected")
+            pending.add_done_callback(_discard_outcome)
+            return JSONResponse(status_code=499, content={"error": "Client closed request"})
 
-        result = execute_workflow(topic, workflow_id)
-        return JSONResponse(content=result)
+    try:
+        return JSONResponse(content=pending.result())
     except Exception:
         return JSONResponse(
             status_code=500,
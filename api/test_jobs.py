@@ -0,0 +1,175 @@
+import asyncio
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from api import jobs
+from api.job_store import FAILED, INTERRUPTED_ERROR, JobStore
+from crew.progress import send_progress
+
+
+def fake_workflow(topic, workflow_id, bypass_cache=False):
+    send_progress("task", "加载工作流配置...")
+    send_progress("output", "任务完成", "Writer")
+    return {"title": topic, "article": workflow_id, "summary": ""}
+
+
+def failing_workflow(topic, workflow_id, bypass_cache=False):
+    raise RuntimeError("provider timeout")
+
+
+@mock.patch.dict(os.environ, {"ADMIN_PASSWORD": "secure-test-password"})
+class JobApiTest(unittest.TestCase):
+    headers = {"X-Admin-Password": "secure-test-password"}
+    body = {"topic": "safe", "workflow_id": "wechat_title_creator"}
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.temp_dir.name, "jobs.sqlite3"))
+        patcher = mock.patch.object(jobs, "job_store", lambda: self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+        self.client = TestClient(jobs.app)
+
+    def wait_for_terminal(self, job_id):
+        for _ in range(200):
+            job = self.client.get(f"/api/jobs/{job_id}", headers=self.headers).json()
+            if job["status"] in {"succeeded", "failed"}:
+                return job
+            time.sleep(0.02)
+        self.fail("job did not finish")
+
+    def test_job_is_queued_and_exposes_events_and_result(self):
+        with mock.patch("crew.main.run_workflow_with_progress", fake_workflow):
+            created = self.client.post("/api/jobs", json=self.body, headers=self.headers)
+            self.assertEqual(created.status_code, 202)
+            job = self.wait_for_terminal(created.json()["job_id"])
+
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["title"], "safe")
+        self.assertEqual([event["seq"] for event in job["events"]], [0, 1])
+        self.assertEqual(job["events"][1]["agent"], "Writer")
+
+        newer = self.client.get(
+            f"/api/jobs/{job['job_id']}", params={"after": 0}, headers=self.headers
+        ).json()
+        self.assertEqual([event["seq"] for event in newer["events"]], [1])
+
+        stream = self.client.get(f"/api/jobs/{job['job_id']}/events", headers=self.headers)
+        self.assertIn('"type": "complete"', stream.text)
+
+    def test_store_reads_run_off_the_event_loop(self):
+        with mock.patch("crew.main.run_workflow_with_progress", fake_workflow):
+            created = self.client.post("/api/jobs", json=self.body, headers=self.headers)
+            job_id = self.wait_for_terminal(created.json()["job_id"])["job_id"]
+
+        on_loop = []
+        get = self.store.get
+
+        def recording_get(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return get(*args)
+
+        with mock.patch.object(self.store, "get", recording_get):
+            stream = self.client.get(f"/api/jobs/{job_id}/events", headers=self.headers)
+
+        self.assertIn('"type": "complete"', stream.text)
+        self.assertGreaterEqual(len(on_loop), 2)
+        self.assertNotIn(True, on_loop)
+
+    def test_failed_jobs_record_the_error(self):
+        with mock.patch("crew.main.run_workflow_with_progress", failing_workflow):
+            created = self.client.post("/api/jobs", json=self.body, headers=self.headers)
+            job = self.wait_for_terminal(created.json()["job_id"])
+
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("provider timeout", job["error"])
+
+    def test_jobs_require_admin_and_known_workflows(self):
+        self.assertEqual(self.client.post("/api/jobs", json=self.body).status_code, 403)
+        self.assertEqual(self.client.get("/api/jobs/unknown").status_code, 403)
+        self.assertEqual(
+            self.client.post(
+                "/api/jobs",
+                json={"topic": "safe", "workflow_id": "unknown"},
+                headers=self.headers,
+            ).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get("/api/jobs/unknown", headers=self.headers).status_code, 404
+        )
+
+    def test_expired_jobs_are_purged(self):
+        store = JobStore(os.path.join(self.temp_dir.name, "ttl.sqlite3"), ttl_seconds=-1)
+        job_id = store.create("wechat_title_creator")
+
+        self.assertIsNone(store.get(job_id))
+        self.assertEqual(store.purge_expired(), 1)
+
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.store_dir = os.path.join(self.temp_dir.name, "jobs")
+        self.store = JobStore(os.path.join(self.store_dir, "jobs.sqlite3"))
+
+    def test_store_is_private_and_opened_on_first_use(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.store_dir).st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(os.stat(self.store.path).st_mode), 0o600)
+
+        store_dir = os.path.join(self.temp_dir.name, "lazy")
+        with mock.patch.object(jobs, "_job_store", None), \
+                mock.patch.dict(os.environ, {"JOB_STORE_DIR": store_dir}):
+            self.assertFalse(os.path.exists(store_dir))
+            self.assertEqual(jobs.job_store().path, os.path.join(store_dir, "jobs.sqlite3"))
+            self.assertIs(jobs.job_store(), jobs.job_store())
+
+    def test_bursts_are_batched_and_flushed_on_close(self):
+        job_id = self.store.create("w")
+        with self.store.event_log(job_id, flush_interval=60) as log:
+            for index in range(5):
+                log.write({"type": "token", "message": str(index)})
+            # The first event went out at once; the burst waits for the flush.
+            self.assertEqual(self.store.get(job_id)["event_count"], 1)
+
+        job = self.store.get(job_id)
+        self.assertEqual([event["message"] for event in job["events"]], ["0", "1", "2", "3", "4"])
+
+    def test_events_past_the_cap_leave_a_truncation_marker(self):
+        job_id = self.store.create("w")
+        with self.store.event_log(job_id, max_events=3) as log:
+            for index in range(6):
+                log.write({"type": "token", "message": str(index)})
+
+        events = self.store.get(job_id)["events"]
+        self.assertEqual([event["type"] for event in events], ["token", "token", "truncated"])
+        self.assertEqual(events[-1]["dropped"], 3)
+
+    def test_jobs_of_exited_processes_are_marked_interrupted(self):
+        orphan = self.store.create("w")
+        self.store.mark_running(orphan)
+        live = self.store.create("w")
+        with self.store._connect() as conn:
+            conn.execute("UPDATE jobs SET owner_pid = ? WHERE id = ?", (os.getppid(), live))
+
+        reopened = JobStore(self.store.path)
+
+        self.assertEqual(reopened.get(orphan)["status"], FAILED)
+        self.assertEqual(reopened.get(orphan)["error"], INTERRUPTED_ERROR)
+        self.assertEqual(reopened.get(live)["status"], "queued")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import threading
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from api import run_crew
+from api.executor import BoundedExecutor, ExecutorSaturated
+from crew.cancellation import CancellationToken, WorkflowCancelled
+
+
+class BoundedExecutorTest(unittest.TestCase):
+    def test_submissions_beyond_workers_and_queue_are_rejected(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        try:
+            running = executor.submit(release.wait)
+            queued = executor.submit(lambda: "queued")
+            with self.assertRaises(ExecutorSaturated):
+                executor.submit(lambda: "rejected")
+            self.assertEqual(executor.in_flight, 2)
+
+            release.set()
+            running.result(timeout=5)
+            self.assertEqual(queued.result(timeout=5), "queued")
+            self.assertEqual(executor.submit(lambda: "accepted").result(timeout=5), "accepted")
+        finally:
+            release.set()
+            executor.shutdown()
+
+    def test_cancellation_token_stops_cooperative_runs(self):
+        token = CancellationToken()
+        token.raise_if_cancelled()
+        token.cancel("Client disconnected")
+
+        with self.assertRaisesRegex(WorkflowCancelled, "Client disconnected"):
+            token.raise_if_cancelled()
+
+
+@mock.patch.dict(os.environ, {"ADMIN_PASSWORD": "secure-test-password"})
+class RunCrewEndpointTest(unittest.TestCase):
+    headers = {"X-Admin-Password": "secure-test-password"}
+    body = {"topic": "safe", "workflow_id": "wechat_title_creator"}
+
+    def setUp(self):
+        self.client = TestClient(run_crew.app)
+
+    def test_workflow_runs_off_the_event_loop(self):
+        loop_threads = []
+
+        def fake_execute(topic, workflow_id, cancel_token, bypass_cache, verbosity=None):
+            loop_threads.append(threading.current_thread().name)
+            return {"title": topic, "article": workflow_id, "summary": ""}
+
+        with mock.patch.object(run_crew, "_execute", fake_execute):
+            response = self.client.post("/api/run_crew", json=self.body, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "safe")
+        self.assertTrue(loop_threads[0].startswith("workflow"))
+
+    def test_verbosity_is_validated_and_passed_to_the_run(self):
+        levels = []
+
+        def fake_execute(topic, workflow_id, cancel_token, bypass_cache, verbosity=None):
+            levels.append(verbosity)
+            return {"title": topic, "article": "", "summary": ""}
+
+        with mock.patch.object(run_crew, "_execute", fake_execute):
+            accepted = self.client.post(
+                "/api/run_crew", json={**self.body, "verbosity": "off"}, headers=self.headers
+            )
+            rejected = self.client.post(
+                "/api/run_crew", json={**self.body, "verbosity": "loud"}, headers=self.headers
+            )
+
+        self.assertEqual(accepted.status_code, 200)
+        self.assertEqual(rejected.status_code, 400)
+        self.assertEqual(levels, ["off"])
+
+    def test_saturated_executor_answers_503_with_retry_after(self):
+        saturated = mock.Mock()
+        saturated.submit.side_effect = ExecutorSaturated("full")
+
+        with mock.patch.object(run_crew, "workflow_executor", saturated):
+            response = self.client.post("/api/run_crew", json=self.body, headers=self.headers)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_client_disconnect_cancels_the_running_workflow(self):
+        observed = []
+
+        def fake_execute(topic, workflow_id, cancel_token, bypass_cache, verbosity=None):
+            while not cancel_token.cancelled:
+                threading.Event().wait(0.01)
+            observed.append(cancel_token.reason)
+
+        http_request = mock.Mock()
+        http_request.is_disconnected = mock.AsyncMock(return_value=True)
+        with mock.patch.object(run_crew, "_execute", fake_execute), \
+                mock.patch.object(run_crew, "DISCONNECT_POLL_SECONDS", 0.01):
+            response = asyncio.run(run_crew.run_crew(
+                run_crew.RunCrewRequest(**self.body),
+                http_request,
+                self.headers["X-Admin-Password"],
+            ))
+            for _ in range(100):
+                if observed:
+                    break
+                threading.Event().wait(0.01)
+
+        self.assertEqual(response.status_code, 499)
+        self.assertEqual(observed, ["Client disconnected"])
+
+    def test_authentication_is_checked_before_queueing(self):
+        with mock.patch.object(run_crew, "workflow_executor") as executor:
+            response = self.client.post("/api/run_crew", json=self.body)
+
+        self.assertEqual(response.status_code, 403)
+        executor.submit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,17 @@
 """
 API endpoint to get available workflows
 """
+import os
+import sys
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
-import json
-import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from crew.workflow_catalog import workflow_catalog
 
 app = FastAPI()
 
@@ -12,20 +19,8 @@ app = FastAPI()
 async def get_workflows():
     """Get list of available workflows"""
     try:
-        # Read workflows from public/workflows.json
-        workflows_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'workflows.json')
-        
-        with open(workflows_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Return simplified workflow list
-        workflows = [
-            {
-                "id": workflow["id"],
-                "name": workflow["name"]
-            }
-            for workflow in data.get("workflows", [])
-        ]
+        # Return simplified workflow list from the shared, indexed catalog
+        workflows = list(workflow_catalog.index().summaries)
         
         return JSONResponse(content={"workflows": workflows})
     
@@ -34,4 +29,3 @@ async def get_workflows():
             status_code=500,
             content={"error": str(e)}
         )
-
@@ -100,6 +100,7 @@ export async function POST(request: NextRequest) {
       apiKey: apiKeyPlaceholder, // Always use placeholder
       models: body.models || [],
       defaultModel: body.defaultModel,
+      rateLimits: body.rateLimits,
       enabled: body.enabled !== false,
       description: body.description,
       createdAt: Date.now(),
@@ -33,7 +33,8 @@ export async function POST(request: NextRequest) {
   const validation = validateWorkflowRunInput(
     input.topic,
     input.workflow_id,
-    allowedWorkflowIds
+    allowedWorkflowIds,
+    input.verbosity
   )
   if (!validation.ok) {
     return NextResponse.json({ error: validation.error }, { status: validation.status })
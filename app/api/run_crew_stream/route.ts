@@ -1,10 +1,11 @@
 import { NextRequest } from 'next/server'
-import type { ChildProcessWithoutNullStreams } from 'node:child_process'
 import { requireAdminRequest } from '@/lib/admin-auth'
 import {
+  createProgressFrameReader,
   loadAllowedWorkflowIds,
   spawnWorkflowProcess,
   validateWorkflowRunInput,
+  type WorkflowProcess,
 } from '@/lib/workflow-runner'
 
 export async function GET(request: NextRequest) {
@@ -23,20 +24,20 @@ export async function GET(request: NextRequest) {
   const validation = validateWorkflowRunInput(
     searchParams.get('topic'),
     searchParams.get('workflow_id'),
-    allowedWorkflowIds
+    allowedWorkflowIds,
+    searchParams.get('verbosity')
   )
   if (!validation.ok) {
     return new Response(validation.error, { status: validation.status })
   }
 
   const encoder = new TextEncoder()
-  let python: ChildProcessWithoutNullStreams | null = null
+  let python: WorkflowProcess | null = null
 
   const stream = new ReadableStream({
     start(controller) {
       let isClosed = false
       let stdout = ''
-      let stderrBuffer = ''
 
       const sendEvent = (data: unknown) => {
         if (isClosed) return
@@ -47,15 +48,7 @@ export async function GET(request: NextRequest) {
         }
       }
 
-      const handleProgressLine = (line: string) => {
-        if (!line.startsWith('PROGRESS:')) return
-
-        try {
-          sendEvent(JSON.parse(line.slice('PROGRESS:'.length).trim()))
-        } catch {
-          // Ignore malformed diagnostic output from the worker.
-        }
-      }
+      const progress = createProgressFrameReader(sendEvent)
 
       const closeController = () => {
         if (isClosed) return
@@ -82,19 +75,14 @@ export async function GET(request: NextRequest) {
         stdout += data.toString()
       })
 
-      python.stderr.on('data', data => {
-        stderrBuffer += data.toString()
+      python.progress.on('data', data => progress.push(data))
 
-        let newlineIndex = stderrBuffer.indexOf('\n')
-        while (newlineIndex !== -1) {
-          handleProgressLine(stderrBuffer.slice(0, newlineIndex).trim())
-          stderrBuffer = stderrBuffer.slice(newlineIndex + 1)
-          newlineIndex = stderrBuffer.indexOf('\n')
-        }
-      })
+      // stderr only carries CrewAI's log output now; drain it so the worker
+      // never blocks on a full pipe.
+      python.stderr.on('data', () => {})
 
       python.on('close', code => {
-        handleProgressLine(stderrBuffer.trim())
+        progress.end()
 
         if (code !== 0) {
           sendEvent({ type: 'error', message: 'Workflow execution failed' })
@@ -1,7 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import fs from 'fs'
 import path from 'path'
-import { WorkflowModelConfig } from '@/types/llm'
+import { ModelFallback, WorkflowModelConfig } from '@/types/llm'
 import { requireAdminRequest } from '@/lib/admin-auth'
 import {
   isDeepSeekProvider,
@@ -31,6 +31,21 @@ function loadDeepSeekProviderIds(): Set<string> {
   return providerIds
 }
 
+function isModelFallback(value: unknown): value is ModelFallback {
+  if (!value || typeof value !== 'object') return false
+  const fallback = value as Partial<ModelFallback>
+  return typeof fallback.providerId === 'string' && typeof fallback.model === 'string'
+}
+
+function isOptionalNumber(value: unknown, minimum: number, integer = false): boolean {
+  return value === undefined || (
+    typeof value === 'number' &&
+    Number.isFinite(value) &&
+    value >= minimum &&
+    (!integer || Number.isInteger(value))
+  )
+}
+
 function isWorkflowModelConfig(value: unknown): value is WorkflowModelConfig {
   if (!value || typeof value !== 'object') return false
   const config = value as Partial<WorkflowModelConfig>
@@ -38,12 +53,19 @@ function isWorkflowModelConfig(value: unknown): value is WorkflowModelConfig {
     typeof config.workflowId === 'string' && config.workflowId &&
     typeof config.defaultProviderId === 'string' &&
     typeof config.defaultModel === 'string' &&
+    isOptionalNumber(config.deadlineSeconds, 0.001) &&
     Array.isArray(config.agentConfigs) &&
     config.agentConfigs.every(agentConfig =>
       agentConfig &&
       typeof agentConfig.agentName === 'string' &&
       typeof agentConfig.providerId === 'string' &&
-      typeof agentConfig.model === 'string'
+      typeof agentConfig.model === 'string' &&
+      (agentConfig.fallbacks === undefined ||
+        (Array.isArray(agentConfig.fallbacks) && agentConfig.fallbacks.every(isModelFallback))) &&
+      (agentConfig.hedge === undefined || typeof agentConfig.hedge === 'boolean') &&
+      isOptionalNumber(agentConfig.maxTokens, 1, true) &&
+      isOptionalNumber(agentConfig.timeoutSeconds, 0.001) &&
+      isOptionalNumber(agentConfig.maxRetries, 0, true)
     )
   )
 }
@@ -51,7 +73,10 @@ function isWorkflowModelConfig(value: unknown): value is WorkflowModelConfig {
 function usesForbiddenDeepSeekPro(config: WorkflowModelConfig): boolean {
   const isPro = (model: string) => model.trim().toLowerCase() === 'deepseek-v4-pro'
   return isPro(config.defaultModel) ||
-    config.agentConfigs.some(agentConfig => isPro(agentConfig.model))
+    config.agentConfigs.some(agentConfig =>
+      isPro(agentConfig.model) ||
+      (agentConfig.fallbacks ?? []).some(fallback => isPro(fallback.model))
+    )
 }
 
 // Ensure config directory exists
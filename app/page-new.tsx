@@ -113,6 +113,15 @@ export default function Home() {
               )
             )
           }
+        } else if (data.type === 'result_field') {
+          // Title and summary arrive before the article has finished
+          setResult(prev => ({
+            title: '',
+            article: '',
+            summary: '',
+            ...prev,
+            [data.field]: data.message
+          }))
         } else if (data.type === 'complete') {
           setResult(data.result)
           eventSource.close()
@@ -23,6 +23,8 @@ interface AgentProcess {
   content: string
   timestamp: number
   status: 'waiting' | 'running' | 'completed' | 'error'
+  // Length of content when the current LLM call started streaming
+  streamStart?: number
 }
 
 export default function Home() {
@@ -78,29 +80,46 @@ export default function Home() {
         } else if (data.type === 'thinking' || data.type === 'stream') {
           // Update streaming content for the current agent
           const agent = data.agent || 'Unknown'
-          let message = data.message || ''
+          const message = data.message || ''
 
-          // Only filter for stream messages, not thinking messages
-          if (data.type === 'stream') {
-            // Remove various forms of CrewAI internal thoughts
-            message = message.replace(/Thought:\s*I now can give a great answer[\s\n]*Final Answer:\s*/gi, '')
-            message = message.replace(/Thought:\s*I now can give a great answer[\s\n]*/gi, '')
-            message = message.replace(/Final Answer:\s*/gi, '')
+          // Stream messages are token deltas: append them as-is, then remove
+          // CrewAI internal thoughts, which can span several deltas
+          const append = (content: string) => {
+            if (data.type !== 'stream') {
+              return message.trim() ? content + '\n' + message : content
+            }
+            return (content + message)
+              .replace(/Thought:\s*I now can give a great answer[\s\n]*Final Answer:\s*/gi, '')
+              .replace(/Thought:\s*I now can give a great answer[\s\n]*/gi, '')
+              .replace(/Final Answer:\s*/gi, '')
           }
 
-          if (message.trim()) {
-            setAgentProcesses(prev => {
-              const existing = prev.find(p => p.agent === agent && p.status === 'running')
-              if (existing) {
-                return prev.map(p =>
-                  p === existing
-                    ? { ...p, content: (p.content || '') + '\n' + message }
-                    : p
-                )
-              }
-              return prev
-            })
-          }
+          setAgentProcesses(prev => {
+            const existing = prev.find(p => p.agent === agent && p.status === 'running')
+            if (existing) {
+              return prev.map(p => {
+                if (p !== existing) {
+                  return p
+                }
+                const content = append(p.content || '')
+                return data.type === 'thinking'
+                  ? { ...p, content, streamStart: content.length }
+                  : { ...p, content }
+              })
+            }
+            return prev
+          })
+        } else if (data.type === 'stream_reset') {
+          // The call failed after streaming part of its answer; drop that
+          // part before the retry streams the answer again
+          const agent = data.agent || 'Unknown'
+          setAgentProcesses(prev =>
+            prev.map(p =>
+              p.agent === agent && p.status === 'running' && p.streamStart !== undefined
+                ? { ...p, content: p.content.slice(0, p.streamStart) }
+                : p
+            )
+          )
         } else if (data.type === 'output') {
           // Mark agent as completed
           if (data.agent) {
@@ -112,6 +131,15 @@ export default function Home() {
               )
             )
           }
+        } else if (data.type === 'result_field') {
+          // Title and summary arrive before the article has finished
+          setResult(prev => ({
+            title: '',
+            article: '',
+            summary: '',
+            ...prev,
+            [data.field]: data.message
+          }))
         } else if (data.type === 'complete') {
           // Mark all running agents as completed
           setAgentProcesses(prev =>
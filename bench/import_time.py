@@ -0,0 +1,115 @@
+"""Startup import cost of this project's entry points.
+
+Every spawned workflow run and every cold API function pays for its imports
+before doing any work. ``measure_import`` runs ``python -X importtime`` in a
+fresh interpreter and returns the module's cumulative import time and the
+modules it pulled in. ``IMPORT_BUDGETS`` is the budget enforced by
+``bench.test_import_time``; heavy dependencies in ``DEFERRED_MODULES`` must
+only be imported by the code paths that use them::
+
+    python3 -m bench.import_time --top 15 crew.run_workflow api.run_crew
+"""
+
+import argparse
+from dataclasses import dataclass
+import re
+import subprocess
+import sys
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+# Seconds of cumulative import time, several times what a warm file cache
+# needs, so that only real regressions (a heavy top-level import) trip them.
+IMPORT_BUDGETS: Dict[str, float] = {
+    "crew.run_workflow": 0.2,
+    "crew.main": 0.3,
+    "api.auth": 1.0,
+    "api.config": 1.0,
+    "api.jobs": 1.0,
+    "api.run_crew": 1.0,
+    "api.workflows": 1.0,
+}
+# Top-level packages that cost seconds and must never be imported at startup.
+DEFERRED_MODULES = ("crewai", "langchain", "langchain_core", "langchain_openai", "litellm")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+@dataclass(frozen=True)
+class ImportProfile:
+    module: str
+    seconds: float
+    # Cumulative seconds of ``module`` and each module it imported.
+    modules: Dict[str, float]
+
+    @property
+    def top_level_packages(self) -> FrozenSet[str]:
+        return frozenset(name.split(".")[0] for name in self.modules)
+
+    def slowest(self, count: int) -> List[Tuple[str, float]]:
+        nested = [(name, seconds) for name, seconds in self.modules.items() if name != self.module]
+        return sorted(nested, key=lambda item: item[1], reverse=True)[:count]
+
+
+def parse_importtime(output: str, module: str) -> Dict[str, float]:
+    """Cumulative seconds per module imported by ``module``, from ``-X importtime`` stderr.
+
+    Only ``module``'s own subtree counts, not what interpreter startup
+    (``site`` and ``.pth`` files) imported before it.
+    """
+    subtree: Dict[str, float] = {}
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        name, seconds = match.group(4), int(match.group(2)) / 1_000_000
+        # Children are listed before their parent; a top-level line closes a subtree.
+        subtree[name] = seconds
+        if len(match.group(3)) <= 1:
+            if name == module:
+                return subtree
+            subtree = {}
+    return {}
+
+
+def measure_import(module: str, runs: int = 3, python: str = sys.executable) -> ImportProfile:
+    """Profile importing ``module``; keeps the fastest of ``runs`` fresh interpreters."""
+    best: Optional[ImportProfile] = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [python, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{completed.stderr[-2000:]}")
+        modules = parse_importtime(completed.stderr, module)
+        profile = ImportProfile(module, modules.get(module, 0.0), modules)
+        if best is None or profile.seconds < best.seconds:
+            best = profile
+    return best
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(IMPORT_BUDGETS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="slowest nested imports to list")
+    args = parser.parse_args(argv)
+
+    over_budget = False
+    for module in args.modules:
+        profile = measure_import(module, args.runs)
+        budget = IMPORT_BUDGETS.get(module)
+        deferred = sorted(profile.top_level_packages & set(DEFERRED_MODULES))
+        over_budget |= bool(deferred) or (budget is not None and profile.seconds > budget)
+        status = f"budget {budget:.3f}s" if budget is not None else "no budget"
+        print(f"{module}: {profile.seconds:.3f}s ({status})")
+        if deferred:
+            print(f"  imports deferred modules: {', '.join(deferred)}")
+        for name, seconds in profile.slowest(args.top):
+            print(f"  {seconds:8.3f}s  {name}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
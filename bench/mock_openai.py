@@ -0,0 +1,209 @@
+"""Local OpenAI-compatible endpoint for benchmarks.
+
+Answers ``POST /v1/chat/completions`` (plain and streamed) and
+``GET /v1/models`` with a fixed crewai-style final answer. The timing is
+configurable, so a benchmark can hold LLM latency constant and measure only
+this project's overhead:
+
+- ``latency``: seconds before the first byte of a response;
+- ``tokens_per_second``: generation rate after that (0 = instant);
+- ``chunk_tokens``: tokens per streamed chunk;
+- ``response_tokens``: length of every answer.
+
+A "token" is one short word, and ``usage`` reports the sizes the client
+would be billed for. Like a provider's prefix cache, ``usage`` also reports
+as ``prompt_tokens_details.cached_tokens`` the longest prefix a request
+shares with an earlier one (in ``CACHE_BLOCK_TOKENS`` blocks). Run standalone with ``python3 -m bench.mock_openai``.
+"""
+
+import argparse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class MockSettings:
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    chunk_tokens: int = 8
+    response_tokens: int = 64
+
+
+def answer_tokens(count: int, seed: int = 0) -> List[str]:
+    """``count`` tokens forming a final answer crewai's parser accepts.
+
+    Different prompts get different words (by ``seed``), as from a real model,
+    so later tasks' contexts differ between topics.
+    """
+    words = [f" w{(index + seed) % 97}" for index in range(max(count - 4, 1))]
+    return ["Thought:", " done", "\nFinal", " Answer:"] + words
+
+
+# Providers cache prompt prefixes in fixed-size blocks; OpenAI uses 128 tokens.
+CACHE_BLOCK_TOKENS = 16
+
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    return json.dumps(body.get("messages", []), ensure_ascii=False)
+
+
+def _prompt_tokens(body: Dict[str, Any]) -> int:
+    return max(1, len(_prompt_text(body)) // 4)
+
+
+def _common_prefix(first: str, second: str) -> int:
+    length = 0
+    for left, right in zip(first, second):
+        if left != right:
+            break
+        length += 1
+    return length
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    server: "MockOpenAIServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, value: Dict[str, Any]) -> None:
+        data = json.dumps(value).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "bench-model", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        settings = self.server.settings
+        self.server.count_request()
+
+        prompt = _prompt_text(body)
+        tokens = answer_tokens(settings.response_tokens, zlib.crc32(prompt.encode("utf-8")))
+        prompt_tokens = _prompt_tokens(body)
+        cached_tokens = min(self.server.cached_prefix_tokens(prompt), prompt_tokens)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        model = body.get("model", "bench-model")
+        time.sleep(settings.latency)
+
+        if body.get("stream"):
+            self._stream(model, tokens, usage, settings)
+            return
+
+        if settings.tokens_per_second > 0:
+            time.sleep(len(tokens) / settings.tokens_per_second)
+        self._send_json(200, {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(
+        self, model: str, tokens: List[str], usage: Dict[str, int], settings: MockSettings
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra: Any) -> None:
+            event = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        size = max(1, settings.chunk_tokens)
+        for start in range(0, len(tokens), size):
+            if settings.tokens_per_second > 0:
+                time.sleep(size / settings.tokens_per_second)
+            chunk({"content": "".join(tokens[start:start + size])})
+        chunk({}, "stop", usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, settings: MockSettings = MockSettings(), port: int = 0):
+        super().__init__(("127.0.0.1", port), MockOpenAIHandler)
+        self.settings = settings
+        self.requests = 0
+        self._prompts: List[str] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def cached_prefix_tokens(self, prompt: str) -> int:
+        """Tokens of ``prompt`` a prefix cache would hold from earlier requests; remembers it."""
+        with self._lock:
+            shared = max((_common_prefix(prompt, seen) for seen in self._prompts), default=0)
+            self._prompts.append(prompt)
+        return shared // 4 // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+
+    def __enter__(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--chunk-tokens", type=int, default=8)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    args = parser.parse_args()
+    server = MockOpenAIServer(
+        MockSettings(args.latency, args.tokens_per_second, args.chunk_tokens, args.response_tokens),
+        args.port,
+    )
+    print(f"Mock OpenAI endpoint on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,541 @@
+"""Benchmarks of this project's own overhead against a mock LLM endpoint.
+
+Every agent is routed to ``bench.mock_openai`` through temporary
+``llm-providers.json`` / ``workflow-models.json`` files, so LLM latency is a
+fixed, known input and the numbers measure the rest of the stack:
+
+- ``cold``: one ``python3 -m crew.run_workflow`` subprocess per run;
+- ``stream``: the same with ``--stream``, plus time to the first event;
+- ``zygote``: ``cold`` runs forked from a ``--zygote`` server (``rss_mb`` is
+  then only the forwarding client's);
+- ``api``: ``POST /api/run_crew`` on a uvicorn server, run concurrently;
+- ``config``: catalog and provider config loading for growing file sizes.
+
+Results (latency percentiles, throughput, peak RSS and the per-phase spans
+reported by ``crew.telemetry``) are written as JSON tagged with the git
+commit. ``--compare`` prints the change against an earlier result file::
+
+    python3 -m bench.run --runs 5 --latency 0.2 --output before.json
+    python3 -m bench.run --runs 5 --latency 0.2 --compare before.json
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import datetime
+import json
+import os
+import platform
+import resource
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from bench.mock_openai import MockOpenAIServer, MockSettings
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "bench", "results")
+SCENARIOS = ("cold", "stream", "zygote", "api", "config")
+DEFAULT_TOPIC = "如何用三个月学会做饭"
+# Metrics where a larger value is an improvement; everything else is a cost.
+HIGHER_IS_BETTER = ("throughput_per_second",)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+
+    def rank(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "mean": sum(ordered) / len(ordered),
+        "p50": rank(0.5),
+        "p95": rank(0.95),
+        "max": ordered[-1],
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def bench_environment(base_url: str, temp_dir: str, workflow_ids: Iterable[str]) -> Dict[str, str]:
+    """Environment for child processes: every agent on the mock, no caches or sinks."""
+    providers_path = os.path.join(temp_dir, "llm-providers.json")
+    models_path = os.path.join(temp_dir, "workflow-models.json")
+    with open(providers_path, "w", encoding="utf-8") as providers_file:
+        json.dump([{
+            "id": "bench",
+            "name": "Benchmark mock",
+            "type": "custom",
+            "baseURL": base_url,
+            "apiKey": "bench-key",
+            "models": ["bench-model"],
+            "defaultModel": "bench-model",
+            "enabled": True,
+        }], providers_file)
+    with open(models_path, "w", encoding="utf-8") as models_file:
+        json.dump([
+            {
+                "workflowId": workflow_id,
+                "defaultProviderId": "bench",
+                "defaultModel": "bench-model",
+                "agentConfigs": [],
+            }
+            for workflow_id in workflow_ids
+        ], models_file)
+
+    env = {
+        key: value for key, value in os.environ.items()
+        if not key.startswith(("WORKFLOW_METRICS_", "WORKFLOW_RESULT_CACHE_", "LLM_MEMO_"))
+    }
+    env.update({
+        "PYTHONPATH": PROJECT_ROOT,
+        "LLM_PROVIDERS_CONFIG_PATH": providers_path,
+        "WORKFLOW_MODELS_CONFIG_PATH": models_path,
+        "WORKFLOW_RUN_DIR": os.path.join(temp_dir, "runs"),
+        "RATE_LIMIT_DIR": os.path.join(temp_dir, "rate-limits"),
+        "PROVIDER_HEALTH_DIR": os.path.join(temp_dir, "provider-health"),
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    })
+    return env
+
+
+def run_workflow_process(
+    env: Mapping[str, str], workflow_id: str, topic: str, streaming: bool
+) -> Dict[str, Any]:
+    """One ``crew.run_workflow`` subprocess: wall time, peak RSS and its telemetry.
+
+    Streaming runs get a progress channel fd, as in the Next.js streaming
+    route; other runs report progress as ``PROGRESS:`` lines on stderr.
+    """
+    command = [sys.executable, "-m", "crew.run_workflow"]
+    progress_read = progress_write = None
+    if streaming:
+        progress_read, progress_write = os.pipe()
+        command += ["--stream", "--progress-fd", str(progress_write)]
+    started = time.monotonic()
+    process = subprocess.Popen(
+        command, cwd=PROJECT_ROOT, env=dict(env),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        pass_fds=(progress_write,) if streaming else (),
+    )
+    if streaming:
+        os.close(progress_write)
+    first_event: List[float] = []
+    metrics: List[Dict[str, Any]] = []
+    stdout: List[bytes] = []
+
+    def handle_event(event: Dict[str, Any]) -> None:
+        if not first_event:
+            first_event.append(time.monotonic() - started)
+        if event.get("type") == "metrics":
+            metrics.append(event["metrics"])
+
+    def read_frames() -> None:
+        with os.fdopen(progress_read, "rb") as frames:
+            for frame in frames:
+                handle_event(json.loads(frame))
+
+    def read_stderr() -> None:
+        for line in process.stderr:
+            if line.startswith(b"PROGRESS:"):
+                handle_event(json.loads(line[len(b"PROGRESS:"):]))
+
+    readers = [
+        threading.Thread(target=read_stderr),
+        threading.Thread(target=lambda: stdout.append(process.stdout.read())),
+    ]
+    if streaming:
+        readers.append(threading.Thread(target=read_frames))
+    for reader in readers:
+        reader.start()
+    process.stdin.write(json.dumps({"topic": topic, "workflow_id": workflow_id}).encode("utf-8"))
+    process.stdin.close()
+    # wait4 instead of wait: it also returns this child's own peak RSS.
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.monotonic() - started
+    for reader in readers:
+        reader.join()
+
+    return {
+        "ok": process.returncode == 0,
+        "seconds": seconds,
+        "rss_mb": usage.ru_maxrss / 1024,
+        "first_event_seconds": first_event[0] if first_event else None,
+        "metrics": metrics[-1] if metrics else None,
+    }
+
+
+def _phase_means(runs: List[Dict[str, Any]]) -> Dict[str, float]:
+    totals: Dict[str, List[float]] = {}
+    for run in runs:
+        for phase, seconds in ((run["metrics"] or {}).get("phases") or {}).items():
+            totals.setdefault(phase, []).append(seconds)
+    return {phase: sum(values) / len(values) for phase, values in totals.items()}
+
+
+def scenario_subprocess(
+    env: Mapping[str, str], workflow_id: str, topic: str, runs: int, streaming: bool
+) -> Dict[str, Any]:
+    started = time.monotonic()
+    results = [run_workflow_process(env, workflow_id, topic, streaming) for _ in range(runs)]
+    elapsed = time.monotonic() - started
+    ok = [result for result in results if result["ok"]]
+    summary = {
+        "runs": runs,
+        "failures": runs - len(ok),
+        "latency_seconds": summarize([result["seconds"] for result in ok]),
+        "throughput_per_second": len(ok) / elapsed if elapsed else 0.0,
+        "rss_mb": summarize([result["rss_mb"] for result in ok]),
+        "phase_seconds": _phase_means(ok),
+    }
+    if streaming:
+        summary["first_event_seconds"] = summarize(
+            [result["first_event_seconds"] for result in ok if result["first_event_seconds"] is not None]
+        )
+        summary["time_to_first_token_seconds"] = summarize([
+            result["metrics"]["time_to_first_token"] for result in ok
+            if result["metrics"] and result["metrics"].get("time_to_first_token") is not None
+        ])
+    return summary
+
+
+@contextmanager
+def zygote_server(env: Mapping[str, str], temp_dir: str, timeout: float = 60) -> Iterator[Dict[str, str]]:
+    """Run a ``crew.run_workflow --zygote`` server; yields ``env`` pointing at it."""
+    socket_path = os.path.join(temp_dir, "zygote.sock")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "crew.run_workflow", "--zygote", socket_path],
+        cwd=PROJECT_ROOT, env=dict(env), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # The socket is bound once the workflow engine has been imported.
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(socket_path):
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("zygote server did not start")
+            time.sleep(0.1)
+        yield {**env, "WORKFLOW_ZYGOTE_SOCKET": socket_path}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def run_child(scenario: str, env: Mapping[str, str], options: Sequence[str]) -> Dict[str, Any]:
+    """Run an in-process scenario in a fresh interpreter so its RSS is its own."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "bench.run", "--child", scenario, *options],
+        cwd=PROJECT_ROOT, env=dict(env), capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scenario} benchmark failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def child_api(workflow_id: str, topic: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    import uvicorn
+
+    password = secrets.token_urlsafe(24)
+    os.environ["ADMIN_PASSWORD"] = password
+    from api.run_crew import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    body = json.dumps({"topic": topic, "workflow_id": workflow_id}).encode("utf-8")
+
+    def post(_index: int) -> Tuple[bool, float]:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/api/run_crew",
+            data=body,
+            headers={"Content-Type": "application/json", "X-Admin-Password": password},
+        )
+        started = time.monotonic()
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                ok = response.status == 200
+        except OSError:
+            ok = False
+        return ok, time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(post, range(requests)))
+    elapsed = time.monotonic() - started
+    server.should_exit = True
+    thread.join(timeout=10)
+
+    latencies = [seconds for ok, seconds in results if ok]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "failures": requests - len(latencies),
+        "latency_seconds": summarize(latencies),
+        "throughput_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def synthetic_configs(temp_dir: str, workflows: int, providers: int) -> Tuple[str, str, str]:
+    """Catalog, providers and workflow-models files of the given sizes."""
+    catalog_path = os.path.join(temp_dir, f"workflows-{workflows}.json")
+    providers_path = os.path.join(temp_dir, f"providers-{providers}.json")
+    models_path = os.path.join(temp_dir, f"models-{workflows}-{providers}.json")
+    agents = [
+        {"name": f"Agent{index}", "role": f"角色{index}", "goal": "目标", "prompt": "提示" * 50}
+        for index in range(3)
+    ]
+    tasks = [
+        {"description": "任务描述 {topic} " * 10, "agent": f"Agent{index}", "expected_output": "输出"}
+        for index in range(3)
+    ]
+    with open(catalog_path, "w", encoding="utf-8") as catalog_file:
+        json.dump({"workflows": [
+            {"id": f"workflow_{index}", "name": f"工作流 {index}", "agents": agents, "tasks": tasks}
+            for index in range(workflows)
+        ]}, catalog_file, ensure_ascii=False)
+    with open(providers_path, "w", encoding="utf-8") as providers_file:
+        json.dump([
+            {
+                "id": f"provider_{index}", "name": f"Provider {index}", "type": "custom",
+                "baseURL": f"https://provider-{index}.invalid/v1", "apiKey": "key",
+                "models": ["model"], "defaultModel": "model", "enabled": True,
+            }
+            for index in range(providers)
+        ], providers_file)
+    with open(models_path, "w", encoding="utf-8") as models_file:
+        json.dump([
+            {
+                "workflowId": f"workflow_{index}",
+                "defaultProviderId": f"provider_{index % providers}",
+                "defaultModel": "model",
+                "agentConfigs": [
+                    {"agentName": agent["name"], "providerId": f"provider_{(index + offset) % providers}", "model": "model"}
+                    for offset, agent in enumerate(agents)
+                ],
+            }
+            for index in range(workflows)
+        ], models_file)
+    return catalog_path, providers_path, models_path
+
+
+def _timed(func: Any, repeat: int) -> float:
+    """Mean seconds per call of ``func`` over ``repeat`` calls."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def child_config(sizes: Sequence[Tuple[int, int]]) -> Dict[str, Any]:
+    from crew.llm_config import LLMConfigManager
+    from crew.workflow_catalog import WorkflowCatalog
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for workflows, providers in sizes:
+            catalog_path, providers_path, models_path = synthetic_configs(temp_dir, workflows, providers)
+            warm_catalog = WorkflowCatalog(catalog_path)
+            warm_catalog.get("workflow_0")
+            warm_config = LLMConfigManager(providers_path, models_path)
+            warm_config.snapshot()
+            results[f"{workflows}x{providers}"] = {
+                "catalog_cold_seconds": _timed(
+                    lambda: WorkflowCatalog(catalog_path).get("workflow_0"), 5
+                ),
+                "catalog_warm_seconds": _timed(lambda: warm_catalog.get("workflow_0"), 200),
+                "llm_config_cold_seconds": _timed(
+                    lambda: LLMConfigManager(providers_path, models_path).snapshot(), 5
+                ),
+                "llm_config_warm_seconds": _timed(warm_config.snapshot, 200),
+            }
+    results["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    if isinstance(value, dict):
+        flat: Dict[str, float] = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def compare_results(
+    baseline: Mapping[str, Any], current: Mapping[str, Any], threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """Metrics present in both results, with their relative change.
+
+    A row is a regression when a cost (time, RSS) grew, or throughput fell,
+    by more than ``threshold``. Counts and settings are skipped.
+    """
+    before = flatten(baseline.get("scenarios", {}))
+    after = flatten(current.get("scenarios", {}))
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        if name.endswith((".count", ".runs", ".requests", ".concurrency", ".failures")):
+            continue
+        if before[name] == 0:
+            continue
+        change = (after[name] - before[name]) / before[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        rows.append({
+            "metric": name,
+            "baseline": before[name],
+            "current": after[name],
+            "change": change,
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        marker = "  REGRESSION" if row["regression"] else ""
+        print(
+            f'{row["metric"]:<60} {row["baseline"]:>12.4f} -> {row["current"]:>12.4f}'
+            f' ({row["change"]:+.1%}){marker}'
+        )
+
+
+def _config_sizes(value: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for item in value.split(","):
+        workflows, _, providers = item.partition("x")
+        sizes.append((int(workflows), int(providers)))
+    return sizes
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--workflow-id", default="wechat_title_creator")
+    parser.add_argument("--topic", default=DEFAULT_TOPIC)
+    parser.add_argument("--runs", type=int, default=3, help="subprocess runs per scenario")
+    parser.add_argument("--requests", type=int, default=8, help="API requests")
+    parser.add_argument("--concurrency", type=int, default=2, help="concurrent API requests")
+    parser.add_argument(
+        "--config-sizes", default="10x5,100x50,1000x200",
+        help="comma-separated WORKFLOWSxPROVIDERS file sizes for the config scenario",
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="mock seconds to first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--chunk-tokens", type=int, default=8)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--output", help="result file (default: bench/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="regression threshold for --compare")
+    parser.add_argument("--child", choices=("api", "config"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child == "api":
+        print(json.dumps(child_api(args.workflow_id, args.topic, args.requests, args.concurrency)))
+        return 0
+    if args.child == "config":
+        print(json.dumps(child_config(_config_sizes(args.config_sizes))))
+        return 0
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    settings = MockSettings(
+        args.latency, args.tokens_per_second, args.chunk_tokens, args.response_tokens
+    )
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "workflow_id": args.workflow_id,
+            "runs": args.runs,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mock": settings.__dict__,
+        },
+        "scenarios": {},
+    }
+
+    with MockOpenAIServer(settings) as server, tempfile.TemporaryDirectory() as temp_dir:
+        env = bench_environment(server.base_url, temp_dir, [args.workflow_id])
+        for name in scenarios:
+            print(f"Running {name}...", file=sys.stderr)
+            if name in ("cold", "stream"):
+                result = scenario_subprocess(
+                    env, args.workflow_id, args.topic, args.runs, streaming=name == "stream"
+                )
+            elif name == "zygote":
+                with zygote_server(env, temp_dir) as zygote_env:
+                    result = scenario_subprocess(
+                        zygote_env, args.workflow_id, args.topic, args.runs, streaming=False
+                    )
+            elif name == "api":
+                result = run_child("api", env, [
+                    "--workflow-id", args.workflow_id, "--topic", args.topic,
+                    "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                ])
+            else:
+                result = run_child("config", env, ["--config-sizes", args.config_sizes])
+            results["scenarios"][name] = result
+        results["mock_requests"] = server.requests
+
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f'{datetime.datetime.now().strftime("%Y%m%d-%H%M%S")}-{results["commit"] or "unknown"}.json',
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, ensure_ascii=False, indent=2)
+    print(json.dumps(results["scenarios"], ensure_ascii=False, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            rows = compare_results(json.load(baseline_file), results, args.threshold)
+        print_comparison(rows)
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
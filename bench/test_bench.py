@@ -0,0 +1,72 @@
+import json
+import unittest
+import urllib.request
+
+from bench.mock_openai import MockOpenAIServer, MockSettings
+from bench.run import compare_results, summarize
+
+
+def post(server, body):
+    request = urllib.request.Request(
+        f"{server.base_url}/chat/completions",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read().decode("utf-8")
+
+
+class MockOpenAIServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = MockOpenAIServer(MockSettings(chunk_tokens=4, response_tokens=10))
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def test_plain_completion_is_a_final_answer_with_usage(self):
+        response = json.loads(post(self.server, {"model": "m", "messages": [{"role": "user", "content": "hi"}]}))
+
+        content = response["choices"][0]["message"]["content"]
+        self.assertTrue(content.startswith("Thought: done\nFinal Answer:"))
+        self.assertEqual(response["usage"]["completion_tokens"], 10)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_streamed_completion_ends_with_usage_and_done(self):
+        body = post(self.server, {"model": "m", "stream": True, "messages": []})
+        events = [line[len("data: "):] for line in body.split("\n\n") if line]
+
+        self.assertEqual(events[-1], "[DONE]")
+        chunks = [json.loads(event) for event in events[:-1]]
+        text = "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks)
+        self.assertIn("Final Answer:", text)
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[-1]["usage"]["completion_tokens"], 10)
+
+
+class CompareResultsTest(unittest.TestCase):
+    def test_summarize_percentiles(self):
+        summary = summarize([4.0, 1.0, 3.0, 2.0])
+        self.assertEqual((summary["min"], summary["p50"], summary["p95"], summary["max"]), (1.0, 2.0, 4.0, 4.0))
+        self.assertEqual(summarize([]), {"count": 0})
+
+    def test_costs_that_grow_and_throughput_that_falls_are_regressions(self):
+        baseline = {"scenarios": {"api": {
+            "latency_seconds": {"count": 4, "p50": 1.0},
+            "throughput_per_second": 2.0,
+            "rss_mb": 100.0,
+        }}}
+        current = {"scenarios": {"api": {
+            "latency_seconds": {"count": 8, "p50": 1.5},
+            "throughput_per_second": 3.0,
+            "rss_mb": 105.0,
+        }}}
+
+        rows = {row["metric"]: row for row in compare_results(baseline, current, threshold=0.1)}
+
+        self.assertNotIn("api.latency_seconds.count", rows)
+        self.assertTrue(rows["api.latency_seconds.p50"]["regression"])
+        self.assertFalse(rows["api.throughput_per_second"]["regression"])
+        self.assertFalse(rows["api.rss_mb"]["regression"])
+
+
+if __name__ == "__main__":
+    unittest.main()
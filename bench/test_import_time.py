@@ -0,0 +1,49 @@
+import unittest
+
+from bench.import_time import DEFERRED_MODULES, IMPORT_BUDGETS, measure_import, parse_importtime
+
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       900 |       1500 |   encodings.utf_8
+import time:      2000 |       3000 | site
+import time:       100 |        100 |       json.decoder
+import time:       400 |        500 |     json
+import time:       250 |        750 |   crew.progress
+import time:       250 |       1000 | crew.run_workflow
+"""
+
+
+class ParseImporttimeTest(unittest.TestCase):
+    def test_only_the_modules_subtree_is_kept(self):
+        modules = parse_importtime(IMPORTTIME_OUTPUT, "crew.run_workflow")
+
+        self.assertEqual(modules, {
+            "json.decoder": 0.0001,
+            "json": 0.0005,
+            "crew.progress": 0.00075,
+            "crew.run_workflow": 0.001,
+        })
+
+    def test_unknown_module_has_no_profile(self):
+        self.assertEqual(parse_importtime(IMPORTTIME_OUTPUT, "api.jobs"), {})
+
+
+class ImportBudgetTest(unittest.TestCase):
+    def test_entry_points_start_within_budget(self):
+        for module, budget in IMPORT_BUDGETS.items():
+            with self.subTest(module=module):
+                profile = measure_import(module)
+                slowest = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in profile.slowest(5))
+
+                self.assertFalse(
+                    profile.top_level_packages & set(DEFERRED_MODULES),
+                    f"{module} imports a deferred dependency at startup ({slowest})",
+                )
+                self.assertLessEqual(
+                    profile.seconds, budget,
+                    f"{module} took {profile.seconds:.3f}s to import ({slowest})",
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
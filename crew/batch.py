@@ -0,0 +1,190 @@
+"""Batch mode for crew/run_workflow.py: many topics in one invocation.
+
+stdin holds a JSON array or JSONL of request objects, each shaped like a
+single run (``topic``, ``workflow_id``) plus an optional string ``id``.
+Every item goes through ``validate_payload``; results are written to stdout
+as one JSON line per item in completion order::
+
+    {"index": 0, "key": "...", "id": "...", "ok": true, "result": {...}}
+    {"index": 1, "key": "...", "ok": false, "error": "..."}
+
+``key`` is the item's ``id`` when given, otherwise a hash of its topic and
+workflow_id.
+Items run on a bounded thread pool. Each worker thread builds a workflow's
+agents once and reuses them for every item it runs, and LLM clients are
+shared process-wide. With a checkpoint file every finished line is also
+appended there, and a rerun with the same file skips the items that already
+succeeded; failed items are retried.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO
+
+from crew.run_workflow import validate_payload
+
+
+MAX_BATCH_ITEMS = 5000
+MAX_BATCH_STDIN_LENGTH = 16 * 1024 * 1024
+DEFAULT_BATCH_CONCURRENCY = 4
+
+
+def parse_batch(raw_batch: str) -> List[Any]:
+    """Decode a JSON array or JSONL document into a list of raw items."""
+    if len(raw_batch) > MAX_BATCH_STDIN_LENGTH:
+        raise ValueError("Batch payload is too large")
+
+    stripped = raw_batch.strip()
+    if stripped.startswith("["):
+        try:
+            items = json.loads(stripped)
+        except json.JSONDecodeError as error:
+            raise ValueError("Batch must be a JSON array or JSONL") from error
+    else:
+        items = []
+        for line_number, line in enumerate(stripped.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as error:
+                raise ValueError(f"Line {line_number} is not valid JSON") from error
+
+    if not items:
+        raise ValueError("Batch is empty")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise ValueError(f"Batch exceeds the {MAX_BATCH_ITEMS} item limit")
+    return items
+
+
+def item_key(index: int, item: Any) -> str:
+    """Stable checkpoint key: the caller's id, else a hash of the request."""
+    if isinstance(item, dict) and isinstance(item.get("id"), str) and item["id"]:
+        return item["id"]
+    try:
+        canonical = json.dumps(
+            {"topic": item.get("topic"), "workflow_id": item.get("workflow_id")},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+    except (AttributeError, TypeError):
+        return f"#{index}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Keys of the items recorded as successful in an existing checkpoint."""
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as checkpoint_file:
+        for line in checkpoint_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that item simply runs again.
+                continue
+            if isinstance(record, dict) and record.get("ok") and isinstance(record.get("key"), str):
+                completed.add(record["key"])
+    return completed
+
+
+class BatchWriter:
+    """Serialise result lines to stdout and the optional checkpoint file."""
+
+    def __init__(self, out: TextIO, checkpoint_path: Optional[str] = None):
+        self._out = out
+        self._lock = threading.Lock()
+        self._checkpoint = (
+            open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+        )
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._out.write(line)
+            self._out.flush()
+            if self._checkpoint is not None:
+                self._checkpoint.write(line)
+                self._checkpoint.flush()
+                os.fsync(self._checkpoint.fileno())
+
+    def close(self) -> None:
+        if self._checkpoint is not None:
+            self._checkpoint.close()
+
+
+def _default_runner() -> Callable[[str, str], Dict[str, Any]]:
+    local = threading.local()
+
+    def run(topic: str, workflow_id: str) -> Dict[str, Any]:
+        # Imported on the first item that passes validation.
+        from crew.main import create_agents, llm_config_manager, load_workflow_config, run_workflow
+
+        # Agents keep per-task executor state, so they are reused across
+        # items but never shared between threads. They are rebuilt when the
+        # configs they were built from change, so every item runs on the
+        # models its result cache key is computed from.
+        llm_config = llm_config_manager.snapshot()
+        workflow_config = load_workflow_config(workflow_id)
+        settings = (
+            workflow_config,
+            llm_config.providers,
+            llm_config.workflow_models.get(workflow_id),
+        )
+        agents_by_workflow = local.__dict__.setdefault("agents", {})
+        built = agents_by_workflow.get(workflow_id)
+        if built is None or built[0] != settings:
+            built = agents_by_workflow[workflow_id] = (
+                settings, create_agents(workflow_config, workflow_id, llm_config)
+            )
+        return run_workflow(topic, workflow_id, agents=built[1], llm_config=llm_config)
+
+    return run
+
+
+def run_batch(
+    items: List[Any],
+    allowed_workflow_ids: Iterable[str],
+    out: TextIO,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    checkpoint_path: Optional[str] = None,
+    runner: Optional[Callable[[str, str], Dict[str, Any]]] = None,
+) -> int:
+    """Run every item not already in the checkpoint; return the failure count."""
+    if concurrency < 1:
+        raise ValueError("Batch concurrency must be at least 1")
+    if not isinstance(allowed_workflow_ids, frozenset):
+        allowed_workflow_ids = frozenset(allowed_workflow_ids)
+    completed = load_checkpoint(checkpoint_path) if checkpoint_path else set()
+    runner = runner or _default_runner()
+    writer = BatchWriter(out, checkpoint_path)
+    failures = {"count": 0}
+    failures_lock = threading.Lock()
+
+    def run_item(index: int, key: str, item: Any) -> None:
+        record: Dict[str, Any] = {"index": index, "key": key}
+        if isinstance(item, dict) and isinstance(item.get("id"), str):
+            record["id"] = item["id"]
+        try:
+            topic, workflow_id = validate_payload(item, allowed_workflow_ids)
+            record.update(ok=True, result=runner(topic, workflow_id))
+        except Exception as error:
+            record.update(ok=False, error=str(error))
+            with failures_lock:
+                failures["count"] += 1
+        writer.write(record)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+            for index, item in enumerate(items):
+                key = item_key(index, item)
+                if key in completed:
+                    continue
+                pool.submit(run_item, index, key, item)
+    finally:
+        writer.close()
+    return failures["count"]
@@ -0,0 +1,125 @@
+"""Per-agent LLM call budgets and the retry policy of managed clients.
+
+An ``agentConfigs`` entry in ``workflow-models.json`` may bound its agent's
+calls with ``maxTokens`` (completion tokens per call), ``timeoutSeconds``
+(per request attempt) and ``maxRetries`` (further attempts after a
+transient failure, default 2). A workflow entry may set ``deadlineSeconds``
+for the whole run (see ``crew.cancellation.run_deadline``). Missing values
+keep the client defaults; invalid ones are reported and ignored, like
+unavailable fallbacks.
+
+Retries are made by ``ManagedOpenAICompletion`` rather than the OpenAI SDK,
+so that no attempt starts after the run's deadline: connection errors,
+timeouts, 408/409/429 and 5xx responses are retried with the SDK's
+exponential backoff (0.5 s doubling up to 8 s, with jitter), or after the
+server's ``Retry-After`` when it asks for longer.
+"""
+
+from dataclasses import dataclass
+import random
+import sys
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+DEFAULT_MAX_RETRIES = 2
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+RETRY_AFTER_MAX_SECONDS = 60.0
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429})
+
+
+@dataclass(frozen=True)
+class CallBudget:
+    max_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+    max_retries: Optional[int] = None
+
+    def llm_options(self) -> Dict[str, Any]:
+        """Keyword arguments for crewai's ``LLM``, without the unset ones."""
+        options = {
+            "max_tokens": self.max_tokens,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+        }
+        return {key: value for key, value in options.items() if value is not None}
+
+
+def _number(value: Any, minimum: float, integer: bool) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+        return None
+    return value if value >= minimum else None
+
+
+def _setting(config: Mapping[str, Any], key: str, minimum: float, integer: bool, owner: str) -> Any:
+    value = config.get(key)
+    if value is None:
+        return None
+    checked = _number(value, minimum, integer)
+    if checked is None:
+        kind = "an integer" if integer else "a number"
+        print(f"Ignoring invalid {key} {value!r} for {owner}: expected {kind} >= {minimum:g}", file=sys.stderr)
+    return checked
+
+
+def agent_call_budget(agent_model_config: Mapping[str, Any]) -> CallBudget:
+    owner = f"agent '{agent_model_config.get('agentName')}'"
+    timeout = _setting(agent_model_config, "timeoutSeconds", 0.001, False, owner)
+    return CallBudget(
+        max_tokens=_setting(agent_model_config, "maxTokens", 1, True, owner),
+        timeout=float(timeout) if timeout is not None else None,
+        max_retries=_setting(agent_model_config, "maxRetries", 0, True, owner),
+    )
+
+
+def workflow_deadline(workflow_model_config: Optional[Mapping[str, Any]]) -> Optional[float]:
+    if not workflow_model_config:
+        return None
+    owner = f"workflow '{workflow_model_config.get('workflowId')}'"
+    seconds = _setting(workflow_model_config, "deadlineSeconds", 0.001, False, owner)
+    return float(seconds) if seconds is not None else None
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether ``error`` (or an error it was raised from) is worth another attempt."""
+    import openai
+
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, (openai.APIConnectionError, ConnectionError, TimeoutError)):
+            return True
+        status = _status_code(current)
+        if status is not None:
+            return status in RETRYABLE_STATUS_CODES or status >= 500
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    try:
+        seconds = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+    return seconds if 0 < seconds <= RETRY_AFTER_MAX_SECONDS else None
+
+
+def retry_delay(
+    attempt: int,
+    error: Optional[BaseException] = None,
+    jitter: Callable[[], float] = random.random,
+) -> float:
+    """Seconds to wait before retry number ``attempt + 1``."""
+    backoff = min(RETRY_BASE_SECONDS * 2 ** attempt, RETRY_MAX_SECONDS) * (1 - 0.25 * jitter())
+    retry_after = _retry_after(error) if error is not None else None
+    return max(backoff, retry_after) if retry_after is not None else backoff
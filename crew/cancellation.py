@@ -0,0 +1,90 @@
+"""Cooperative cancellation for workflow runs.
+
+A run that executes off the request thread cannot be killed from outside, so
+the crew checks a token between agent steps and tasks and stops early once
+the caller has gone away.
+
+``run_deadline`` gives a run a deadline: the token is cancelled when it
+passes, and LLM calls in the run's context (see ``crew.managed_llm``) time
+out at the deadline instead of finishing their request first.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+
+class WorkflowCancelled(Exception):
+    """Raised inside a run after its cancellation token was triggered."""
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Workflow cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise WorkflowCancelled(self.reason)
+
+
+def check_cancelled(token: Optional[CancellationToken]) -> None:
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+# (time.monotonic() by which the run in this context must finish, its length).
+_deadline: contextvars.ContextVar[Optional[Tuple[float, float]]] = contextvars.ContextVar(
+    "run_deadline", default=None
+)
+
+
+def deadline_message(seconds: float) -> str:
+    return f"Workflow deadline of {seconds:g}s exceeded"
+
+
+@contextmanager
+def run_deadline(
+    seconds: Optional[float], token: Optional[CancellationToken] = None
+) -> Iterator[Optional[CancellationToken]]:
+    """Cancel ``token`` (a new one if None) once ``seconds`` have passed.
+
+    Yields the token to check. Without ``seconds`` nothing changes.
+    """
+    if seconds is None:
+        yield token
+        return
+    token = token if token is not None else CancellationToken()
+    timer = threading.Timer(seconds, token.cancel, (deadline_message(seconds),))
+    timer.daemon = True
+    context_token = _deadline.set((time.monotonic() + seconds, seconds))
+    timer.start()
+    try:
+        yield token
+    finally:
+        timer.cancel()
+        _deadline.reset(context_token)
+
+
+def deadline_remaining() -> Optional[float]:
+    """Seconds left before the deadline of the run in this context, or None."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline[0] - time.monotonic()
+
+
+def check_deadline() -> None:
+    """Raise ``WorkflowCancelled`` once the deadline of the run in this context has passed."""
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() >= deadline[0]:
+        raise WorkflowCancelled(deadline_message(deadline[1]))
@@ -0,0 +1,65 @@
+"""Stat-validated caches for configuration files.
+
+A cached value is rebuilt only when the file's ``(st_mtime_ns, st_size,
+st_ino)`` changes, so hot-reload keeps working without re-parsing the file on
+every access. Replacing a file atomically (write + rename) changes the inode,
+and in-place writes change the mtime or size.
+"""
+
+import os
+import threading
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+StatKey = Tuple[int, int, int]
+
+
+def stat_key(path: str) -> Optional[StatKey]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class StatCache(Generic[T]):
+    """Value derived from one file, reloaded only when the file's stat key changes.
+
+    ``loader(path)`` builds the value for an existing file and ``missing()``
+    builds it when the file does not exist. Loader errors propagate and are
+    not cached, so a half-written file is simply re-read on the next access.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        loader: Callable[[str], T],
+        missing: Callable[[], T],
+    ):
+        self.path = path
+        self._loader = loader
+        self._missing = missing
+        self._lock = threading.Lock()
+        self._entry: Optional[Tuple[Optional[StatKey], T]] = None
+        self.loads = 0
+
+    def get(self) -> T:
+        key = stat_key(self.path)
+        entry = self._entry
+        if entry is not None and entry[0] == key:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == key:
+                return entry[1]
+
+            value = self._loader(self.path) if key is not None else self._missing()
+            self._entry = (key, value)
+            self.loads += 1
+            return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
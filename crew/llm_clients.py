@@ -0,0 +1,174 @@
+"""Process-wide registry of reusable LLM clients.
+
+Building an LLM client also builds its HTTP connection pool, so every new
+client pays fresh DNS lookups and TLS handshakes. In a long-lived process
+(the FastAPI app or a warm worker) the registry hands out the same crewai
+``LLM`` for the same provider, credential, model and sampling options, and
+one keep-alive ``httpx`` client pair per provider base URL and credential for
+LangChain models. Entries that have not been used for ``idle_ttl`` seconds,
+or that fall off the end of the LRU order, are evicted.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+
+DEFAULT_IDLE_TTL_SECONDS = 300.0
+DEFAULT_MAX_ENTRIES = 64
+
+
+def credential_fingerprint(api_key: Optional[str]) -> str:
+    """Stable key component that avoids keeping raw API keys in registry keys."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _crew_llm_identity(
+    provider_id: Optional[str],
+    provider: Dict[str, Any],
+    model: str,
+    temperature: float,
+    options: Dict[str, Any],
+) -> Tuple:
+    return (
+        provider_id,
+        provider["baseURL"],
+        credential_fingerprint(provider.get("apiKey")),
+        model,
+        temperature,
+        tuple(sorted(options.items())),
+        json.dumps(provider.get("rateLimits"), sort_keys=True),
+    )
+
+
+class LLMClientRegistry:
+    def __init__(
+        self,
+        idle_ttl: float = DEFAULT_IDLE_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            value = factory()
+            self._entries[key] = (value, now)
+            self.misses += 1
+            self._evict(now)
+            return value
+
+    def crew_llm(
+        self,
+        provider_id: Optional[str],
+        provider: Dict[str, Any],
+        model: str,
+        temperature: float = 0.7,
+        fallbacks: Sequence[Tuple[Optional[str], Dict[str, Any], str]] = (),
+        hedge: bool = False,
+        **options: Any,
+    ) -> Any:
+        """Shared crewai ``LLM`` for an already resolved and locked provider/model.
+
+        ``fallbacks`` are further resolved and locked ``(provider_id, provider,
+        model)`` triples that the client fails over to, in order.
+        """
+        # Built first: get_or_create holds the registry lock while building.
+        fallback_llms = [
+            self.crew_llm(fallback_id, fallback_provider, fallback_model, temperature, **options)
+            for fallback_id, fallback_provider, fallback_model in fallbacks
+        ]
+        key = (
+            "crew",
+            _crew_llm_identity(provider_id, provider, model, temperature, options),
+            tuple(
+                _crew_llm_identity(fallback_id, fallback_provider, fallback_model, temperature, options)
+                for fallback_id, fallback_provider, fallback_model in fallbacks
+            ),
+            hedge,
+        )
+
+        def build():
+            from crewai import LLM
+            from crewai.llms.providers.openai.completion import OpenAICompletion
+            from crew.managed_llm import ManagedOpenAICompletion
+
+            llm = LLM(
+                model=f"openai/{model}",
+                base_url=provider["baseURL"],
+                api_key=provider["apiKey"],
+                temperature=temperature,
+                **options,
+            )
+            if type(llm) is not OpenAICompletion:
+                return llm
+            # Same routing decision as LLM(), plus response memoization, the
+            # provider's shared rate limits and failover.
+            return ManagedOpenAICompletion(
+                model=llm.model,
+                provider=llm.provider,
+                custom_openai=llm.custom_openai,
+                base_url=provider["baseURL"],
+                api_key=provider["apiKey"],
+                temperature=temperature,
+                provider_id=provider_id,
+                rate_limits=provider.get("rateLimits"),
+                fallbacks=[
+                    fallback_llm for fallback_llm in fallback_llms
+                    if isinstance(fallback_llm, ManagedOpenAICompletion)
+                ],
+                hedge=hedge,
+                **options,
+            )
+
+        return self.get_or_create(key, build)
+
+    def http_clients(self, base_url: str, api_key: Optional[str]) -> Tuple[Any, Any]:
+        """Shared keep-alive ``(httpx.Client, httpx.AsyncClient)`` for one endpoint/credential."""
+        key = ("http", base_url, credential_fingerprint(api_key))
+
+        def build():
+            import httpx
+
+            return httpx.Client(), httpx.AsyncClient()
+
+        return self.get_or_create(key, build)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        # Entries are kept in last-used order, so idle ones are at the front.
+        # Evicted clients are only dropped, never closed: a run that fetched
+        # one before eviction may still be using it, and its connections are
+        # released once the last holder lets go of it.
+        while self._entries:
+            oldest_key, (_, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self.idle_ttl and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[oldest_key]
+
+
+llm_client_registry = LLMClientRegistry()
@@ -4,105 +4,180 @@ Handles loading and creating LLM instances from configuration
 """
 import json
 import os
-from typing import Dict, Optional
-from langchain_openai import ChatOpenAI
+from copy import deepcopy
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
 from dotenv import load_dotenv
+from crew.call_budgets import CallBudget, agent_call_budget
+from crew.file_cache import StatCache
+from crew.llm_clients import llm_client_registry
 from crew.provider_security import lock_provider_and_model, resolve_provider_or_fallback
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 load_dotenv()
 
+
+class FrozenDict(dict):
+    """A dict that refuses changes; ``deepcopy`` returns a plain, mutable copy."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("LLM config entries are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __deepcopy__(self, memo):
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only copy of parsed JSON: dicts become FrozenDicts, lists tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class LLMConfigSnapshot:
+    """Providers and workflow model configs parsed together for one workflow run.
+
+    Both levels are read-only and shared between callers: the mappings are
+    ``MappingProxyType`` views and every nested entry is frozen (provider
+    entries are deep-copied into plain dicts by
+    ``resolve_provider_or_fallback`` before use).
+    """
+
+    providers: Mapping[str, Dict]
+    workflow_models: Mapping[str, Dict]
+
+
 class LLMConfigManager:
     """Manages LLM provider configurations and creates LLM instances"""
     
-    def __init__(self):
-        self.providers_config_path = os.path.join(
-            os.path.dirname(__file__), '..', 'config', 'llm-providers.json'
+    def __init__(
+        self,
+        providers_config_path: Optional[str] = None,
+        workflow_models_config_path: Optional[str] = None,
+    ):
+        # The environment can point a process at other config files (the
+        # benchmark harness uses this to route every agent to a mock server).
+        self.providers_config_path = (
+            providers_config_path
+            or os.getenv('LLM_PROVIDERS_CONFIG_PATH')
+            or os.path.join(os.path.dirname(__file__), '..', 'config', 'llm-providers.json')
         )
-        self.workflow_models_config_path = os.path.join(
-            os.path.dirname(__file__), '..', 'config', 'workflow-models.json'
+        self.workflow_models_config_path = (
+            workflow_models_config_path
+            or os.getenv('WORKFLOW_MODELS_CONFIG_PATH')
+            or os.path.join(os.path.dirname(__file__), '..', 'config', 'workflow-models.json')
+        )
+        # Files are re-parsed only when their stat key changes, which keeps
+        # hot-reload working without parsing JSON on every property access.
+        self._providers_cache = StatCache(
+            self.providers_config_path, self._parse_providers, self._default_providers
+        )
+        self._workflow_models_cache = StatCache(
+            self.workflow_models_config_path, self._parse_workflow_models,
+            lambda: MappingProxyType({}),
         )
-        # Don't cache configs - reload on each access for hot-reload support
-        self._providers_cache = None
-        self._workflow_models_cache = None
-        self._cache_timestamp = 0
 
     @property
-    def providers(self) -> Dict:
+    def providers(self) -> Mapping[str, Dict]:
         """Get providers with hot-reload support"""
         return self._load_providers()
 
     @property
-    def workflow_models(self) -> Dict:
+    def workflow_models(self) -> Mapping[str, Dict]:
         """Get workflow models with hot-reload support"""
         return self._load_workflow_models()
+
+    def snapshot(self) -> LLMConfigSnapshot:
+        """Get one consistent view of both config files for a whole workflow run"""
+        return LLMConfigSnapshot(
+            providers=self._load_providers(),
+            workflow_models=self._load_workflow_models(),
+        )
     
-    def _load_providers(self) -> Dict:
-        """Load LLM providers configuration"""
-        if not os.path.exists(self.providers_config_path):
-            # Return default provider (Tu-Zi)
-            return {
-                'tuzi': {
-                    'id': 'tuzi',
-                    'name': 'Tu-Zi (Claude Sonnet 4.5)',
-                    'type': 'custom',
-                    'baseURL': os.getenv('OPENAI_API_BASE', 'https://api.tu-zi.com/v1'),
-                    'apiKey': os.getenv('OPENAI_API_KEY', ''),
-                    'models': [os.getenv('OPENAI_MODEL_NAME', 'claude-sonnet-4.5')],
-                    'defaultModel': os.getenv('OPENAI_MODEL_NAME', 'claude-sonnet-4.5'),
-                    'enabled': True,
-                }
-            }
+    def _default_providers(self) -> Mapping[str, Dict]:
+        """Default provider (Tu-Zi) used when no providers file exists"""
+        return MappingProxyType({
+            'tuzi': _freeze({
+                'id': 'tuzi',
+                'name': 'Tu-Zi (Claude Sonnet 4.5)',
+                'type': 'custom',
+                'baseURL': os.getenv('OPENAI_API_BASE', 'https://api.tu-zi.com/v1'),
+                'apiKey': os.getenv('OPENAI_API_KEY', ''),
+                'models': [os.getenv('OPENAI_MODEL_NAME', 'claude-sonnet-4.5')],
+                'defaultModel': os.getenv('OPENAI_MODEL_NAME', 'claude-sonnet-4.5'),
+                'enabled': True,
+            })
+        })
 
+    def _parse_providers(self, path: str) -> Mapping[str, Dict]:
+        """Parse LLM providers configuration"""
+        with open(path, 'r', encoding='utf-8') as f:
+            providers_list = json.load(f)
+        # Convert list to dict for easier lookup
+        providers = {}
+        for p in providers_list:
+            if p.get('enabled', True):
+                p = dict(p)
+                provider_id = p['id']
+
+                # Override API key from environment variable if available
+                # Priority: {PROVIDER_ID}_API_KEY > OPENAI_API_KEY (for tuzi)
+                env_key = f"{provider_id.upper()}_API_KEY"
+                if os.getenv(env_key):
+                    p['apiKey'] = os.getenv(env_key)
+                elif provider_id == 'tuzi' and os.getenv('OPENAI_API_KEY'):
+                    # Backward compatibility for tuzi
+                    p['apiKey'] = os.getenv('OPENAI_API_KEY')
+
+                # Override baseURL from environment variable if available
+                # This allows flexibility to change endpoints without modifying JSON
+                env_base_url = f"{provider_id.upper()}_API_BASE"
+                if os.getenv(env_base_url):
+                    p['baseURL'] = os.getenv(env_base_url)
+                elif provider_id == 'tuzi' and os.getenv('OPENAI_API_BASE'):
+                    # Backward compatibility for tuzi
+                    p['baseURL'] = os.getenv('OPENAI_API_BASE')
+
+                # Official DeepSeek is never allowed to inherit a proxy
+                # URL or a non-Flash model from JSON/environment config.
+                p, _ = lock_provider_and_model(provider_id, p)
+                providers[provider_id] = _freeze(p)
+        return MappingProxyType(providers)
+
+    def _parse_workflow_models(self, path: str) -> Mapping[str, Dict]:
+        """Parse workflow model configurations"""
+        with open(path, 'r', encoding='utf-8') as f:
+            configs_list = json.load(f)
+        # Convert list to dict for easier lookup
+        return MappingProxyType({c['workflowId']: _freeze(c) for c in configs_list})
+
+    def _load_providers(self) -> Mapping[str, Dict]:
+        """Load LLM providers configuration"""
         try:
-            with open(self.providers_config_path, 'r', encoding='utf-8') as f:
-                providers_list = json.load(f)
-                # Convert list to dict for easier lookup
-                providers = {}
-                for p in providers_list:
-                    if p.get('enabled', True):
-                        p = dict(p)
-                        provider_id = p['id']
-
-                        # Override API key from environment variable if available
-                        # Priority: {PROVIDER_ID}_API_KEY > OPENAI_API_KEY (for tuzi)
-                        env_key = f"{provider_id.upper()}_API_KEY"
-                        if os.getenv(env_key):
-                            p['apiKey'] = os.getenv(env_key)
-                        elif provider_id == 'tuzi' and os.getenv('OPENAI_API_KEY'):
-                            # Backward compatibility for tuzi
-                            p['apiKey'] = os.getenv('OPENAI_API_KEY')
-
-                        # Override baseURL from environment variable if available
-                        # This allows flexibility to change endpoints without modifying JSON
-                        env_base_url = f"{provider_id.upper()}_API_BASE"
-                        if os.getenv(env_base_url):
-                            p['baseURL'] = os.getenv(env_base_url)
-                        elif provider_id == 'tuzi' and os.getenv('OPENAI_API_BASE'):
-                            # Backward compatibility for tuzi
-                            p['baseURL'] = os.getenv('OPENAI_API_BASE')
-
-                        # Official DeepSeek is never allowed to inherit a proxy
-                        # URL or a non-Flash model from JSON/environment config.
-                        p, _ = lock_provider_and_model(provider_id, p)
-                        providers[provider_id] = p
-                return providers
+            return self._providers_cache.get()
         except Exception as e:
             print(f"Error loading LLM providers: {e}")
-            return {}
+            return MappingProxyType({})
     
-    def _load_workflow_models(self) -> Dict:
+    def _load_workflow_models(self) -> Mapping[str, Dict]:
         """Load workflow model configurations"""
-        if not os.path.exists(self.workflow_models_config_path):
-            return {}
-        
         try:
-            with open(self.workflow_models_config_path, 'r', encoding='utf-8') as f:
-                configs_list = json.load(f)
-                # Convert list to dict for easier lookup
-                return {c['workflowId']: c for c in configs_list}
+            return self._workflow_models_cache.get()
         except Exception as e:
             print(f"Error loading workflow models: {e}")
-            return {}
+            return MappingProxyType({})
     
     def get_llm_for_agent(
         self, 
@@ -110,7 +185,7 @@ class LLMConfigManager:
         agent_name: str,
         temperature: float = 0.7,
         max_tokens: int = 4000
-    ) -> ChatOpenAI:
+    ) -> "ChatOpenAI":
         """
         Get LLM instance for a specific agent in a workflow
         
@@ -118,17 +193,19 @@ class LLMConfigManager:
             workflow_id: ID of the workflow
             agent_name: Name of the agent
             temperature: LLM temperature
-            max_tokens: Maximum tokens
+            max_tokens: Maximum tokens, unless the agent config sets maxTokens
             
         Returns:
             ChatOpenAI instance configured for the agent
         """
-        # Get workflow model config
-        workflow_config = self.workflow_models.get(workflow_id)
+        # Read both files once so the agent config and provider agree
+        config = self.snapshot()
+        workflow_config = config.workflow_models.get(workflow_id)
         
         # Determine which provider and model to use
         provider_id = None
         model = None
+        budget = CallBudget()
         
         if workflow_config:
             # Check if there's a specific config for this agent
@@ -137,6 +214,7 @@ class LLMConfigManager:
                 if agent_config['agentName'] == agent_name:
                     provider_id = agent_config['providerId']
                     model = agent_config['model']
+                    budget = agent_call_budget(agent_config)
                     break
             
             # If no agent-specific config, use workflow default
@@ -144,7 +222,7 @@ class LLMConfigManager:
                 provider_id = workflow_config.get('defaultProviderId')
                 model = workflow_config.get('defaultModel')
         
-        providers = self.providers
+        providers = config.providers
 
         # If still no provider, use the first enabled provider.
         if not provider_id and providers:
@@ -167,54 +245,15 @@ class LLMConfigManager:
 
         provider, model = lock_provider_and_model(provider_id, provider, model)
         
-        # Create and return LLM instance
-        # Note: LangChain/OpenAI SDK reads OPENAI_API_BASE and OPENAI_API_KEY
-        # from environment variables, which may override our parameters.
-        # We need to temporarily clear these env vars when creating the client.
-
-        # Save original env vars
-        original_base = os.environ.get('OPENAI_API_BASE')
-        original_key = os.environ.get('OPENAI_API_KEY')
-        original_base_url = os.environ.get('OPENAI_BASE_URL')
-
-        try:
-            # Temporarily set env vars to our provider's values
-            os.environ['OPENAI_API_BASE'] = provider['baseURL']
-            os.environ['OPENAI_BASE_URL'] = provider['baseURL']
-            os.environ['OPENAI_API_KEY'] = provider['apiKey']
-
-            llm = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                base_url=provider['baseURL'],
-                api_key=provider['apiKey'],
-                streaming=True,
-            )
-
-            return llm
-        finally:
-            # Restore original env vars
-            if original_base is not None:
-                os.environ['OPENAI_API_BASE'] = original_base
-            elif 'OPENAI_API_BASE' in os.environ:
-                del os.environ['OPENAI_API_BASE']
-
-            if original_base_url is not None:
-                os.environ['OPENAI_BASE_URL'] = original_base_url
-            elif 'OPENAI_BASE_URL' in os.environ:
-                del os.environ['OPENAI_BASE_URL']
-
-            if original_key is not None:
-                os.environ['OPENAI_API_KEY'] = original_key
-            elif 'OPENAI_API_KEY' in os.environ:
-                del os.environ['OPENAI_API_KEY']
+        return self._build_chat_model(
+            provider, model, temperature, budget.max_tokens or max_tokens, budget
+        )
     
     def get_default_llm(
         self,
         temperature: float = 0.7,
         max_tokens: int = 4000
-    ) -> ChatOpenAI:
+    ) -> "ChatOpenAI":
         """
         Get default LLM instance
         
@@ -242,41 +281,47 @@ class LLMConfigManager:
 
         provider, model = lock_provider_and_model(provider_id, provider, model)
         
-        # Temporarily set env vars to prevent override
-        original_base = os.environ.get('OPENAI_API_BASE')
-        original_key = os.environ.get('OPENAI_API_KEY')
-        original_base_url = os.environ.get('OPENAI_BASE_URL')
+        return self._build_chat_model(provider, model, temperature, max_tokens)
 
-        try:
-            os.environ['OPENAI_API_BASE'] = provider['baseURL']
-            os.environ['OPENAI_BASE_URL'] = provider['baseURL']
-            os.environ['OPENAI_API_KEY'] = provider['apiKey']
-
-            llm = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                base_url=provider['baseURL'],
-                api_key=provider['apiKey'],
-                streaming=True,
-            )
-
-            return llm
-        finally:
-            if original_base is not None:
-                os.environ['OPENAI_API_BASE'] = original_base
-            elif 'OPENAI_API_BASE' in os.environ:
-                del os.environ['OPENAI_API_BASE']
-
-            if original_base_url is not None:
-                os.environ['OPENAI_BASE_URL'] = original_base_url
-            elif 'OPENAI_BASE_URL' in os.environ:
-                del os.environ['OPENAI_BASE_URL']
-
-            if original_key is not None:
-                os.environ['OPENAI_API_KEY'] = original_key
-            elif 'OPENAI_API_KEY' in os.environ:
-                del os.environ['OPENAI_API_KEY']
+    def _build_chat_model(
+        self,
+        provider: Dict,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        budget: CallBudget = CallBudget(),
+    ) -> "ChatOpenAI":
+        """
+        Build a ChatOpenAI client from explicit credentials only
+
+        Base URL and API key are passed as constructor arguments, which take
+        precedence over OPENAI_API_BASE/OPENAI_BASE_URL/OPENAI_API_KEY, so
+        nothing here reads or writes process-global state and concurrent
+        construction for different providers is safe.
+        """
+        # Imported here: langchain_openai alone adds most of a second to startup.
+        from langchain_openai import ChatOpenAI
+
+        http_client, http_async_client = llm_client_registry.http_clients(
+            provider['baseURL'], provider['apiKey']
+        )
+        # Unset budget values keep ChatOpenAI's own defaults.
+        options = {
+            key: value
+            for key, value in (('timeout', budget.timeout), ('max_retries', budget.max_retries))
+            if value is not None
+        }
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            base_url=provider['baseURL'],
+            api_key=provider['apiKey'],
+            streaming=True,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            **options,
+        )
 
 # Global instance
 llm_config_manager = LLMConfigManager()
@@ -0,0 +1,103 @@
+"""Per-call memoization of LLM responses.
+
+When a late task fails, the retried run sends byte-identical prompts for
+every task that had already finished. ``ManagedOpenAICompletion`` keys each
+call on the endpoint, model, sampling options and the full message list and
+replays stored responses, so only the calls that failed reach the provider
+again. Responses are kept in a ``ResultCache`` (SQLite, TTL, LRU), which
+makes them visible to the next process as well.
+
+Memoization is opt-in: set ``LLM_MEMO_ENABLED=1``. The store lives in a
+private directory (``LLM_MEMO_DIR``, created 0700) as a 0600 file, since it
+holds prompts and responses. ``llm_memo_disabled()`` turns it off for one run
+(creative runs that need fresh output pass ``bypass_cache``).
+"""
+
+from contextlib import contextmanager
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Iterator, Optional
+
+from crew.result_cache import ResultCache
+
+
+DEFAULT_LLM_MEMO_DIR = os.path.join(tempfile.gettempdir(), "qiaoagent-llm-memo")
+LLM_MEMO_FILENAME = "memo.sqlite3"
+DEFAULT_LLM_MEMO_TTL_SECONDS = 60 * 60
+DEFAULT_LLM_MEMO_MAX_ENTRIES = 5000
+# Bump when the key recipe changes.
+MEMO_KEY_VERSION = 1
+
+_memo_enabled: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "llm_memo_enabled", default=True
+)
+
+
+def llm_memo_enabled() -> bool:
+    return _memo_enabled.get()
+
+
+@contextmanager
+def llm_memo_disabled(disabled: bool = True) -> Iterator[None]:
+    """Skip the memo for LLM calls made in this context (and tasks it spawns)."""
+    token = _memo_enabled.set(not disabled and _memo_enabled.get())
+    try:
+        yield
+    finally:
+        _memo_enabled.reset(token)
+
+
+def memo_key(
+    base_url: Optional[str],
+    model: str,
+    temperature: Optional[float],
+    max_tokens: Any,
+    stop: Any,
+    messages: Any,
+) -> str:
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    material = {
+        "version": MEMO_KEY_VERSION,
+        "base_url": base_url,
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stop": stop,
+        "messages": messages,
+    }
+    canonical = json.dumps(material, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+_llm_memo: Optional[ResultCache] = None
+_llm_memo_lock = threading.Lock()
+
+
+def _private_store(directory: str) -> str:
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    path = os.path.join(directory, LLM_MEMO_FILENAME)
+    # SQLite creates its -wal/-shm files with the database file's mode.
+    os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+    return path
+
+
+def llm_memo() -> Optional[ResultCache]:
+    """The process-wide response store, or None unless LLM_MEMO_ENABLED is set."""
+    global _llm_memo
+    if os.getenv("LLM_MEMO_ENABLED", "").lower() not in ("1", "true", "yes"):
+        return None
+    directory = os.getenv("LLM_MEMO_DIR", DEFAULT_LLM_MEMO_DIR)
+    with _llm_memo_lock:
+        if _llm_memo is None or os.path.dirname(_llm_memo.path) != directory:
+            path = _private_store(directory)
+            _llm_memo = ResultCache(
+                path,
+                float(os.getenv("LLM_MEMO_TTL_SECONDS", str(DEFAULT_LLM_MEMO_TTL_SECONDS))),
+                int(os.getenv("LLM_MEMO_MAX_ENTRIES", str(DEFAULT_LLM_MEMO_MAX_ENTRIES))),
+            )
+        return _llm_memo
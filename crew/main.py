@@ -1,89 +1,53 @@
 """
 CrewAI workflow engine - dynamically loads and executes workflows
+
+crewai and langchain_openai take seconds to import, so they are imported by
+the functions that build agents, tasks and crews rather than at module
+level: a run answered from the result cache never loads them.
 """
-import json
+import functools
 import os
 import sys
 import io
+import threading
+import time
 import re
 from contextlib import redirect_stdout, redirect_stderr
-from crewai import Agent, Task, Crew, Process, LLM
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks.base import BaseCallbackHandler
 from dotenv import load_dotenv
+from crew.call_budgets import agent_call_budget, workflow_deadline
+from crew.cancellation import WorkflowCancelled, check_cancelled, run_deadline
+from crew.llm_clients import llm_client_registry
 from crew.llm_config import llm_config_manager
+from crew.llm_memo import llm_memo_disabled
+from crew.progress import send_progress
+from crew.prompt_layout import agent_backstory, prompt_layout, task_description, topic_context
+from crew.result_cache import result_cache_key, workflow_result_cache
+from crew.result_parsers import ResultStream, output_config, parse_output
+from crew.task_context import context_policy, limit_context, limits_context
+from crew.telemetry import add_span, instrumented_run, name_agents, span
+from crew.token_stream import StreamingCallbackHandler, stream_tokens
+from crew.verbosity import crewai_verbose, current_verbosity, log_summary
 from crew.provider_security import lock_provider_and_model, resolve_provider_or_fallback
+from crew.rate_limiter import estimate_tokens
+from crew.task_graph import (
+    build_task_graph,
+    max_parallel_tasks,
+    run_task_graph,
+    sequential_dependencies,
+    uses_task_graph,
+)
+from crew.workflow_catalog import workflow_catalog
 
 load_dotenv()
 
-class StreamingCallbackHandler(BaseCallbackHandler):
-    """Custom callback handler to capture streaming output"""
-
-    def __init__(self, agent_name="Agent"):
-        self.agent_name = agent_name
-        self.current_text = ""
-
-    def on_llm_start(self, serialized, prompts, **kwargs):
-        """Called when LLM starts"""
-        send_progress('thinking', f'开始思考...', self.agent_name)
-
-    def on_llm_new_token(self, token: str, **kwargs):
-        """Called when LLM generates a new token"""
-        self.current_text += token
-        # Send every few tokens to avoid too many updates
-        if len(self.current_text) > 50:
-            send_progress('stream', self.current_text, self.agent_name)
-            self.current_text = ""
-
-    def on_llm_end(self, response, **kwargs):
-        """Called when LLM finishes"""
-        if self.current_text:
-            send_progress('stream', self.current_text, self.agent_name)
-            self.current_text = ""
-        send_progress('thinking', f'思考完成', self.agent_name)
-
-    def on_chain_start(self, serialized, inputs, **kwargs):
-        """Called when chain starts"""
-        pass
-
-    def on_chain_end(self, outputs, **kwargs):
-        """Called when chain ends"""
-        pass
-
-    def on_agent_action(self, action, **kwargs):
-        """Called when agent takes an action"""
-        send_progress('thinking', f'执行动作: {action.tool}', self.agent_name)
-
-    def on_agent_finish(self, finish, **kwargs):
-        """Called when agent finishes"""
-        send_progress('output', f'任务完成', self.agent_name)
-
-def send_progress(progress_type: str, message: str, agent: str = None):
-    """Send progress update to stderr with immediate flush"""
-    if agent:
-        progress_data = json.dumps({"type": progress_type, "message": message, "agent": agent}, ensure_ascii=False)
-    else:
-        progress_data = json.dumps({"type": progress_type, "message": message}, ensure_ascii=False)
-    # Force immediate output by flushing stderr
-    sys.stderr.write(f"PROGRESS:{progress_data}\n")
-    sys.stderr.flush()
-
 def load_workflow_config(workflow_id: str):
-    """Load workflow configuration from workflows.json"""
-    workflows_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'workflows.json')
-    
-    with open(workflows_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Find the workflow by id
-    for workflow in data.get("workflows", []):
-        if workflow["id"] == workflow_id:
-            return workflow
-    
-    raise ValueError(f"Workflow '{workflow_id}' not found")
+    """Load workflow configuration from the indexed workflows.json catalog"""
+    return workflow_catalog.get(workflow_id)
 
 def create_llm(streaming=False, callbacks=None):
     """Create LLM instance with tu-zi.com API"""
+    from langchain_openai import ChatOpenAI
+
     provider, model = lock_provider_and_model(
         None,
         {
@@ -103,16 +67,17 @@ def create_llm(streaming=False, callbacks=None):
         callbacks=callbacks if callbacks else []
     )
 
-def create_agents(workflow_config, workflow_id, callbacks_map=None):
-    """Create agents from workflow configuration"""
-    agents = {}
+def resolve_agent_models(workflow_config, workflow_id, llm_config=None):
+    """Resolve (provider_id, provider, model) for each agent, locks applied"""
+    resolved = {}
+    # One snapshot per run: every agent sees the same provider/model config
+    # even if the JSON files are edited while the crew is being built.
+    llm_config = llm_config or llm_config_manager.snapshot()
+    workflow_model_config = llm_config.workflow_models.get(workflow_id)
 
     for agent_config in workflow_config.get("agents", []):
         agent_name = agent_config["name"]
 
-        # Get provider config for this agent
-        workflow_model_config = llm_config_manager.workflow_models.get(workflow_id)
-
         # Determine provider and model
         provider_id = None
         model = None
@@ -130,7 +95,7 @@ def create_agents(workflow_config, workflow_id, callbacks_map=None):
                 provider_id = workflow_model_config.get('defaultProviderId')
                 model = workflow_model_config.get('defaultModel')
 
-        providers = llm_config_manager.providers
+        providers = llm_config.providers
         fallback_provider = {
             "id": "environment",
             "type": "custom",
@@ -151,18 +116,101 @@ def create_agents(workflow_config, workflow_id, callbacks_map=None):
         # The provider identity and its credentials are resolved atomically
         # before the official DeepSeek endpoint/model lock is applied.
         provider, model = lock_provider_and_model(provider_id, provider, model)
-        agent_llm = LLM(
-            model=f"openai/{model}",
-            base_url=provider['baseURL'],
-            api_key=provider['apiKey'],
-            temperature=0.7,
+        resolved[agent_name] = (provider_id, provider, model)
+
+    return resolved
+
+def resolve_agent_fallbacks(workflow_config, workflow_id, llm_config=None):
+    """Resolve each agent's ordered failover targets and hedge flag, locks applied
+
+    Failover targets go through the same provider resolution and DeepSeek lock
+    as the primary model. A target whose provider is missing or disabled is
+    skipped; it never falls back to the environment provider.
+    """
+    resolved = {}
+    llm_config = llm_config or llm_config_manager.snapshot()
+    workflow_model_config = llm_config.workflow_models.get(workflow_id) or {}
+    agent_model_configs = {
+        ac['agentName']: ac for ac in workflow_model_config.get('agentConfigs', [])
+    }
+
+    for agent_config in workflow_config.get("agents", []):
+        agent_name = agent_config["name"]
+        agent_model_config = agent_model_configs.get(agent_name, {})
+        fallbacks = []
+        for fallback in agent_model_config.get('fallbacks') or []:
+            provider_id = fallback.get('providerId')
+            if not provider_id or provider_id not in llm_config.providers:
+                print(
+                    f"Skipping unavailable fallback provider '{provider_id}' for agent '{agent_name}'",
+                    file=sys.stderr,
+                )
+                continue
+            provider = resolve_provider_or_fallback(provider_id, llm_config.providers, {})
+            model = fallback.get('model') or provider.get('defaultModel')
+            provider, model = lock_provider_and_model(provider_id, provider, model)
+            fallbacks.append((provider_id, provider, model))
+        resolved[agent_name] = (fallbacks, agent_model_config.get('hedge') is True)
+
+    return resolved
+
+def resolve_agent_budgets(workflow_config, workflow_id, llm_config=None):
+    """Resolve each agent's maxTokens/timeoutSeconds/maxRetries into a CallBudget"""
+    llm_config = llm_config or llm_config_manager.snapshot()
+    workflow_model_config = llm_config.workflow_models.get(workflow_id) or {}
+    agent_model_configs = {
+        ac['agentName']: ac for ac in workflow_model_config.get('agentConfigs', [])
+    }
+    return {
+        agent_config["name"]: agent_call_budget(agent_model_configs.get(agent_config["name"], {}))
+        for agent_config in workflow_config.get("agents", [])
+    }
+
+def with_workflow_deadline(func):
+    """Run func(topic, workflow_id, cancel_token, ..., llm_config=...) under the workflow's deadlineSeconds
+
+    The run's one LLM config snapshot is taken here and passed on as
+    llm_config, so the deadline, the result cache key and the agents all
+    see the same config. The deadline cancels the run's token (a new one if
+    the caller passed none), and LLM calls still in flight time out at it.
+    """
+    @functools.wraps(func)
+    def wrapper(topic, workflow_id, cancel_token=None, *args, llm_config=None, **kwargs):
+        llm_config = llm_config or llm_config_manager.snapshot()
+        seconds = workflow_deadline(llm_config.workflow_models.get(workflow_id))
+        with run_deadline(seconds, cancel_token) as cancel_token:
+            return func(topic, workflow_id, cancel_token, *args, llm_config=llm_config, **kwargs)
+
+    return wrapper
+
+def create_agents(workflow_config, workflow_id, llm_config=None, agent_models=None):
+    """Create agents from workflow configuration"""
+    from crewai import Agent
+
+    agents = {}
+    llm_config = llm_config or llm_config_manager.snapshot()
+    if agent_models is None:
+        agent_models = resolve_agent_models(workflow_config, workflow_id, llm_config)
+    agent_fallbacks = resolve_agent_fallbacks(workflow_config, workflow_id, llm_config)
+    agent_budgets = resolve_agent_budgets(workflow_config, workflow_id, llm_config)
+    layout = prompt_layout(workflow_config)
+
+    for agent_config in workflow_config.get("agents", []):
+        agent_name = agent_config["name"]
+        provider_id, provider, model = agent_models[agent_name]
+        fallbacks, hedge = agent_fallbacks[agent_name]
+        # Runs in the same process share one client (and its keep-alive
+        # connections) per provider, credential, model, temperature and budget.
+        agent_llm = llm_client_registry.crew_llm(
+            provider_id, provider, model, temperature=0.7, fallbacks=fallbacks, hedge=hedge,
+            **agent_budgets[agent_name].llm_options(),
         )
 
         agent = Agent(
             role=agent_config["role"],
             goal=agent_config["goal"],
-            backstory=agent_config.get("prompt", ""),
-            verbose=True,
+            backstory=agent_backstory(agent_config.get("prompt", ""), layout),
+            verbose=crewai_verbose(),
             allow_delegation=False,
             llm=agent_llm
         )
@@ -172,11 +220,14 @@ def create_agents(workflow_config, workflow_id, callbacks_map=None):
 
 def create_tasks(workflow_config, agents, topic: str):
     """Create tasks from workflow configuration"""
+    from crewai import Task
+
     tasks = []
-    
+    layout = prompt_layout(workflow_config)
+
     for task_config in workflow_config.get("tasks", []):
-        # Replace {topic} placeholder with actual topic
-        description = task_config["description"].replace("{topic}", topic)
+        # Replace {topic} placeholder with the topic, or a fixed reference to it
+        description = task_description(task_config["description"], topic, layout)
         
         # Get the agent for this task
         agent_name = task_config["agent"]
@@ -194,125 +245,234 @@ def create_tasks(workflow_config, agents, topic: str):
     
     return tasks
 
-def parse_result(raw_output: str, workflow_id: str):
-    """Parse CrewAI output into structured format"""
-    # For tech_writer workflow, extract title, article, and summary
-    if workflow_id == "tech_writer":
-        # Simple parsing - in production, you might want more sophisticated parsing
-        lines = raw_output.split('\n')
-        
-        title = ""
-        article = ""
-        summary = ""
-        
-        # Try to extract structured content
-        current_section = None
-        for line in lines:
-            line_lower = line.lower().strip()
-            
-            if '标题' in line_lower or 'title' in line_lower:
-                current_section = 'title'
-                # Extract title from this line or next
-                if ':' in line or '：' in line:
-                    title = line.split(':', 1)[-1].split('：', 1)[-1].strip()
-            elif '摘要' in line_lower or 'summary' in line_lower:
-                current_section = 'summary'
-            elif '正文' in line_lower or 'article' in line_lower or 'content' in line_lower:
-                current_section = 'article'
-            elif current_section == 'title' and not title:
-                title = line.strip()
-            elif current_section == 'article':
-                article += line + '\n'
-            elif current_section == 'summary':
-                summary += line + '\n'
-        
-        # If parsing failed, use the whole output as article
-        if not article:
-            article = raw_output
-        
-        if not title:
-            title = "AI 创作内容"
-        
-        if not summary:
-            summary = article[:200] + "..."
-        
-        return {
-            "title": title.strip(),
-            "article": article.strip(),
-            "summary": summary.strip()
-        }
-    
-    elif workflow_id == "marketing_writer":
-        # For marketing workflow
-        return {
-            "title": "营销文案",
-            "article": raw_output,
-            "summary": raw_output[:200] + "..."
-        }
-    
-    # Default format
-    return {
-        "title": "生成内容",
-        "article": raw_output,
-        "summary": raw_output[:200] + "..."
-    }
+def parse_result(raw_output: str, workflow_id: str, workflow_config=None):
+    """Parse CrewAI output into title/article/summary with the workflow's output parser"""
+    return parse_output(raw_output, output_config(workflow_id, workflow_config))
+
+def execute_tasks(
+    workflow_config, agents, tasks, step_callback, task_callback, checkpoint=None,
+    task_started=None, context_prefix=None,
+):
+    """
+    Run tasks as a sequential crew, or as a dependency DAG when any task
+    declares depends_on. Callbacks receive (output, agent_name), and
+    task_started receives the index of each task as it starts. Finished
+    tasks are saved to the checkpoint, and tasks it already records are
+    skipped. context_prefix starts every task's context, ahead of the
+    earlier outputs (see crew.prompt_layout), and each task's context
+    policy limits the earlier outputs it receives (see crew.task_context).
+    Returns the raw output of the last task.
+    """
+    task_started = task_started or (lambda index: None)
+    task_configs = workflow_config.get("tasks", [])
+    policies = [context_policy(task_config) for task_config in task_configs]
+    completed = checkpoint.completed_outputs() if checkpoint is not None else {}
+
+    def finish_task(index, task_output, started, **context_tokens):
+        finished = time.monotonic()
+        add_span('task', started, finished, index=index, agent=task_configs[index]["agent"], **context_tokens)
+        context_note = ''
+        if context_tokens:
+            context_note = (
+                f', 上下文 {context_tokens["context_tokens_full"]} → {context_tokens["context_tokens"]} tokens'
+            )
+        log_summary(
+            f'任务 {index + 1}/{len(task_configs)} 完成: {task_configs[index]["agent"]}, '
+            f'{finished - started:.1f} 秒, {len(str(task_output))} 字符{context_note}'
+        )
+        # Save before the callback so a cancellation still keeps the output.
+        if checkpoint is not None:
+            checkpoint.save_task(index, task_configs[index]["agent"], task_output)
+        task_callback(task_output, task_configs[index]["agent"])
+
+    # Set on every run: agents may be reused across runs (see crew.batch), and
+    # a Crew only fills in an agent's step_callback while it is still None.
+    for agent_name, agent in agents.items():
+        agent.step_callback = (
+            lambda step_output, agent_name=agent_name: step_callback(step_output, agent_name)
+        )
 
-def run_workflow(topic: str, workflow_id: str):
-    """Main function to run a workflow"""
-    try:
-        # Load workflow configuration
-        workflow_config = load_workflow_config(workflow_id)
+    if (
+        not uses_task_graph(workflow_config) and not completed
+        and context_prefix is None and not limits_context(workflow_config)
+    ):
+        from crewai import Crew, Process
 
-        # Create agents
-        agents = create_agents(workflow_config, workflow_id)
+        # Track the current task index; a task starts when the previous one
+        # finishes.
+        current_task_index = {'value': 0}
+        current_task_started = {'value': time.monotonic()}
 
-        # Create tasks
-        tasks = create_tasks(workflow_config, agents, topic)
+        def crew_task_callback(task_output):
+            try:
+                finish_task(current_task_index['value'], task_output, current_task_started['value'])
+            finally:
+                # Move to next task
+                current_task_index['value'] += 1
+                current_task_started['value'] = time.monotonic()
+            if current_task_index['value'] < len(task_configs):
+                task_started(current_task_index['value'])
 
-        # Create and run crew
         crew = Crew(
             agents=list(agents.values()),
             tasks=tasks,
             process=Process.sequential,
-            verbose=True
+            verbose=crewai_verbose(),
+            task_callback=crew_task_callback
         )
+        task_started(0)
+        return str(crew.kickoff())
+
+    if uses_task_graph(workflow_config):
+        # Independent tasks run concurrently; each task only sees the outputs
+        # of the tasks it declares in depends_on.
+        dependencies = build_task_graph(task_configs)
+        max_parallel = max_parallel_tasks(workflow_config)
+    else:
+        # A resumed sequential crew, or one whose contexts start with a
+        # prefix or are limited: one task at a time, each seeing the earlier
+        # outputs, restored or new, as it would inside the crew.
+        dependencies = sequential_dependencies(len(task_configs))
+        max_parallel = 1
+    # An Agent reuses one executor for every task it runs, so tasks assigned
+    # to the same agent never overlap.
+    agent_locks = {agent_name: threading.Lock() for agent_name in agents}
+
+    def run_task(index, context_outputs):
+        task = tasks[index]
+        full_outputs = [str(output) for output in context_outputs]
+        limited_outputs = limit_context(full_outputs, policies[index])
+        context = "\n\n".join(([context_prefix] if context_prefix else []) + limited_outputs) or None
+        context_tokens = {
+            "context_tokens_full": estimate_tokens("\n\n".join(full_outputs)),
+            "context_tokens": estimate_tokens("\n\n".join(limited_outputs)),
+        }
+        with agent_locks[task_configs[index]["agent"]]:
+            started = time.monotonic()
+            task_started(index)
+            task_output = task.execute_sync(agent=task.agent, context=context)
+        finish_task(index, task_output, started, **context_tokens)
+        return task_output
+
+    outputs = run_task_graph(dependencies, run_task, max_parallel, completed)
+    return str(outputs[-1])
+
+def lookup_cached_result(topic, workflow_id, workflow_config, bypass_cache=False, llm_config=None):
+    """
+    Return (cache, key, agent_models, cached_result) for the opt-in result
+    cache. cache is None when caching is disabled or bypassed.
+    """
+    cache = None if bypass_cache else workflow_result_cache()
+    if cache is None:
+        return None, None, None, None
+    agent_models = resolve_agent_models(workflow_config, workflow_id, llm_config)
+    key = result_cache_key(topic, workflow_config, agent_models)
+    return cache, key, agent_models, cache.get(key)
+
+@instrumented_run
+@with_workflow_deadline
+def run_workflow(topic: str, workflow_id: str, cancel_token=None, agents=None, bypass_cache=False, checkpoint=None, llm_config=None):
+    """Main function to run a workflow; agents may be reused from create_agents"""
+    try:
+        check_cancelled(cancel_token)
+
+        # Load workflow configuration
+        with span('load_config'):
+            workflow_config = load_workflow_config(workflow_id)
+        name_agents(workflow_config)
+
+        with span('cache_lookup'):
+            cache, cache_key, agent_models, cached_result = lookup_cached_result(
+                topic, workflow_id, workflow_config, bypass_cache, llm_config
+            )
+        if cached_result is not None:
+            return cached_result
+
+        # Create agents
+        if agents is None:
+            with span('create_agents'):
+                agents = create_agents(workflow_config, workflow_id, llm_config, agent_models)
+
+        # Create tasks
+        with span('create_tasks'):
+            tasks = create_tasks(workflow_config, agents, topic)
+        context_prefix = topic_context(topic, prompt_layout(workflow_config))
+
+        # Stop between agent steps once the caller has cancelled the run
+        def stop_if_cancelled(_output, _agent_name):
+            check_cancelled(cancel_token)
 
-        # Execute the crew
-        result = crew.kickoff()
+        # Execute the tasks; bypass_cache also skips replaying memoized LLM calls
+        with llm_memo_disabled(bypass_cache), span('execute'):
+            result = execute_tasks(
+                workflow_config, agents, tasks, stop_if_cancelled, stop_if_cancelled,
+                checkpoint, context_prefix=context_prefix,
+            )
 
         # Parse and return result
-        parsed_result = parse_result(str(result), workflow_id)
+        with span('parse_result'):
+            parsed_result = parse_result(result, workflow_id, workflow_config)
+        if cache is not None:
+            cache.put(cache_key, parsed_result)
 
         return parsed_result
 
+    except WorkflowCancelled:
+        raise
     except Exception as e:
         raise Exception(f"Workflow execution failed: {str(e)}")
 
-def run_workflow_with_progress(topic: str, workflow_id: str):
+@instrumented_run
+@with_workflow_deadline
+def run_workflow_with_progress(topic: str, workflow_id: str, cancel_token=None, bypass_cache=False, checkpoint=None, llm_config=None):
     """Main function to run a workflow with progress updates"""
     try:
+        check_cancelled(cancel_token)
         send_progress('task', '加载工作流配置...')
-        workflow_config = load_workflow_config(workflow_id)
+        with span('load_config'):
+            workflow_config = load_workflow_config(workflow_id)
+        name_agents(workflow_config)
 
         send_progress('task', f'工作流: {workflow_config["name"]}')
 
+        with span('cache_lookup'):
+            cache, cache_key, agent_models, cached_result = lookup_cached_result(
+                topic, workflow_id, workflow_config, bypass_cache, llm_config
+            )
+        if cached_result is not None:
+            send_progress('output', '命中结果缓存')
+            return cached_result
+
         send_progress('task', '初始化 AI 模型...')
 
-        # Create streaming callbacks for each agent
-        callbacks_map = {}
-        for agent_config in workflow_config["agents"]:
-            agent_name = agent_config["name"]
-            callbacks_map[agent_name] = [StreamingCallbackHandler(agent_name)]
+        # Token streams per agent; LLM calls find theirs by the crewai agent's id
+        token_streams = {
+            agent_config["name"]: StreamingCallbackHandler(agent_config["name"])
+            for agent_config in workflow_config["agents"]
+        }
+
+        # Title and summary are sent as soon as the final task's answer contains them
+        output = output_config(workflow_id, workflow_config)
+        result_stream = ResultStream(output)
+        final_agent = workflow_config["tasks"][-1]["agent"]
+        if final_agent in token_streams:
+            token_streams[final_agent].add_listener(result_stream)
+
+        def task_started(index):
+            if index == len(workflow_config["tasks"]) - 1:
+                result_stream.arm()
 
         send_progress('task', f'创建 {len(workflow_config["agents"])} 个 Agent...')
-        agents = create_agents(workflow_config, workflow_id, callbacks_map)
+        with span('create_agents'):
+            agents = create_agents(workflow_config, workflow_id, llm_config, agent_models)
 
         # Send agent info
         for agent_config in workflow_config["agents"]:
             send_progress('agent', f'{agent_config["name"]} - {agent_config["role"]}', agent_config["name"])
 
         send_progress('task', f'创建 {len(workflow_config["tasks"])} 个任务...')
-        tasks = create_tasks(workflow_config, agents, topic)
+        with span('create_tasks'):
+            tasks = create_tasks(workflow_config, agents, topic)
 
         # Send task info
         for i, task_config in enumerate(workflow_config["tasks"], 1):
@@ -320,47 +480,20 @@ def run_workflow_with_progress(topic: str, workflow_id: str):
 
         send_progress('task', '开始执行工作流...')
 
-        # Track current task index for agent identification
-        current_task_index = {'value': 0}
-
-        # Define step callback for streaming output
-        def step_callback(step_output):
+        # Define step callback; the step's text has already been streamed token by token
+        def step_callback(step_output, agent_name):
             """Callback executed after each step - receives AgentFinish object"""
-            try:
+            check_cancelled(cancel_token)
+            if current_verbosity() == 'debug':
                 send_progress('task', f'[DEBUG] step_callback called: {type(step_output).__name__}')
 
-                # Get current agent name from task index
-                task_idx = current_task_index['value']
-                if task_idx < len(workflow_config["tasks"]):
-                    agent_name = workflow_config["tasks"][task_idx]["agent"]
-                else:
-                    agent_name = 'Agent'
-
-                # step_output is an AgentFinish object with: output, text, thought
-                if hasattr(step_output, 'thought') and step_output.thought:
-                    thought_text = str(step_output.thought).strip()
-                    if thought_text and len(thought_text) > 10:
-                        send_progress('thinking', thought_text, agent_name)
-
-                if hasattr(step_output, 'output') and step_output.output:
-                    output_text = str(step_output.output).strip()
-                    if output_text and len(output_text) > 0:
-                        send_progress('stream', output_text, agent_name)
-            except Exception as e:
-                send_progress('task', f'[DEBUG] step_callback error: {str(e)}')
-
         # Define task callback for task completion
-        def task_callback(task_output):
+        def task_callback(task_output, agent_name):
             """Callback executed after each task - receives TaskOutput object"""
+            check_cancelled(cancel_token)
             try:
-                send_progress('task', f'[DEBUG] task_callback called: {type(task_output).__name__}')
-
-                # Get current agent name from task index
-                task_idx = current_task_index['value']
-                if task_idx < len(workflow_config["tasks"]):
-                    agent_name = workflow_config["tasks"][task_idx]["agent"]
-                else:
-                    agent_name = 'Agent'
+                if current_verbosity() == 'debug':
+                    send_progress('task', f'[DEBUG] task_callback called: {type(task_output).__name__}')
 
                 # task_output is a TaskOutput object, convert to string
                 output_text = str(task_output).strip()
@@ -368,36 +501,35 @@ def run_workflow_with_progress(topic: str, workflow_id: str):
                     # Limit output length for progress message
                     preview = output_text[:300] + '...' if len(output_text) > 300 else output_text
                     send_progress('output', f'✅ 任务完成\n{preview}', agent_name)
-
-                # Move to next task
-                current_task_index['value'] += 1
             except Exception as e:
                 pass
 
-        # Create crew with callbacks
-        crew = Crew(
-            agents=list(agents.values()),
-            tasks=tasks,
-            process=Process.sequential,
-            verbose=True,
-            step_callback=step_callback,
-            task_callback=task_callback
-        )
-
-        # Execute the crew (callbacks will handle progress updates)
+        # Execute the tasks (callbacks will handle progress updates)
         send_progress('task', '开始执行 Crew...')
-        result = crew.kickoff()
+        agent_streams = {agents[name].id: handler for name, handler in token_streams.items()}
+        with llm_memo_disabled(bypass_cache), stream_tokens(agent_streams), span('execute'):
+            result = execute_tasks(
+                workflow_config, agents, tasks, step_callback, task_callback, checkpoint,
+                task_started=task_started,
+                context_prefix=topic_context(topic, prompt_layout(workflow_config)),
+            )
 
         send_progress('output', '正在解析结果...')
 
         # Parse and return result
-        parsed_result = parse_result(str(result), workflow_id)
+        with span('parse_result'):
+            parsed_result = parse_output(result, output)
+        if cache is not None:
+            cache.put(cache_key, parsed_result)
 
         send_progress('output', f'生成标题: {parsed_result["title"]}')
         send_progress('output', f'生成内容: {len(parsed_result["article"])} 字符')
 
         return parsed_result
 
+    except WorkflowCancelled:
+        send_progress('error', '执行已取消')
+        raise
     except Exception as e:
         send_progress('error', f'执行失败: {str(e)}')
         raise Exception(f"Workflow execution failed: {str(e)}")
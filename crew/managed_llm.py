@@ -0,0 +1,451 @@
+"""crewai LLM used for every agent: memoized, rate limited and with failover.
+
+``ManagedOpenAICompletion`` is crewai's native OpenAI-compatible client with
+a few extra steps around each call:
+
+1. plain-text calls are answered from the response memo when possible
+   (see ``crew.llm_memo``);
+2. otherwise the call takes a lease from the provider's shared rate limiter
+   (see ``crew.rate_limiter``), reporting any time spent queued, and returns
+   the provider-reported token usage to it afterwards;
+3. the latency and outcome of the provider call are recorded in
+   ``crew.provider_health``, and the call with its token usage (including
+   prompt tokens the provider served from its prefix cache) is recorded as
+   an ``llm_call`` span of the run (see ``crew.telemetry``);
+4. when the calling agent has a token stream handler (see
+   ``crew.token_stream``), the completion is streamed and each text delta
+   is passed to it; an attempt that fails after streaming some text resets
+   the handler, so a retry or fallback does not repeat it to consumers;
+5. transient failures are retried up to ``max_retries`` times with backoff
+   (see ``crew.call_budgets``; the OpenAI SDK's own retries are off), and
+   under a run deadline (see ``crew.cancellation.run_deadline``) each
+   request times out at the deadline at the latest, a stream stops there,
+   and no attempt starts after it.
+
+An agent whose ``workflow-models.json`` entry lists ``fallbacks`` gets a
+client that also holds those (already resolved and locked) clients. A failed
+call moves on to the next one, and providers with a high recent error rate
+are tried last. With ``hedge`` set, a call that is still running once the
+first provider's p95 latency has passed is also sent to the second provider
+and the first answer wins. Only the first provider's output is streamed. The
+loser is cancelled as soon as the winner is picked: its rate-limit lease is
+released at once, it stops at its next streamed chunk (both sides of a
+hedge are requested as streams for this) without passing it to the token
+handler, and it is neither retried nor counted against the provider's
+health.
+"""
+
+from contextlib import nullcontext
+import contextvars
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.llms.base_llm import call_stop_override, call_stream_override
+from crewai.llms.providers.openai.completion import OpenAICompletion
+from pydantic import Field
+
+from crew.call_budgets import is_retryable, retry_delay
+from crew.cancellation import WorkflowCancelled, check_deadline, deadline_remaining
+from crew.llm_memo import llm_memo, llm_memo_enabled, memo_key
+from crew.progress import send_progress
+from crew.provider_health import provider_health
+from crew.rate_limiter import Lease, ProviderLimits, estimate_tokens, provider_limits, rate_limiter
+from crew.telemetry import record_llm_call
+from crew.token_stream import StreamingCallbackHandler, stream_tokens, token_stream_for
+
+
+# Waits shorter than this are not worth a progress event.
+REPORT_WAIT_SECONDS = 0.05
+
+# Usage reported by the provider for the call running in this context.
+_call_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "llm_call_usage", default=None
+)
+# When the first text delta of the call running in this context arrived.
+_call_first_token: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "llm_call_first_token", default=None
+)
+# Handler receiving the text deltas of the call running in this context.
+_call_stream: contextvars.ContextVar[Optional[StreamingCallbackHandler]] = contextvars.ContextVar(
+    "llm_call_stream", default=None
+)
+
+
+class HedgeCancelled(Exception):
+    """Raised inside the side of a hedged call that lost the race."""
+
+
+class HedgeLeg:
+    """One side of a hedged call, cancelled once the other side wins."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self._lease: Optional[Tuple[Lease, ProviderLimits]] = None
+
+    def hold(self, lease: Optional[Lease], limits: ProviderLimits) -> None:
+        with self._lock:
+            self._lease = (lease, limits) if lease is not None else None
+            cancelled = self.cancelled
+        if cancelled:
+            self._release()
+            raise HedgeCancelled("Hedged call lost the race")
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+        self._release()
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise HedgeCancelled("Hedged call lost the race")
+
+    def _release(self) -> None:
+        with self._lock:
+            held, self._lease = self._lease, None
+        if held is not None:
+            rate_limiter.release(*held)
+
+
+# The side of a hedged call running in this context, if any.
+_hedge_leg: contextvars.ContextVar[Optional[HedgeLeg]] = contextvars.ContextVar(
+    "llm_hedge_leg", default=None
+)
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens served from the provider's prefix cache, in any of the usual fields.
+
+    OpenAI reports ``prompt_tokens_details.cached_tokens``, DeepSeek
+    ``prompt_cache_hit_tokens`` and Moonshot (Kimi) ``cached_tokens``.
+    """
+    if usage is None:
+        return 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    for value in (
+        getattr(details, "cached_tokens", None),
+        getattr(usage, "prompt_cache_hit_tokens", None),
+        getattr(usage, "cached_tokens", None),
+    ):
+        if isinstance(value, int) and value > 0:
+            return value
+    return 0
+
+
+class ManagedOpenAICompletion(OpenAICompletion):
+    provider_id: Optional[str] = None
+    rate_limits: Optional[Dict[str, Any]] = None
+    # Clients tried in order when this one fails; they never have fallbacks themselves.
+    fallbacks: List[Any] = Field(default_factory=list)
+    hedge: bool = False
+
+    @property
+    def health_key(self) -> Tuple[str, str]:
+        return (self.provider_id or self.base_url or "default", self.model)
+
+    @property
+    def label(self) -> str:
+        return "/".join(self.health_key)
+
+    def _get_client_params(self) -> Dict[str, Any]:
+        # Retries happen in _retrying_call, where the run's deadline is known.
+        return {**super()._get_client_params(), "max_retries": 0}
+
+    def _get_sync_client(self) -> Any:
+        client = super()._get_sync_client()
+        remaining = deadline_remaining()
+        if remaining is None:
+            return client
+        check_deadline()
+        timeout = remaining if self.timeout is None else min(self.timeout, remaining)
+        return client.with_options(timeout=timeout)
+
+    def _extract_openai_token_usage(self, response: Any) -> Dict[str, Any]:
+        usage_data = super()._extract_openai_token_usage(response)
+        if not usage_data.get("cached_prompt_tokens"):
+            cached = cached_prompt_tokens(getattr(response, "usage", None))
+            if cached:
+                usage_data["cached_prompt_tokens"] = cached
+        return usage_data
+
+    def _track_token_usage_internal(self, usage_data: Dict[str, Any]) -> None:
+        super()._track_token_usage_internal(usage_data)
+        usage = _call_usage.get()
+        if usage is not None and isinstance(usage_data, dict):
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens", "cached_prompt_tokens"):
+                value = usage_data.get(key)
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+
+    def _emit_stream_chunk_event(
+        self,
+        chunk,
+        from_task=None,
+        from_agent=None,
+        tool_call=None,
+        call_type=None,
+        response_id=None,
+    ):
+        super()._emit_stream_chunk_event(
+            chunk=chunk, from_task=from_task, from_agent=from_agent,
+            tool_call=tool_call, call_type=call_type, response_id=response_id,
+        )
+        check_deadline()
+        leg = _hedge_leg.get()
+        if leg is not None:
+            leg.check()
+        if tool_call is not None or not chunk:
+            return
+        first_token = _call_first_token.get()
+        if first_token is not None and "at" not in first_token:
+            first_token["at"] = time.monotonic()
+        handler = _call_stream.get()
+        if handler is not None:
+            handler.on_llm_new_token(chunk)
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        args = (
+            messages, tools, callbacks, available_functions,
+            from_task, from_agent, response_model,
+        )
+        if not self.fallbacks:
+            return self._retrying_call(args)
+        return self._failover_call(args)
+
+    def _retrying_call(self, args: Tuple) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return self._managed_call(*args)
+            except (WorkflowCancelled, HedgeCancelled):
+                raise
+            except Exception as error:
+                # A request cut off by the deadline ends the run, not just the call.
+                check_deadline()
+                leg = _hedge_leg.get()
+                if leg is not None:
+                    leg.check()
+                if attempt >= self.max_retries or not is_retryable(error):
+                    raise
+                delay = retry_delay(attempt, error)
+                remaining = deadline_remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
+                attempt += 1
+                send_progress(
+                    "task", f"{self.label} 调用失败，{delay:.1f} 秒后重试（{attempt}/{self.max_retries}）"
+                )
+                time.sleep(delay)
+
+    def _managed_call(
+        self,
+        messages,
+        tools,
+        callbacks,
+        available_functions,
+        from_task,
+        from_agent,
+        response_model,
+    ):
+        provider_id, model = self.health_key
+        agent_role = getattr(from_agent, "role", None)
+        # Structured output is parsed from the whole response, so it is not streamed.
+        handler = token_stream_for(from_agent) if response_model is None else None
+        call_started = time.monotonic()
+        memo = llm_memo() if llm_memo_enabled() else None
+        # Tool calls and structured output have side effects or non-text
+        # results, so only plain completions are memoized.
+        if tools or available_functions or response_model is not None:
+            memo = None
+        key = None
+        if memo is not None:
+            key = memo_key(
+                self.base_url, self.model, self.temperature, self.max_tokens,
+                self.stop_sequences, messages,
+            )
+            cached = memo.get(key)
+            if cached is not None:
+                record_llm_call(
+                    agent_role, provider_id, model, call_started, time.monotonic(), {},
+                    ok=True, memo_hit=True,
+                )
+                if handler is not None:
+                    handler.on_llm_start()
+                    handler.on_llm_new_token(cached["response"])
+                    handler.on_llm_end()
+                return cached["response"]
+
+        leg = _hedge_leg.get()
+        usage: Dict[str, int] = {}
+        first_token: Dict[str, float] = {}
+        waited = 0.0
+        usage_token = _call_usage.set(usage)
+        first_token_token = _call_first_token.set(first_token)
+        stream_token = _call_stream.set(handler)
+        limits = provider_limits({"rateLimits": self.rate_limits})
+        try:
+            with rate_limiter.limit(provider_id, limits, estimate_tokens(messages)) as lease:
+                if leg is not None:
+                    leg.hold(lease, limits)
+                if lease is not None:
+                    waited = lease.waited
+                if waited >= REPORT_WAIT_SECONDS:
+                    send_progress("task", f"{provider_id} 限流排队 {waited:.1f} 秒")
+                streaming = nullcontext()
+                if handler is not None:
+                    handler.on_llm_start()
+                # A hedged call is streamed even without a handler, so that
+                # losing the race can stop it at its next chunk.
+                if handler is not None or leg is not None:
+                    streaming = call_stream_override(self, True)
+                started = time.monotonic()
+                try:
+                    with streaming:
+                        response = super().call(
+                            messages, tools, callbacks, available_functions,
+                            from_task, from_agent, response_model,
+                        )
+                except Exception:
+                    finished = time.monotonic()
+                    if handler is not None:
+                        handler.on_llm_error()
+                    remaining = deadline_remaining()
+                    cancelled = leg is not None and leg.cancelled
+                    # Requests the deadline or a hedge cut short say nothing about the provider.
+                    if (remaining is None or remaining > 0) and not cancelled:
+                        provider_health.record(self.health_key, finished - started, False)
+                    record_llm_call(
+                        agent_role, provider_id, model, call_started, finished, usage,
+                        ok=False, queued=round(waited, 6), **({"cancelled": True} if cancelled else {}),
+                    )
+                    if cancelled:
+                        raise HedgeCancelled("Hedged call lost the race")
+                    raise
+                finally:
+                    if handler is not None:
+                        handler.on_llm_end()
+                finished = time.monotonic()
+                provider_health.record(self.health_key, finished - started, True)
+                timing = {"queued": round(waited, 6)}
+                if "at" in first_token:
+                    timing["first_token"] = round(first_token["at"] - call_started, 6)
+                record_llm_call(
+                    agent_role, provider_id, model, call_started, finished, usage,
+                    ok=True, **timing,
+                )
+                if lease is not None and "total_tokens" in usage:
+                    lease.actual_tokens = usage["total_tokens"]
+        finally:
+            _call_stream.reset(stream_token)
+            _call_first_token.reset(first_token_token)
+            _call_usage.reset(usage_token)
+
+        if memo is not None and isinstance(response, str) and response:
+            memo.put(key, {"response": response})
+        return response
+
+    def _call_candidate(self, candidate: "ManagedOpenAICompletion", args: Tuple) -> Any:
+        if candidate is self:
+            return self._retrying_call(args)
+        # Stop words the agent executor sets for this call are scoped to
+        # this instance, so hand them on to the fallback.
+        with call_stop_override(candidate, self.stop_sequences):
+            return candidate._retrying_call(args)
+
+    def _failover_call(self, args: Tuple) -> Any:
+        candidates = provider_health.order(
+            [self, *self.fallbacks], key=lambda llm: llm.health_key
+        )
+        last_error: Optional[Exception] = None
+
+        if self.hedge:
+            delay = provider_health.hedge_delay(candidates[0].health_key)
+            if delay is not None:
+                pair, candidates = candidates[:2], candidates[2:]
+                try:
+                    return self._hedged_call(pair[0], pair[1], delay, args)
+                except WorkflowCancelled:
+                    raise
+                except Exception as error:
+                    last_error = error
+                    if candidates:
+                        send_progress("task", f"{pair[1].label} 调用失败，切换到 {candidates[0].label}")
+
+        for index, candidate in enumerate(candidates):
+            try:
+                return self._call_candidate(candidate, args)
+            except WorkflowCancelled:
+                raise
+            except Exception as error:
+                last_error = error
+                if index + 1 < len(candidates):
+                    send_progress(
+                        "task", f"{candidate.label} 调用失败，切换到 {candidates[index + 1].label}"
+                    )
+        raise last_error
+
+    def _hedged_call(
+        self,
+        primary: "ManagedOpenAICompletion",
+        secondary: "ManagedOpenAICompletion",
+        delay: float,
+        args: Tuple,
+    ) -> Any:
+        """Call ``primary``; once it runs past ``delay``, race it against ``secondary``.
+
+        Once one side answers, the other is cancelled (see ``HedgeLeg``).
+        """
+        outcomes: "queue.Queue[Tuple[HedgeLeg, Optional[BaseException], Any]]" = queue.Queue()
+
+        def start(candidate: "ManagedOpenAICompletion", streamed: bool) -> HedgeLeg:
+            leg = HedgeLeg()
+
+            def run() -> None:
+                _hedge_leg.set(leg)
+                try:
+                    # Two calls streaming into one handler would interleave.
+                    with nullcontext() if streamed else stream_tokens(None):
+                        outcomes.put((leg, None, self._call_candidate(candidate, args)))
+                except BaseException as error:
+                    outcomes.put((leg, error, None))
+
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(run,), daemon=True).start()
+            return leg
+
+        primary_leg = start(primary, streamed=True)
+        try:
+            _, error, response = outcomes.get(timeout=delay)
+        except queue.Empty:
+            send_progress(
+                "task", f"{primary.label} 超过 p95 延迟 {delay:.1f} 秒，同时请求 {secondary.label}"
+            )
+            legs = (primary_leg, start(secondary, streamed=False))
+            winner, error, response = outcomes.get()
+            if error is None:
+                for leg in legs:
+                    if leg is not winner:
+                        leg.cancel()
+                return response
+            _, error, response = outcomes.get()
+            if error is not None:
+                raise error
+            return response
+
+        if error is None:
+            return response
+        if isinstance(error, WorkflowCancelled):
+            raise error
+        send_progress("task", f"{primary.label} 调用失败，切换到 {secondary.label}")
+        return self._call_candidate(secondary, args)
@@ -0,0 +1,170 @@
+"""Progress events emitted while a workflow runs.
+
+Events go, in order of preference, to:
+
+1. a sink installed for the current context (for example a pooled worker
+   that answers over a socket instead of a pipe);
+2. the progress channel opened with ``open_progress_channel``: a dedicated
+   file descriptor (``crew.run_workflow --progress-fd N``) that carries only
+   progress frames, so a consumer never reads CrewAI's log output;
+3. stderr, as ``PROGRESS:{json}`` lines mixed with everything else.
+
+Channel frames are compact JSON objects, one per line, wrapped in an
+envelope: ``v`` (protocol version), ``seq`` (1, 2, ... per process) and
+``ts`` (Unix time of the event). Writes are buffered: an event after a quiet
+period is written at once, while bursts such as token streams are batched
+and written at most ``flush_interval`` seconds later.
+"""
+
+import atexit
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+ProgressSink = Callable[[Dict[str, Any]], None]
+
+PROTOCOL_VERSION = 1
+FLUSH_SECONDS = 0.05
+MAX_BUFFER_BYTES = 64 * 1024
+
+_progress_sink = contextvars.ContextVar("progress_sink", default=None)
+_channel: Optional["ProgressChannel"] = None
+
+
+class ProgressEncoder:
+    """Adds the versioned envelope and a per-encoder sequence number to events."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def envelope(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        return {"v": PROTOCOL_VERSION, "seq": seq, "ts": round(self._clock(), 3), **event}
+
+    def encode(self, event: Dict[str, Any]) -> bytes:
+        frame = json.dumps(self.envelope(event), ensure_ascii=False, separators=(",", ":"))
+        return frame.encode("utf-8") + b"\n"
+
+
+class ProgressChannel:
+    """Buffered writer of progress frames to a file descriptor."""
+
+    def __init__(
+        self,
+        fd: int,
+        flush_interval: float = FLUSH_SECONDS,
+        max_buffer_bytes: int = MAX_BUFFER_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+        encoder: Optional[ProgressEncoder] = None,
+    ):
+        self.fd = fd
+        self.flush_interval = flush_interval
+        self.max_buffer_bytes = max_buffer_bytes
+        self._clock = clock
+        self._encoder = encoder or ProgressEncoder()
+        self._lock = threading.Lock()
+        self._buffer: List[bytes] = []
+        self._buffered_bytes = 0
+        self._last_flush = float("-inf")
+        self._pending = threading.Event()
+        self._closed = False
+        threading.Thread(target=self._flush_pending, name="progress-flush", daemon=True).start()
+
+    def write(self, event: Dict[str, Any]) -> None:
+        frame = self._encoder.encode(event)
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.append(frame)
+            self._buffered_bytes += len(frame)
+            now = self._clock()
+            if (
+                now - self._last_flush >= self.flush_interval
+                or self._buffered_bytes >= self.max_buffer_bytes
+            ):
+                self._flush_locked(now)
+            else:
+                self._pending.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked(self._clock())
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked(self._clock())
+            self._closed = True
+        self._pending.set()
+
+    def _flush_locked(self, now: float) -> None:
+        self._last_flush = now
+        self._pending.clear()
+        if not self._buffer or self._closed:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        try:
+            while data:
+                data = data[os.write(self.fd, data):]
+        except OSError:
+            # The reader has gone away; progress is best effort.
+            self._closed = True
+
+    def _flush_pending(self) -> None:
+        while True:
+            self._pending.wait()
+            if self._closed:
+                return
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+def open_progress_channel(fd: int, **options: Any) -> ProgressChannel:
+    """Send events without a context sink to ``fd`` for the rest of the process."""
+    global _channel
+    _channel = ProgressChannel(fd, **options)
+    atexit.register(_channel.close)
+    return _channel
+
+
+def send_progress(progress_type: str, message: str, agent: Optional[str] = None) -> None:
+    """Send one progress event to the active sink, the progress channel or stderr."""
+    event: Dict[str, Any] = {"type": progress_type, "message": message}
+    if agent:
+        event["agent"] = agent
+    send_event(event)
+
+
+def send_event(event: Dict[str, Any]) -> None:
+    """Send an already built event; used for structured events such as spans."""
+    sink = _progress_sink.get()
+    if sink is not None:
+        sink(event)
+        return
+    if _channel is not None:
+        _channel.write(event)
+        return
+
+    sys.stderr.write(f"PROGRESS:{json.dumps(event, ensure_ascii=False)}\n")
+    sys.stderr.flush()
+
+
+@contextmanager
+def progress_sink(sink: ProgressSink) -> Iterator[None]:
+    """Route progress events emitted in this context to ``sink``."""
+    token = _progress_sink.set(sink)
+    try:
+        yield
+    finally:
+        _progress_sink.reset(token)
@@ -0,0 +1,53 @@
+"""Where a run's variable text goes in the prompts its agents send.
+
+CrewAI sends every LLM call as the agent's system prompt (role, backstory,
+goal) followed by a user message: ``Current Task:`` with the task
+description and expected output, then the context (earlier task outputs),
+then a fixed instruction to begin. OpenAI-compatible providers (OpenAI,
+DeepSeek, Kimi, ...) cache prompts by prefix, so a call is cheaper and
+faster when its beginning is byte-identical to a recent request.
+
+A workflow picks its layout with ``"prompt_layout"`` in ``workflows.json``:
+
+- ``inline`` (default): ``{topic}`` is substituted into task descriptions,
+  so the user message differs between runs from the first mention of it;
+- ``prefix``: descriptions and backstories refer to the topic with the fixed
+  ``TOPIC_REFERENCE``, and the topic itself starts every task's context,
+  ahead of the earlier outputs. Everything before the context is then the
+  same for every run of the workflow.
+"""
+
+from typing import Any, Mapping, Optional
+
+
+PROMPT_LAYOUTS = ("inline", "prefix")
+DEFAULT_PROMPT_LAYOUT = "inline"
+TOPIC_PLACEHOLDER = "{topic}"
+TOPIC_LABEL = "主题"
+TOPIC_REFERENCE = f"「{TOPIC_LABEL}」（见上下文）"
+
+
+def prompt_layout(workflow_config: Mapping[str, Any]) -> str:
+    layout = workflow_config.get("prompt_layout", DEFAULT_PROMPT_LAYOUT)
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"prompt_layout must be one of: {', '.join(PROMPT_LAYOUTS)}")
+    return layout
+
+
+def task_description(description: str, topic: str, layout: str) -> str:
+    replacement = TOPIC_REFERENCE if layout == "prefix" else topic
+    return description.replace(TOPIC_PLACEHOLDER, replacement)
+
+
+def agent_backstory(prompt: str, layout: str) -> str:
+    # Inline backstories keep the placeholder as written; CrewAI never fills it.
+    if layout == "prefix":
+        return prompt.replace(TOPIC_PLACEHOLDER, TOPIC_REFERENCE)
+    return prompt
+
+
+def topic_context(topic: str, layout: str) -> Optional[str]:
+    """Text that starts every task's context, or None when the topic is inline."""
+    if layout == "prefix":
+        return f"{TOPIC_LABEL}：{topic}"
+    return None
@@ -0,0 +1,174 @@
+"""Recent latency and error rate of each provider/model, used for failover.
+
+Every real provider call (memo hits excluded) is recorded under
+``(provider_id, model)``. Only calls from the last ``max_age`` seconds count,
+so a provider that was demoted for failing is tried first again once its bad
+window has aged out.
+
+Hedging needs ``MIN_SAMPLES`` recent calls, which a single spawned run rarely
+makes, so the process-wide tracker keeps its samples in one small JSON file
+per provider/model under ``PROVIDER_HEALTH_DIR`` and updates it under an
+exclusive ``flock``, like ``crew.rate_limiter``. One-off subprocesses, warm
+workers and the API all see the same numbers. A tracker built without a
+``state_dir`` (as in tests) keeps them in memory.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+
+DEFAULT_PROVIDER_HEALTH_DIR = os.path.join(tempfile.gettempdir(), "qiaoagent-provider-health")
+DEFAULT_WINDOW = 50
+DEFAULT_MAX_AGE_SECONDS = 5 * 60
+# Fewer recent calls than this say nothing about a provider.
+MIN_SAMPLES = 4
+UNHEALTHY_ERROR_RATE = 0.5
+
+T = TypeVar("T")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values``; None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+class ProviderHealth:
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        max_age: float = DEFAULT_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        state_dir: Optional[str] = None,
+    ):
+        """``state_dir`` shares the samples between processes; ``clock`` must
+        then be wall-clock time (``time.time``)."""
+        self.window = window
+        self.max_age = max_age
+        self.state_dir = state_dir
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> deque of (finished_at, latency, ok)
+        self._calls: Dict[Hashable, Deque[Tuple[float, float, bool]]] = {}
+
+    def _state_path(self, key: Hashable) -> str:
+        name = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    @contextmanager
+    def _locked_state(self, key: Hashable) -> Iterator[Dict[str, Any]]:
+        os.makedirs(self.state_dir, mode=0o700, exist_ok=True)
+        fd = os.open(self._state_path(key), os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+", encoding="utf-8") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                raw_state = state_file.read()
+                try:
+                    state = json.loads(raw_state) if raw_state else {}
+                except ValueError:
+                    state = {}
+                yield state
+                state_file.seek(0)
+                state_file.truncate()
+                json.dump(state, state_file)
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def record(self, key: Hashable, latency: float, ok: bool) -> None:
+        call = (self._clock(), latency, ok)
+        if self.state_dir is None:
+            with self._lock:
+                self._calls.setdefault(key, deque(maxlen=self.window)).append(call)
+            return
+        with self._locked_state(key) as state:
+            cutoff = call[0] - self.max_age
+            calls = [entry for entry in state.get("calls", []) if entry[0] >= cutoff]
+            state["calls"] = (calls + [list(call)])[-self.window:]
+
+    def _recent(self, key: Hashable) -> List[Tuple[float, float, bool]]:
+        cutoff = self._clock() - self.max_age
+        if self.state_dir is None:
+            with self._lock:
+                calls = list(self._calls.get(key, ()))
+        else:
+            with self._locked_state(key) as state:
+                calls = [tuple(entry) for entry in state.get("calls", [])]
+        return [call for call in calls if call[0] >= cutoff]
+
+    def stats(self, key: Hashable) -> Dict[str, Optional[float]]:
+        """Call count, error rate and p50/p95 latency of successful calls."""
+        recent = self._recent(key)
+        latencies = [latency for _, latency, ok in recent if ok]
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            "calls": len(recent),
+            "error_rate": errors / len(recent) if recent else 0.0,
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+        }
+
+    def is_healthy(self, key: Hashable) -> bool:
+        stats = self.stats(key)
+        return stats["calls"] < MIN_SAMPLES or stats["error_rate"] < UNHEALTHY_ERROR_RATE
+
+    def hedge_delay(self, key: Hashable) -> Optional[float]:
+        """p95 latency once enough successful calls are known, else None."""
+        recent = self._recent(key)
+        latencies = [latency for _, latency, ok in recent if ok]
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return percentile(latencies, 0.95)
+
+    def order(self, candidates: Iterable[T], key: Callable[[T], Hashable]) -> List[T]:
+        """Configured order, with unhealthy candidates moved behind healthy ones."""
+        candidates = list(candidates)
+        healthy = [self.is_healthy(key(candidate)) for candidate in candidates]
+        return [
+            candidate
+            for _, candidate in sorted(
+                zip(healthy, candidates), key=lambda item: not item[0]
+            )
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calls.clear()
+        if self.state_dir is not None:
+            try:
+                names = os.listdir(self.state_dir)
+            except FileNotFoundError:
+                return
+            for name in names:
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.state_dir, name))
+
+
+provider_health = ProviderHealth(
+    clock=time.time,
+    state_dir=os.getenv("PROVIDER_HEALTH_DIR", DEFAULT_PROVIDER_HEALTH_DIR),
+)
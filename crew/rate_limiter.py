@@ -0,0 +1,257 @@
+"""Per-provider concurrency and token-bucket rate limits shared across processes.
+
+Limits are read from an optional ``rateLimits`` object on each provider in
+``config/llm-providers.json``::
+
+    "defaultModel": "kimi-k2-0905-preview",
+    "rateLimits": {"maxConcurrent": 4, "requestsPerMinute": 60, "tokensPerMinute": 200000}
+
+Every process on the node keeps the state for a provider in one small JSON
+file under ``RATE_LIMIT_DIR`` and updates it under an exclusive ``flock``, so
+the FastAPI app, warm workers and one-off subprocesses all draw from the same
+buckets. Requests and tokens refill continuously at the per-minute rate. A
+call debits an estimate of its prompt tokens up front and the difference to
+the provider-reported usage once it returns. In-flight leases held by
+processes that have died are reclaimed.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import fcntl
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+
+DEFAULT_RATE_LIMIT_DIR = os.path.join(tempfile.gettempdir(), "qiaoagent-rate-limits")
+DEFAULT_MAX_WAIT_SECONDS = 300.0
+# In-flight leases older than this are treated as leaked even if the process
+# that took them is still alive.
+LEASE_TIMEOUT_SECONDS = 15 * 60
+IN_FLIGHT_POLL_SECONDS = 0.1
+SAFE_PROVIDER_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# CJK ideographs, kana, Hangul and full-width punctuation.
+WIDE_CHARACTERS = re.compile(
+    r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a call could not be admitted within the maximum wait."""
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    max_in_flight: Optional[int] = None
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.max_in_flight, self.requests_per_minute, self.tokens_per_minute)
+        )
+
+
+def _positive_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        return None
+    return value
+
+
+def provider_limits(provider: Mapping[str, Any]) -> ProviderLimits:
+    """Limits from a provider's ``rateLimits``; missing or invalid values mean no limit."""
+    config = provider.get("rateLimits")
+    if not isinstance(config, Mapping):
+        return ProviderLimits()
+    max_in_flight = _positive_number(config.get("maxConcurrent"))
+    return ProviderLimits(
+        max_in_flight=int(max_in_flight) if max_in_flight is not None else None,
+        requests_per_minute=_positive_number(config.get("requestsPerMinute")),
+        tokens_per_minute=_positive_number(config.get("tokensPerMinute")),
+    )
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Rough prompt size: one token per CJK character, about three characters per token otherwise.
+
+    Tokenizers split Chinese, Japanese and Korean text into about one token
+    per character (often more), and Latin text and JSON into about one per
+    three characters.
+    """
+    if isinstance(messages, str):
+        text = messages
+    else:
+        text = json.dumps(messages, ensure_ascii=False, default=str)
+    wide = len(WIDE_CHARACTERS.findall(text))
+    return wide + math.ceil((len(text) - wide) / 3)
+
+
+@dataclass
+class Lease:
+    provider_id: str
+    lease_id: str
+    estimated_tokens: int
+    waited: float
+    actual_tokens: Optional[int] = field(default=None)
+    released: bool = False
+    _release_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def claim_release(self) -> bool:
+        """Mark the lease released; False when another thread already has.
+
+        A hedged call's losing side releases its lease early, while the call's
+        own ``limit`` context may release it at the same time.
+        """
+        with self._release_lock:
+            if self.released:
+                return False
+            self.released = True
+            return True
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        state_dir: str = DEFAULT_RATE_LIMIT_DIR,
+        max_wait: float = DEFAULT_MAX_WAIT_SECONDS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.state_dir = state_dir
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+
+    def _state_path(self, provider_id: str) -> str:
+        name = provider_id if SAFE_PROVIDER_ID.match(provider_id) else (
+            hashlib.sha256(provider_id.encode("utf-8")).hexdigest()[:32]
+        )
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    @contextmanager
+    def _locked_state(self, provider_id: str) -> Iterator[Dict[str, Any]]:
+        os.makedirs(self.state_dir, mode=0o700, exist_ok=True)
+        fd = os.open(self._state_path(provider_id), os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+", encoding="utf-8") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                raw_state = state_file.read()
+                try:
+                    state = json.loads(raw_state) if raw_state else {}
+                except ValueError:
+                    state = {}
+                yield state
+                state_file.seek(0)
+                state_file.truncate()
+                json.dump(state, state_file)
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def _refill(self, state: Dict[str, Any], limits: ProviderLimits, now: float) -> None:
+        elapsed = max(0.0, now - state.get("updated", now))
+        for key, per_minute in (
+            ("requests", limits.requests_per_minute),
+            ("tokens", limits.tokens_per_minute),
+        ):
+            if per_minute is None:
+                state.pop(key, None)
+                continue
+            level = state.get(key, per_minute)
+            state[key] = min(per_minute, level + elapsed * per_minute / 60)
+        state["updated"] = now
+
+        in_flight = state.setdefault("in_flight", {})
+        for lease_id, (pid, started_at) in list(in_flight.items()):
+            if now - started_at > LEASE_TIMEOUT_SECONDS or not _process_alive(pid):
+                del in_flight[lease_id]
+
+    def _try_acquire(
+        self, state: Dict[str, Any], limits: ProviderLimits, estimated_tokens: int, now: float
+    ) -> Tuple[Optional[str], float]:
+        """Admit the call and return its lease id, or return how long to wait."""
+        self._refill(state, limits, now)
+        in_flight = state["in_flight"]
+        wait = 0.0
+        if limits.max_in_flight is not None and len(in_flight) >= limits.max_in_flight:
+            wait = IN_FLIGHT_POLL_SECONDS
+        if limits.requests_per_minute is not None and state["requests"] < 1:
+            wait = max(wait, (1 - state["requests"]) * 60 / limits.requests_per_minute)
+        if limits.tokens_per_minute is not None:
+            # A prompt larger than the whole bucket is admitted once it is full.
+            needed = min(estimated_tokens, limits.tokens_per_minute)
+            if state["tokens"] < needed:
+                wait = max(wait, (needed - state["tokens"]) * 60 / limits.tokens_per_minute)
+        if wait > 0:
+            return None, wait
+
+        lease_id = uuid.uuid4().hex
+        in_flight[lease_id] = [os.getpid(), now]
+        if limits.requests_per_minute is not None:
+            state["requests"] -= 1
+        if limits.tokens_per_minute is not None:
+            state["tokens"] -= estimated_tokens
+        return lease_id, 0.0
+
+    def acquire(self, provider_id: str, limits: ProviderLimits, estimated_tokens: int = 0) -> Lease:
+        started = self._clock()
+        while True:
+            now = self._clock()
+            with self._locked_state(provider_id) as state:
+                lease_id, wait = self._try_acquire(state, limits, estimated_tokens, now)
+            if lease_id is not None:
+                return Lease(provider_id, lease_id, estimated_tokens, now - started)
+            if now + wait - started > self.max_wait:
+                raise RateLimitTimeout(
+                    f"Provider '{provider_id}' rate limit: no capacity within {self.max_wait:.0f}s"
+                )
+            self._sleep(wait)
+
+    def release(self, lease: Lease, limits: ProviderLimits) -> None:
+        """Return the lease's slot; later calls for the same lease do nothing."""
+        if not lease.claim_release():
+            return
+        with self._locked_state(lease.provider_id) as state:
+            self._refill(state, limits, self._clock())
+            state["in_flight"].pop(lease.lease_id, None)
+            if limits.tokens_per_minute is not None and lease.actual_tokens is not None:
+                state["tokens"] -= lease.actual_tokens - lease.estimated_tokens
+
+    @contextmanager
+    def limit(
+        self, provider_id: str, limits: ProviderLimits, estimated_tokens: int = 0
+    ) -> Iterator[Optional[Lease]]:
+        """Hold a lease for the duration of one call; yields None when unlimited."""
+        if not limits.enabled:
+            yield None
+            return
+        lease = self.acquire(provider_id, limits, estimated_tokens)
+        try:
+            yield lease
+        finally:
+            self.release(lease, limits)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+rate_limiter = RateLimiter(
+    os.getenv("RATE_LIMIT_DIR", DEFAULT_RATE_LIMIT_DIR),
+    float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", str(DEFAULT_MAX_WAIT_SECONDS))),
+)
@@ -0,0 +1,173 @@
+"""Opt-in, content-addressed cache of parsed workflow results.
+
+The key hashes the normalized topic, the workflow definition from
+``workflows.json`` and the provider/model every agent resolves to, so editing
+either config file changes the key instead of serving stale output. Entries
+live in SQLite, expire after a TTL and are evicted least-recently-used once
+the store holds more than ``max_entries`` results.
+
+The cache is enabled by setting ``WORKFLOW_RESULT_CACHE_PATH``.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+
+DEFAULT_RESULT_CACHE_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_RESULT_CACHE_MAX_ENTRIES = 1000
+# Bump when the cached value format or the key recipe changes.
+CACHE_KEY_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used_at ON results (last_used_at);
+"""
+
+
+def normalize_topic(topic: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", topic)).strip()
+
+
+def result_cache_key(
+    topic: str,
+    workflow_config: Mapping[str, Any],
+    agent_models: Mapping[str, Tuple[Optional[str], Mapping[str, Any], str]],
+) -> str:
+    """Hash of everything that determines a run's output, except credentials."""
+    material = {
+        "version": CACHE_KEY_VERSION,
+        "topic": normalize_topic(topic),
+        "workflow": workflow_config,
+        "models": {
+            agent_name: [provider_id, provider.get("baseURL"), model]
+            for agent_name, (provider_id, provider, model) in agent_models.items()
+        },
+    }
+    canonical = json.dumps(material, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = DEFAULT_RESULT_CACHE_TTL_SECONDS,
+        max_entries: int = DEFAULT_RESULT_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``; an unreadable store counts as a miss."""
+        now = self._clock()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value FROM results WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE results SET last_used_at = ? WHERE key = ?", (now, key)
+                    )
+        except sqlite3.Error as error:
+            print(f"Error reading result cache: {error}", file=sys.stderr)
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store ``value``, then drop expired and least-recently-used entries."""
+        now = self._clock()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at, last_used_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                conn.execute(
+                    "DELETE FROM results WHERE created_at <= ?", (now - self.ttl_seconds,)
+                )
+                conn.execute(
+                    "DELETE FROM results WHERE key NOT IN"
+                    " (SELECT key FROM results ORDER BY last_used_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as error:
+            # The run already succeeded; losing its cache entry is harmless.
+            print(f"Error writing result cache: {error}", file=sys.stderr)
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def workflow_result_cache() -> Optional[ResultCache]:
+    """The process-wide cache, or None unless WORKFLOW_RESULT_CACHE_PATH is set."""
+    global _result_cache
+    path = os.getenv("WORKFLOW_RESULT_CACHE_PATH")
+    if not path:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None or _result_cache.path != path:
+            _result_cache = ResultCache(
+                path,
+                float(
+                    os.getenv(
+                        "WORKFLOW_RESULT_CACHE_TTL_SECONDS",
+                        str(DEFAULT_RESULT_CACHE_TTL_SECONDS),
+                    )
+                ),
+                int(
+                    os.getenv(
+                        "WORKFLOW_RESULT_CACHE_MAX_ENTRIES",
+                        str(DEFAULT_RESULT_CACHE_MAX_ENTRIES),
+                    )
+                ),
+            )
+        return _result_cache
@@ -0,0 +1,297 @@
+"""Parsers turning a workflow's final output into its title, article and summary.
+
+A workflow picks its parser in ``workflows.json``::
+
+    "output": {
+      "parser": "sections",
+      "match": "heading",
+      "default_title": "微信标题方案",
+      "sections": [
+        {"field": "title", "markers": ["推荐标题"], "single_line": true},
+        {"field": "summary", "markers": ["使用建议"]}
+      ]
+    }
+
+Built-in parsers:
+
+- ``text``: no structure, the whole output is the article;
+- ``sections``: a line containing one of a section's ``markers`` starts that
+  section (with ``"match": "heading"`` only Markdown headings and bold lines
+  count, and any other heading ends the current section). A ``single_line``
+  section takes its first non-empty line;
+- ``json``: the output is a JSON object; ``schema.properties`` names the
+  fields to read (other JSON Schema keywords are not checked).
+
+Parsers are incremental. ``feed`` takes text as it streams in and returns
+the fields completed so far, so the title and summary can be shown before
+the article has finished. ``result`` then fills whatever is missing: the
+article defaults to the whole output, the summary to the start of the
+article and the title to ``default_title``.
+
+Workflows without ``output`` use ``BUILTIN_OUTPUTS`` for their id, or
+``text``. More parsers can be added with ``register_parser``.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from crew.progress import send_event
+
+
+RESULT_FIELDS = ("title", "article", "summary")
+DEFAULT_TITLE = "生成内容"
+SUMMARY_CHARS = 200
+FINAL_ANSWER = "Final Answer:"
+# Lines at most this long can be headings in "heading" match mode.
+MAX_HEADING_CHARS = 60
+
+BUILTIN_OUTPUTS: Dict[str, Dict[str, Any]] = {
+    "tech_writer": {
+        "parser": "sections",
+        "default_title": "AI 创作内容",
+        "sections": [
+            {"field": "title", "markers": ["标题", "title"], "single_line": True},
+            {"field": "summary", "markers": ["摘要", "summary"]},
+            {"field": "article", "markers": ["正文", "article", "content"]},
+        ],
+    },
+    "marketing_writer": {"parser": "text", "default_title": "营销文案"},
+}
+
+
+class ResultParser:
+    """Base parser: collects the text and leaves every field to ``result``."""
+
+    def __init__(self, output: Mapping[str, Any]):
+        self.default_title = output.get("default_title") or DEFAULT_TITLE
+        self.fields: Dict[str, str] = {}
+
+    def feed(self, text: str) -> Dict[str, str]:
+        """Consume more output; return the fields completed by it."""
+        return {}
+
+    def finish(self) -> Dict[str, str]:
+        """Mark the end of the output; return the fields completed by it."""
+        return {}
+
+    def result(self, raw_output: str) -> Dict[str, str]:
+        article = self.fields.get("article") or raw_output
+        return {
+            "title": (self.fields.get("title") or self.default_title).strip(),
+            "article": article.strip(),
+            "summary": (self.fields.get("summary") or article[:SUMMARY_CHARS] + "...").strip(),
+        }
+
+    def _complete(self, field: str, value: str) -> Dict[str, str]:
+        value = value.strip()
+        if not value or field in self.fields:
+            return {}
+        self.fields[field] = value
+        return {field: value}
+
+
+_parsers: Dict[str, Callable[[Mapping[str, Any]], ResultParser]] = {}
+
+
+def register_parser(name: str) -> Callable[[Callable[..., ResultParser]], Callable[..., ResultParser]]:
+    def register(factory: Callable[..., ResultParser]) -> Callable[..., ResultParser]:
+        _parsers[name] = factory
+        return factory
+
+    return register
+
+
+register_parser("text")(ResultParser)
+
+
+def _strip_markup(line: str) -> str:
+    return re.sub(r"^[\s#>*\-]*(?:\d+[.、)]\s*)?|[\s*]*$", "", line).replace("**", "").strip()
+
+
+@register_parser("sections")
+class SectionParser(ResultParser):
+    def __init__(self, output: Mapping[str, Any]):
+        super().__init__(output)
+        self.headings_only = output.get("match") == "heading"
+        self.sections: List[Mapping[str, Any]] = []
+        for section in output.get("sections", []):
+            if section.get("field") not in RESULT_FIELDS:
+                raise ValueError(f"Output section field must be one of: {', '.join(RESULT_FIELDS)}")
+            self.sections.append(section)
+        self._buffer = ""
+        self._current: Optional[Mapping[str, Any]] = None
+        self._lines: List[str] = []
+
+    def feed(self, text: str) -> Dict[str, str]:
+        self._buffer += text
+        completed: Dict[str, str] = {}
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            completed.update(self._line(line))
+        return completed
+
+    def finish(self) -> Dict[str, str]:
+        completed = self._line(self._buffer) if self._buffer else {}
+        self._buffer = ""
+        completed.update(self._close())
+        return completed
+
+    def _is_heading(self, line: str) -> bool:
+        stripped = line.strip()
+        return len(stripped) <= MAX_HEADING_CHARS and stripped.startswith(("#", "**"))
+
+    def _line(self, line: str) -> Dict[str, str]:
+        if self._current is not None and self._current.get("single_line") and line.strip():
+            # The value is often bold, which would otherwise read as a heading.
+            return self._line_in_section(line)
+        lowered = line.lower()
+        if not self.headings_only or self._is_heading(line):
+            for section in self.sections:
+                if any(marker.lower() in lowered for marker in section.get("markers", [])):
+                    completed = self._close()
+                    self._current = section
+                    # Text after a colon on the marker line belongs to the section.
+                    parts = re.split(r"[:：]", line, maxsplit=1)
+                    if len(parts) == 2 and parts[1].strip():
+                        completed.update(self._line_in_section(parts[1]))
+                    return completed
+            if self.headings_only:
+                return self._close()
+
+        if self._current is None:
+            return {}
+        return self._line_in_section(line)
+
+    def _line_in_section(self, line: str) -> Dict[str, str]:
+        if self._current.get("single_line"):
+            if not line.strip():
+                return {}
+            field = self._current["field"]
+            self._current = None
+            return self._complete(field, _strip_markup(line))
+        self._lines.append(line)
+        return {}
+
+    def _close(self) -> Dict[str, str]:
+        if self._current is None:
+            return {}
+        field, lines = self._current["field"], self._lines
+        self._current, self._lines = None, []
+        return self._complete(field, "\n".join(lines))
+
+
+def _string_value(buffer: str, field: str) -> Optional[str]:
+    match = re.search(rf'"{re.escape(field)}"\s*:\s*("(?:[^"\\]|\\.)*")', buffer)
+    return json.loads(match.group(1)) if match else None
+
+
+@register_parser("json")
+class JsonParser(ResultParser):
+    def __init__(self, output: Mapping[str, Any]):
+        super().__init__(output)
+        properties = (output.get("schema") or {}).get("properties") or {}
+        self.field_names = [name for name in properties if name in RESULT_FIELDS] or list(RESULT_FIELDS)
+        self._buffer = ""
+
+    def feed(self, text: str) -> Dict[str, str]:
+        self._buffer += text
+        completed: Dict[str, str] = {}
+        # A string value can only be completed by a closing quote.
+        if '"' not in text:
+            return completed
+        for field in self.field_names:
+            if field not in self.fields:
+                value = _string_value(self._buffer, field)
+                if value is not None:
+                    completed.update(self._complete(field, value))
+        return completed
+
+    def finish(self) -> Dict[str, str]:
+        start, end = self._buffer.find("{"), self._buffer.rfind("}")
+        try:
+            data = json.loads(self._buffer[start:end + 1]) if 0 <= start < end else {}
+        except json.JSONDecodeError:
+            data = {}
+        completed: Dict[str, str] = {}
+        for field in self.field_names:
+            value = data.get(field) if isinstance(data, dict) else None
+            if value is not None and field not in self.fields:
+                text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+                completed.update(self._complete(field, text))
+        return completed
+
+
+def output_config(workflow_id: str, workflow_config: Optional[Mapping[str, Any]] = None) -> Mapping[str, Any]:
+    output = (workflow_config or {}).get("output")
+    if isinstance(output, Mapping):
+        return output
+    return BUILTIN_OUTPUTS.get(workflow_id, {"parser": "text"})
+
+
+def create_parser(output: Mapping[str, Any]) -> ResultParser:
+    name = output.get("parser", "text")
+    factory = _parsers.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown output parser '{name}'")
+    return factory(output)
+
+
+def parse_output(raw_output: str, output: Mapping[str, Any]) -> Dict[str, str]:
+    parser = create_parser(output)
+    parser.feed(raw_output)
+    parser.finish()
+    return parser.result(raw_output)
+
+
+class ResultStream:
+    """Parses the final task's answer while it streams, sending each field once complete.
+
+    Attached as a listener to the token stream of the final task's agent and
+    armed when that task starts. Only text after ``Final Answer:`` is parsed,
+    and every LLM call starts a fresh parse.
+    """
+
+    def __init__(self, output: Mapping[str, Any], send: Callable[[Dict[str, Any]], None] = send_event):
+        self.output = output
+        self._send = send
+        self.armed = False
+        self._parser: Optional[ResultParser] = None
+        # Text not yet known to be part of the answer; None once inside it.
+        self._pending: Optional[str] = ""
+        self._sent: Dict[str, str] = {}
+
+    def arm(self) -> None:
+        self.armed = True
+
+    def on_llm_start(self) -> None:
+        self._parser = create_parser(self.output) if self.armed else None
+        self._pending = ""
+
+    def on_llm_new_token(self, token: str) -> None:
+        if self._parser is None:
+            return
+        if self._pending is not None:
+            self._pending += token
+            index = self._pending.find(FINAL_ANSWER)
+            if index == -1:
+                # Keep enough text to find a marker split across tokens.
+                self._pending = self._pending[-len(FINAL_ANSWER):]
+                return
+            token, self._pending = self._pending[index + len(FINAL_ANSWER):].lstrip(), None
+        self._emit(self._parser.feed(token))
+
+    def on_llm_error(self) -> None:
+        # The retry streams the whole answer again into a fresh parse.
+        self._parser = None
+
+    def on_llm_end(self) -> None:
+        if self._parser is not None and self._pending is None:
+            self._emit(self._parser.finish())
+        self._parser = None
+
+    def _emit(self, fields: Mapping[str, str]) -> None:
+        for field, value in fields.items():
+            if self._sent.get(field) != value:
+                self._sent[field] = value
+                self._send({"type": "result_field", "field": field, "message": value})
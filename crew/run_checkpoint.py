@@ -0,0 +1,159 @@
+"""On-disk checkpoints of finished task outputs, keyed by run id.
+
+Checkpointing is opt-in: set ``WORKFLOW_RUN_CHECKPOINTS=1``. Task outputs
+are kept in a private directory (created 0700, files 0600) only until the
+run succeeds; a failed or interrupted run keeps its checkpoint for
+``WORKFLOW_RUN_TTL_SECONDS``.
+
+Each run gets ``<WORKFLOW_RUN_DIR>/<run_id>/`` holding ``meta.json`` (the
+workflow id, topic and a hash of the workflow definition) and one
+``task-<index>.json`` per finished task. A resumed run must present the same
+request and an unchanged workflow definition; it then skips the recorded
+tasks and feeds their outputs to the remaining ones as context.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Mapping, Optional
+
+
+DEFAULT_RUN_DIR = os.path.join(tempfile.gettempdir(), "qiaoagent-runs")
+DEFAULT_RUN_TTL_SECONDS = 7 * 24 * 60 * 60
+RUN_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+TASK_FILE_PATTERN = re.compile(r"^task-(\d+)\.json$")
+
+
+def checkpoints_enabled() -> bool:
+    return os.getenv("WORKFLOW_RUN_CHECKPOINTS", "").lower() in ("1", "true", "yes")
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def workflow_fingerprint(workflow_config: Mapping[str, Any]) -> str:
+    canonical = json.dumps(workflow_config, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _write_json(path: str, value: Dict[str, Any]) -> None:
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(descriptor, "w", encoding="utf-8") as output_file:
+        json.dump(value, output_file, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def _read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as input_file:
+        return json.load(input_file)
+
+
+def purge_expired_runs(root: str, ttl_seconds: float, now: Optional[float] = None) -> int:
+    """Delete run directories whose metadata is older than ``ttl_seconds``."""
+    now = time.time() if now is None else now
+    removed = 0
+    try:
+        run_ids = os.listdir(root)
+    except FileNotFoundError:
+        return 0
+    for run_id in run_ids:
+        run_dir = os.path.join(root, run_id)
+        if not RUN_ID_PATTERN.match(run_id):
+            continue
+        try:
+            expired = now - os.stat(os.path.join(run_dir, "meta.json")).st_mtime > ttl_seconds
+        except FileNotFoundError:
+            expired = True
+        if expired:
+            shutil.rmtree(run_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class RunCheckpoint:
+    def __init__(self, run_dir: str, run_id: str):
+        self.run_dir = run_dir
+        self.run_id = run_id
+
+    @classmethod
+    def open(
+        cls,
+        run_id: str,
+        topic: str,
+        workflow_id: str,
+        workflow_config: Mapping[str, Any],
+        resume: bool = False,
+        root: Optional[str] = None,
+    ) -> "RunCheckpoint":
+        """Start a new checkpoint for ``run_id``, or reopen it when resuming."""
+        if not isinstance(run_id, str) or not RUN_ID_PATTERN.match(run_id):
+            raise ValueError("Invalid run id")
+        root = root or os.getenv("WORKFLOW_RUN_DIR", DEFAULT_RUN_DIR)
+        run_dir = os.path.join(root, run_id)
+        meta = {
+            "run_id": run_id,
+            "workflow_id": workflow_id,
+            "topic": topic,
+            "workflow": workflow_fingerprint(workflow_config),
+        }
+        meta_path = os.path.join(run_dir, "meta.json")
+
+        if resume:
+            try:
+                stored = _read_json(meta_path)
+            except (OSError, ValueError) as error:
+                raise ValueError(f"Run '{run_id}' not found") from error
+            if stored != meta:
+                raise ValueError(
+                    f"Run '{run_id}' was started with a different request or workflow definition"
+                )
+            # Keep a run that is still being resumed from expiring.
+            os.utime(meta_path)
+        else:
+            os.makedirs(root, mode=0o700, exist_ok=True)
+            purge_expired_runs(
+                root,
+                float(os.getenv("WORKFLOW_RUN_TTL_SECONDS", str(DEFAULT_RUN_TTL_SECONDS))),
+            )
+            os.makedirs(run_dir, mode=0o700)
+            _write_json(meta_path, meta)
+
+        return cls(run_dir, run_id)
+
+    def completed_outputs(self) -> Dict[int, str]:
+        """Raw outputs of the tasks recorded as finished, by task index."""
+        outputs: Dict[int, str] = {}
+        for name in os.listdir(self.run_dir):
+            match = TASK_FILE_PATTERN.match(name)
+            if not match:
+                continue
+            try:
+                record = _read_json(os.path.join(self.run_dir, name))
+            except (OSError, ValueError):
+                continue
+            if isinstance(record.get("raw"), str):
+                outputs[int(match.group(1))] = record["raw"]
+        return outputs
+
+    def save_task(self, index: int, agent_name: str, task_output: Any) -> None:
+        _write_json(
+            os.path.join(self.run_dir, f"task-{index}.json"),
+            {
+                "index": index,
+                "agent": agent_name,
+                "raw": str(getattr(task_output, "raw", task_output)),
+                "summary": getattr(task_output, "summary", None),
+                "saved_at": time.time(),
+            },
+        )
+
+    def discard(self) -> None:
+        """Delete the checkpoint once the run it belongs to has succeeded."""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
@@ -8,25 +8,22 @@ from contextlib import redirect_stdout
 import json
 import os
 import sys
-from typing import Any, Dict, Iterable, Tuple
+from typing import AbstractSet, Any, Dict, Iterable, Optional, Tuple
+
+from crew.progress import open_progress_channel, send_progress
+from crew.run_checkpoint import RunCheckpoint, checkpoints_enabled, new_run_id
+from crew.telemetry import run_telemetry, span
+from crew.verbosity import parse_verbosity, run_verbosity
+from crew.workflow_catalog import WORKFLOWS_PATH, WorkflowCatalog, workflow_catalog
 
 
 MAX_TOPIC_LENGTH = 20_000
 MAX_STDIN_LENGTH = MAX_TOPIC_LENGTH * 8
-WORKFLOWS_PATH = os.path.join(
-    os.path.dirname(__file__), "..", "public", "workflows.json"
-)
 
 
 def load_allowed_workflow_ids(path: str = WORKFLOWS_PATH) -> Iterable[str]:
-    with open(path, "r", encoding="utf-8") as workflow_file:
-        catalog = json.load(workflow_file)
-
-    workflow_ids = {
-        workflow.get("id")
-        for workflow in catalog.get("workflows", [])
-        if isinstance(workflow, dict) and isinstance(workflow.get("id"), str)
-    }
+    catalog = workflow_catalog if path == WORKFLOWS_PATH else WorkflowCatalog(path)
+    workflow_ids = catalog.workflow_ids()
     if not workflow_ids:
         raise ValueError("No runnable workflows are configured")
     return workflow_ids
@@ -45,41 +42,117 @@ def validate_payload(
         raise ValueError("Topic is required")
     if len(topic) > MAX_TOPIC_LENGTH:
         raise ValueError(f"Topic exceeds the {MAX_TOPIC_LENGTH} character limit")
-    if not isinstance(workflow_id, str) or workflow_id not in set(allowed_workflow_ids):
+    if not isinstance(allowed_workflow_ids, AbstractSet):
+        allowed_workflow_ids = set(allowed_workflow_ids)
+    if not isinstance(workflow_id, str) or workflow_id not in allowed_workflow_ids:
         raise ValueError("Unknown workflow_id")
 
     return topic, workflow_id
 
 
-def read_request(stdin: Any = sys.stdin) -> Tuple[str, str]:
-    raw_payload = stdin.read(MAX_STDIN_LENGTH + 1)
+def decode_payload(raw_payload: str) -> Dict[str, Any]:
     if len(raw_payload) > MAX_STDIN_LENGTH:
         raise ValueError("Request payload is too large")
 
     try:
-        payload: Dict[str, Any] = json.loads(raw_payload)
+        return json.loads(raw_payload)
     except json.JSONDecodeError as error:
         raise ValueError("Request must contain valid JSON") from error
 
-    return validate_payload(payload, load_allowed_workflow_ids())
 
+def read_request(stdin: Any = sys.stdin) -> Tuple[str, str, bool, Optional[str]]:
+    """Validated topic and workflow_id plus the optional bypass_cache and verbosity."""
+    payload = decode_payload(stdin.read(MAX_STDIN_LENGTH + 1))
+    topic, workflow_id = validate_payload(payload, load_allowed_workflow_ids())
+    return topic, workflow_id, payload.get("bypass_cache") is True, read_verbosity(payload)
 
-def execute(streaming: bool) -> int:
-    try:
-        topic, workflow_id = read_request()
 
+def read_verbosity(payload: Dict[str, Any]) -> Optional[str]:
+    verbosity = payload.get("verbosity")
+    return parse_verbosity(verbosity) if verbosity is not None else None
+
+
+def run_request(
+    topic: str,
+    workflow_id: str,
+    streaming: bool,
+    bypass_cache: bool = False,
+    checkpoint: Any = None,
+    verbosity: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run one validated request and return the parsed workflow result."""
+    with run_verbosity(verbosity), run_telemetry(workflow_id):
         # Import the workflow engine only after untrusted input has passed the
         # same allowlist and size checks enforced by the Next.js route.
-        from crew.main import run_workflow, run_workflow_with_progress
+        with span("import"):
+            from crew.main import run_workflow, run_workflow_with_progress
 
         runner = run_workflow_with_progress if streaming else run_workflow
         # CrewAI is verbose on stdout. Keep stdout reserved for the one final
         # JSON value so the parent process never needs regex-based extraction.
         with redirect_stdout(sys.stderr):
-            result = runner(topic, workflow_id)
+            return runner(
+                topic, workflow_id, bypass_cache=bypass_cache, checkpoint=checkpoint
+            )
+
+
+def execute(streaming: bool, resume_run_id: Optional[str] = None) -> int:
+    """Run one stdin request.
+
+    With ``WORKFLOW_RUN_CHECKPOINTS`` set (or when resuming), finished tasks
+    are checkpointed under a run id, reported as a ``run`` progress event and
+    in the error JSON, so an interrupted run can be continued with
+    ``--resume <run_id>``. The checkpoint is deleted once the run succeeds.
+    """
+    checkpoint = None
+    try:
+        topic, workflow_id, bypass_cache, verbosity = read_request()
+        if resume_run_id is not None or checkpoints_enabled():
+            checkpoint = RunCheckpoint.open(
+                resume_run_id or new_run_id(),
+                topic,
+                workflow_id,
+                workflow_catalog.get(workflow_id),
+                resume=resume_run_id is not None,
+            )
+            if streaming:
+                send_progress("run", checkpoint.run_id)
+        result = run_request(
+            topic, workflow_id, streaming, bypass_cache, checkpoint, verbosity
+        )
+        if checkpoint is not None:
+            checkpoint.discard()
 
         print(json.dumps(result, ensure_ascii=False))
         return 0
+    except ValueError as error:
+        report_error(error, checkpoint)
+        return 2
+    except Exception as error:
+        report_error(error, checkpoint)
+        return 1
+
+
+def report_error(error: Exception, checkpoint: Any = None) -> None:
+    report = {"error": str(error)}
+    if checkpoint is not None:
+        report["run_id"] = checkpoint.run_id
+    print(json.dumps(report, ensure_ascii=False), file=sys.stderr)
+
+
+def execute_batch(concurrency: int, checkpoint_path: Optional[str]) -> int:
+    """Run a JSON array or JSONL batch from stdin, writing JSONL to stdout."""
+    from crew.batch import MAX_BATCH_STDIN_LENGTH, parse_batch, run_batch
+
+    stdout = sys.stdout
+    try:
+        items = parse_batch(sys.stdin.read(MAX_BATCH_STDIN_LENGTH + 1))
+        allowed_workflow_ids = load_allowed_workflow_ids()
+        with redirect_stdout(sys.stderr):
+            failures = run_batch(
+                items, allowed_workflow_ids, stdout, concurrency, checkpoint_path
+            )
+        return 1 if failures else 0
     except ValueError as error:
         print(json.dumps({"error": str(error)}, ensure_ascii=False), file=sys.stderr)
         return 2
@@ -91,5 +164,67 @@ def execute(streaming: bool) -> int:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--stream", action="store_true")
+    parser.add_argument(
+        "--progress-fd",
+        type=int,
+        metavar="FD",
+        help="write progress events as JSON frames to this inherited fd instead of stderr",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="continue an interrupted run, skipping the tasks it already finished",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="SOCKET",
+        help="run a warm worker pool on this Unix socket instead of one request",
+    )
+    parser.add_argument(
+        "--zygote",
+        metavar="SOCKET",
+        help="import the workflow engine once and fork a child per request sent to this "
+        "Unix socket by processes started with WORKFLOW_ZYGOTE_SOCKET",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="read a JSON array or JSONL of requests and write JSONL results",
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="batch items run at once")
+    parser.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="append batch results here and skip items it already records as done",
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument(
+        "--max-jobs", type=int, default=50, help="recycle a worker after this many jobs"
+    )
+    parser.add_argument(
+        "--max-rss-mb", type=int, default=0, help="recycle a worker above this RSS (0 = off)"
+    )
     args = parser.parse_args()
-    raise SystemExit(execute(args.stream))
+    zygote_socket = os.getenv("WORKFLOW_ZYGOTE_SOCKET")
+    if zygote_socket and not (args.serve or args.zygote or args.batch):
+        from crew.zygote import forward_to_zygote
+
+        # Falls through to a cold run when no zygote is listening.
+        exit_code = forward_to_zygote(zygote_socket, args.stream, args.progress_fd, args.resume)
+        if exit_code is not None:
+            raise SystemExit(exit_code)
+    if args.progress_fd is not None:
+        open_progress_channel(args.progress_fd)
+    if args.serve:
+        from crew.worker_pool import serve
+
+        raise SystemExit(
+            serve(args.serve, args.workers, args.max_jobs, args.max_rss_mb)
+        )
+    if args.zygote:
+        from crew.zygote import serve_zygote
+
+        raise SystemExit(serve_zygote(args.zygote))
+    if args.batch:
+        raise SystemExit(execute_batch(args.concurrency, args.checkpoint))
+    raise SystemExit(execute(args.stream, args.resume))
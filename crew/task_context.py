@@ -0,0 +1,124 @@
+"""How much of the earlier task outputs each task receives as context.
+
+In a sequential workflow every task sees the outputs of all tasks before it
+(in a DAG, of the tasks it depends on), so prompts and the time to first
+token grow with every step. A task in ``workflows.json`` may limit that with
+``context_policy``, either a mode name or ``{"mode": ..., "max_tokens": ...}``
+(not ``context``, which crewai and the DAG read as a list of upstream tasks):
+
+- ``full`` (default): every earlier output, unchanged;
+- ``last``: only the most recent output;
+- ``tail``: the end of the earlier outputs, at most ``max_tokens``;
+- ``summary``: the most recent output in full, and an extractive summary of
+  the ones before it (their highest-scoring sentences, in their original
+  order) within ``max_tokens``.
+
+Token counts use ``crew.rate_limiter.estimate_tokens``. The topic that
+``prompt_layout: prefix`` puts at the head of the context is never trimmed.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+import re
+from typing import Any, List, Mapping, Sequence
+
+from crew.rate_limiter import estimate_tokens
+
+
+CONTEXT_MODES = ("full", "last", "tail", "summary")
+DEFAULT_CONTEXT_TOKENS = 1000
+TRUNCATION_MARK = "…"
+
+_SENTENCE = re.compile(r"[^\n。！？!?]*(?:[。！？!?]+|\n+|$)")
+_TERM = re.compile(r"[A-Za-z0-9]+|[一-鿿]")
+
+
+@dataclass(frozen=True)
+class ContextPolicy:
+    mode: str = "full"
+    max_tokens: int = DEFAULT_CONTEXT_TOKENS
+
+
+def context_policy(task_config: Mapping[str, Any]) -> ContextPolicy:
+    config = task_config.get("context_policy", "full")
+    if isinstance(config, str):
+        config = {"mode": config}
+    if not isinstance(config, Mapping):
+        raise ValueError("Task context_policy must be a mode name or an object")
+    mode = config.get("mode", "full")
+    if mode not in CONTEXT_MODES:
+        raise ValueError(f"Task context_policy mode must be one of: {', '.join(CONTEXT_MODES)}")
+    max_tokens = config.get("max_tokens", DEFAULT_CONTEXT_TOKENS)
+    if not isinstance(max_tokens, int) or isinstance(max_tokens, bool) or max_tokens < 1:
+        raise ValueError("Task context_policy max_tokens must be a positive integer")
+    return ContextPolicy(mode, max_tokens)
+
+
+def limits_context(workflow_config: Mapping[str, Any]) -> bool:
+    return any(
+        context_policy(task_config).mode != "full"
+        for task_config in workflow_config.get("tasks", [])
+    )
+
+
+def _tail(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # The longest end of the text that fits, measured with the same estimate
+    # as everything else (it never grows as the text gets shorter).
+    low, high = 1, len(text)
+    while low < high:
+        middle = (low + high) // 2
+        if estimate_tokens(TRUNCATION_MARK + text[middle:]) <= max_tokens:
+            high = middle
+        else:
+            low = middle + 1
+    return TRUNCATION_MARK + text[low:]
+
+
+def _terms(text: str) -> List[str]:
+    return [term.lower() for term in _TERM.findall(text)]
+
+
+def extractive_summary(text: str, max_tokens: int) -> str:
+    """The sentences of ``text`` whose terms are most frequent in it, within ``max_tokens``."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = [sentence for sentence in _SENTENCE.findall(text) if sentence.strip()]
+    frequencies = Counter(_terms(text))
+
+    def score(index: int) -> float:
+        terms = _terms(sentences[index])
+        if not terms:
+            return 0.0
+        # Average, so long sentences do not win on length alone; ties go to
+        # the earlier sentence, which tends to state the point.
+        return sum(frequencies[term] for term in terms) / len(terms)
+
+    chosen = []
+    used = 0
+    for index in sorted(range(len(sentences)), key=lambda index: (-score(index), index)):
+        size = estimate_tokens(sentences[index].strip())
+        if used + size <= max_tokens:
+            chosen.append(index)
+            used += size
+    if not chosen:
+        return _tail(sentences[0].strip(), max_tokens)
+    return "".join(sentences[index] for index in sorted(chosen)).strip()
+
+
+def limit_context(outputs: Sequence[str], policy: ContextPolicy) -> List[str]:
+    """Apply ``policy`` to the earlier outputs a task would receive, oldest first."""
+    outputs = [str(output) for output in outputs]
+    if policy.mode == "full" or not outputs:
+        return outputs
+    if policy.mode == "last":
+        return outputs[-1:]
+    if policy.mode == "tail":
+        return [_tail("\n\n".join(outputs), policy.max_tokens)]
+
+    earlier = outputs[:-1]
+    if not earlier:
+        return outputs
+    budget = max(policy.max_tokens // len(earlier), 1)
+    return [extractive_summary(output, budget) for output in earlier] + outputs[-1:]
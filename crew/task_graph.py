@@ -0,0 +1,145 @@
+"""Dependency graph execution for workflow tasks.
+
+Tasks in ``workflows.json`` may declare ``depends_on`` as a list of task
+``id`` values or zero-based task indexes. As soon as one task in a workflow
+declares it, the workflow runs as a DAG: a task starts once all of its
+dependencies have finished, ready tasks run concurrently up to the workflow's
+``max_parallel_tasks``, and each task only receives the outputs of the tasks
+it depends on. Workflows without ``depends_on`` keep the sequential crew.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import contextvars
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+
+DEFAULT_MAX_PARALLEL_TASKS = 4
+
+
+def uses_task_graph(workflow_config: Mapping[str, Any]) -> bool:
+    return any(
+        isinstance(task, dict) and "depends_on" in task
+        for task in workflow_config.get("tasks", [])
+    )
+
+
+def max_parallel_tasks(workflow_config: Mapping[str, Any]) -> int:
+    limit = workflow_config.get("max_parallel_tasks", DEFAULT_MAX_PARALLEL_TASKS)
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1:
+        raise ValueError("max_parallel_tasks must be a positive integer")
+    return limit
+
+
+def build_task_graph(task_configs: Sequence[Mapping[str, Any]]) -> List[List[int]]:
+    """Resolve ``depends_on`` references to task indexes and reject cycles."""
+    ids: Dict[str, int] = {}
+    for index, task_config in enumerate(task_configs):
+        task_id = task_config.get("id")
+        if task_id is not None:
+            if not isinstance(task_id, str) or task_id in ids:
+                raise ValueError(f"Task {index} has an invalid or duplicate id")
+            ids[task_id] = index
+
+    dependencies: List[List[int]] = []
+    for index, task_config in enumerate(task_configs):
+        resolved = []
+        for reference in task_config.get("depends_on", []) or []:
+            if isinstance(reference, str) and reference in ids:
+                resolved.append(ids[reference])
+            elif (
+                isinstance(reference, int)
+                and not isinstance(reference, bool)
+                and 0 <= reference < len(task_configs)
+            ):
+                resolved.append(reference)
+            else:
+                raise ValueError(f"Task {index} depends on unknown task {reference!r}")
+        if index in resolved:
+            raise ValueError(f"Task {index} depends on itself")
+        dependencies.append(sorted(set(resolved)))
+
+    # Kahn's algorithm: every task must become ready eventually.
+    remaining = [len(deps) for deps in dependencies]
+    dependents: List[List[int]] = [[] for _ in task_configs]
+    for index, deps in enumerate(dependencies):
+        for dependency in deps:
+            dependents[dependency].append(index)
+    ready = [index for index, count in enumerate(remaining) if count == 0]
+    visited = 0
+    while ready:
+        index = ready.pop()
+        visited += 1
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    if visited != len(task_configs):
+        raise ValueError("Task dependencies contain a cycle")
+
+    return dependencies
+
+
+def sequential_dependencies(task_count: int) -> List[List[int]]:
+    """Dependencies matching a sequential crew: each task sees every earlier one."""
+    return [list(range(index)) for index in range(task_count)]
+
+
+def run_task_graph(
+    dependencies: Sequence[Sequence[int]],
+    run_task: Callable[[int, List[Any]], Any],
+    max_parallel: int,
+    completed: Optional[Mapping[int, Any]] = None,
+) -> List[Any]:
+    """Run ``run_task(index, dependency_outputs)`` for every task in dependency order.
+
+    Returns the outputs indexed like ``dependencies``. Tasks in ``completed``
+    (index to output, e.g. restored from a checkpoint) are not run again and
+    their outputs are passed on to their dependents. The first failure stops
+    scheduling new tasks and is re-raised once running tasks have finished.
+    Each task runs in a copy of the caller's context, so context-local state
+    such as the progress sink follows it into the worker thread.
+    """
+    outputs: Dict[int, Any] = dict(completed or {})
+    remaining = [
+        sum(1 for dependency in deps if dependency not in outputs) for deps in dependencies
+    ]
+    dependents: List[List[int]] = [[] for _ in dependencies]
+    for index, deps in enumerate(dependencies):
+        for dependency in deps:
+            dependents[dependency].append(index)
+
+    ready = [
+        index
+        for index, count in enumerate(remaining)
+        if count == 0 and index not in outputs
+    ]
+    running: Dict[Future, int] = {}
+    failure = None
+
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="task") as pool:
+        while ready or running:
+            while ready and failure is None and len(running) < max_parallel:
+                index = ready.pop(0)
+                context_outputs = [outputs[dependency] for dependency in dependencies[index]]
+                context = contextvars.copy_context()
+                running[pool.submit(context.run, run_task, index, context_outputs)] = index
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    outputs[index] = future.result()
+                except BaseException as error:
+                    if failure is None:
+                        failure = error
+                    continue
+                for dependent in dependents[index]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+
+    if failure is not None:
+        raise failure
+    return [outputs[index] for index in range(len(dependencies))]
@@ -0,0 +1,360 @@
+"""Structured timing and token accounting for workflow runs.
+
+``run_telemetry(workflow_id)`` opens one ``RunTelemetry`` for the current
+context (and the task threads it spawns). While it is open:
+
+- ``span(name)`` times a phase of the run (import, config load, agent
+  construction, task execution, ...); ``add_span`` records one measured
+  elsewhere, such as time spent queued before the run started;
+- ``ManagedOpenAICompletion`` records every LLM call as an ``llm_call`` span
+  with its agent, provider, model, prompt/completion tokens (and how many
+  prompt tokens the provider's prefix cache served), time queued on the
+  rate limiter and, for streamed calls, when the first delta arrived.
+
+Each span is sent as a ``span`` progress event as soon as it ends. When the
+run ends a ``metrics`` event carries the totals per phase, agent and
+provider/model. The same summary is optionally appended to a JSONL file
+(``WORKFLOW_METRICS_JSONL_PATH``) and added to cumulative counters in a
+Prometheus textfile (``WORKFLOW_METRICS_PROM_PATH``) for node_exporter's
+textfile collector. Outside an open run every helper is a no-op.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import fcntl
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from crew.cancellation import WorkflowCancelled
+from crew.progress import send_event
+
+
+LLM_CALL_SPAN = "llm_call"
+TOKEN_KINDS = ("prompt", "completion", "cached_prompt")
+METRIC_PREFIX = "qiaoagent"
+
+_active_run: contextvars.ContextVar[Optional["RunTelemetry"]] = contextvars.ContextVar(
+    "run_telemetry", default=None
+)
+_queued_since: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "run_queued_since", default=None
+)
+
+
+def _add_usage(totals: Dict[str, float], record: Mapping[str, Any]) -> None:
+    totals["calls"] = totals.get("calls", 0) + 1
+    totals["seconds"] = totals.get("seconds", 0.0) + record["duration"]
+    for key in ("prompt_tokens", "completion_tokens", "cached_prompt_tokens"):
+        totals[key] = totals.get(key, 0) + (record.get(key) or 0)
+
+
+class RunTelemetry:
+    def __init__(
+        self,
+        workflow_id: str,
+        emit: Callable[[Dict[str, Any]], None] = send_event,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.workflow_id = workflow_id
+        self._emit = emit
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.spans: List[Dict[str, Any]] = []
+        # Agent role -> workflow agent name, for labelling LLM calls.
+        self.agent_names: Dict[str, str] = {}
+        self.closed = False
+
+    def add_span(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """Record a span measured on this run's clock (``time.monotonic``)."""
+        record = {
+            "name": name,
+            "start": round(start - self.started, 6),
+            "duration": round(end - start, 6),
+            **attrs,
+        }
+        with self._lock:
+            # Calls that finish after the run (a hedged loser) are dropped.
+            if self.closed:
+                return
+            self.spans.append(record)
+        self._emit({"type": "span", "message": name, "span": record})
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        start = self._clock()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.add_span(name, start, self._clock(), ok=ok, **attrs)
+
+    def summary(self, status: str) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        phases: Dict[str, float] = {}
+        agents: Dict[str, Dict[str, float]] = {}
+        providers: Dict[str, Dict[str, float]] = {}
+        first_token = None
+        for record in spans:
+            if record["name"] != LLM_CALL_SPAN:
+                phases[record["name"]] = phases.get(record["name"], 0.0) + record["duration"]
+                continue
+            _add_usage(agents.setdefault(record.get("agent") or "unknown", {}), record)
+            _add_usage(providers.setdefault(f'{record["provider"]}/{record["model"]}', {}), record)
+            if record.get("ok") and not record.get("memo_hit"):
+                # A streamed call reports when its first delta arrived; an
+                # unstreamed one shows its first token with the whole response.
+                arrived = record["start"] + record.get("first_token", record["duration"])
+                first_token = arrived if first_token is None else min(first_token, arrived)
+        return {
+            "workflow_id": self.workflow_id,
+            "status": status,
+            "duration": round(self._clock() - self.started, 6),
+            "time_to_first_token": first_token,
+            "phases": phases,
+            "agents": agents,
+            "providers": providers,
+        }
+
+    def close(self, status: str) -> Dict[str, Any]:
+        summary = self.summary(status)
+        with self._lock:
+            self.closed = True
+            spans = list(self.spans)
+        tokens = sum(
+            (usage["prompt_tokens"] + usage["completion_tokens"])
+            for usage in summary["agents"].values()
+        )
+        cached = sum(usage["cached_prompt_tokens"] for usage in summary["agents"].values())
+        message = f'耗时 {summary["duration"]:.1f} 秒，{tokens} tokens'
+        if cached:
+            message += f'（缓存命中 {cached}）'
+        self._emit({
+            "type": "metrics",
+            "message": message,
+            "metrics": summary,
+        })
+        write_metrics(summary, spans)
+        return summary
+
+
+def current_run() -> Optional[RunTelemetry]:
+    return _active_run.get()
+
+
+@contextmanager
+def run_telemetry(workflow_id: str) -> Iterator[RunTelemetry]:
+    """Open telemetry for a run, or join the one already open in this context."""
+    active = _active_run.get()
+    if active is not None:
+        yield active
+        return
+
+    telemetry = RunTelemetry(workflow_id)
+    queued_at = _queued_since.get()
+    if queued_at is not None:
+        telemetry.add_span("queue", queued_at, telemetry.started)
+    token = _active_run.set(telemetry)
+    status = "error"
+    try:
+        yield telemetry
+        status = "ok"
+    except WorkflowCancelled:
+        status = "cancelled"
+        raise
+    finally:
+        _active_run.reset(token)
+        telemetry.close(status)
+
+
+def instrumented_run(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Run ``func(topic, workflow_id, ...)`` inside ``run_telemetry(workflow_id)``."""
+
+    @functools.wraps(func)
+    def wrapper(topic: str, workflow_id: str, *args: Any, **kwargs: Any) -> Any:
+        with run_telemetry(workflow_id):
+            return func(topic, workflow_id, *args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def queued_since(submitted_at: float) -> Iterator[None]:
+    """Report the ``time.monotonic()`` at which the run in this context was queued."""
+    token = _queued_since.set(submitted_at)
+    try:
+        yield
+    finally:
+        _queued_since.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    telemetry = _active_run.get()
+    if telemetry is None:
+        yield
+        return
+    with telemetry.span(name, **attrs):
+        yield
+
+
+def add_span(name: str, start: float, end: float, **attrs: Any) -> None:
+    telemetry = _active_run.get()
+    if telemetry is not None:
+        telemetry.add_span(name, start, end, **attrs)
+
+
+def name_agents(workflow_config: Mapping[str, Any]) -> None:
+    """Label LLM calls with workflow agent names instead of crewai roles."""
+    telemetry = _active_run.get()
+    if telemetry is not None:
+        for agent_config in workflow_config.get("agents", []):
+            telemetry.agent_names[agent_config["role"]] = agent_config["name"]
+
+
+def record_llm_call(
+    agent_role: Optional[str],
+    provider_id: str,
+    model: str,
+    start: float,
+    end: float,
+    usage: Mapping[str, int],
+    **attrs: Any,
+) -> None:
+    telemetry = _active_run.get()
+    if telemetry is None:
+        return
+    telemetry.add_span(
+        LLM_CALL_SPAN,
+        start,
+        end,
+        agent=telemetry.agent_names.get(agent_role, agent_role) if agent_role else None,
+        provider=provider_id,
+        model=model,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        cached_prompt_tokens=usage.get("cached_prompt_tokens", 0),
+        **attrs,
+    )
+
+
+def write_metrics(summary: Mapping[str, Any], spans: List[Dict[str, Any]]) -> None:
+    """Append to the JSONL sink and update the Prometheus textfile, when configured."""
+    jsonl_path = os.getenv("WORKFLOW_METRICS_JSONL_PATH")
+    prom_path = os.getenv("WORKFLOW_METRICS_PROM_PATH")
+    try:
+        if jsonl_path:
+            line = json.dumps({"run": summary, "spans": spans}, ensure_ascii=False)
+            with _locked(jsonl_path):
+                with open(jsonl_path, "a", encoding="utf-8") as output_file:
+                    output_file.write(line + "\n")
+        if prom_path:
+            update_prometheus_textfile(prom_path, prometheus_samples(summary))
+    except OSError as error:
+        # Metrics are best effort; the run itself already finished.
+        print(f"Error writing workflow metrics: {error}", file=sys.stderr)
+
+
+METRIC_HELP = {
+    "workflow_runs_total": "Workflow runs by outcome.",
+    "workflow_run_seconds_total": "Wall time spent in workflow runs.",
+    "workflow_phase_seconds_total": "Wall time spent in each phase of a workflow run.",
+    "llm_calls_total": "LLM calls made by workflow agents.",
+    "llm_call_seconds_total": "Wall time spent in LLM calls.",
+    "llm_tokens_total": (
+        "Tokens reported by providers for LLM calls, by provider and model "
+        "(kind cached_prompt: prompt tokens served from the provider's prefix cache)."
+    ),
+    "agent_tokens_total": "Tokens reported by providers for LLM calls, by workflow agent.",
+}
+
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+def prometheus_samples(summary: Mapping[str, Any]) -> List[Sample]:
+    workflow = ("workflow_id", summary["workflow_id"])
+    samples: List[Sample] = [
+        ("workflow_runs_total", (workflow, ("status", summary["status"])), 1),
+        ("workflow_run_seconds_total", (workflow,), summary["duration"]),
+    ]
+    for phase, seconds in summary["phases"].items():
+        samples.append(("workflow_phase_seconds_total", (workflow, ("phase", phase)), seconds))
+    for provider_model, usage in summary["providers"].items():
+        provider, _, model = provider_model.partition("/")
+        labels = (workflow, ("provider", provider), ("model", model))
+        samples.append(("llm_calls_total", labels, usage["calls"]))
+        samples.append(("llm_call_seconds_total", labels, usage["seconds"]))
+        for kind in TOKEN_KINDS:
+            samples.append(
+                ("llm_tokens_total", labels + (("kind", kind),), usage[f"{kind}_tokens"])
+            )
+    for agent, usage in summary["agents"].items():
+        for kind in TOKEN_KINDS:
+            samples.append((
+                "agent_tokens_total",
+                (workflow, ("agent", agent), ("kind", kind)),
+                usage[f"{kind}_tokens"],
+            ))
+    return samples
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+    rendered = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+    return f"{METRIC_PREFIX}_{name}{{{rendered}}}"
+
+
+SERIES_LINE = re.compile(r"^(?P<series>\S+\{.*\}|\S+) (?P<value>\S+)$")
+
+
+def update_prometheus_textfile(path: str, samples: List[Sample]) -> None:
+    """Add ``samples`` to the counters already in ``path`` and rewrite it atomically."""
+    with _locked(path):
+        counters: Dict[str, float] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as input_file:
+                for line in input_file:
+                    match = SERIES_LINE.match(line.strip())
+                    if match and not line.startswith("#"):
+                        counters[match.group("series")] = float(match.group("value"))
+        except FileNotFoundError:
+            pass
+        for name, labels, value in samples:
+            series = _series(name, labels)
+            counters[series] = counters.get(series, 0.0) + value
+
+        lines = []
+        for name, help_text in METRIC_HELP.items():
+            family = f"{METRIC_PREFIX}_{name}"
+            family_series = sorted(s for s in counters if s.split("{", 1)[0] == family)
+            if not family_series:
+                continue
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} counter")
+            lines.extend(f"{series} {counters[series]!r}" for series in family_series)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as output_file:
+            output_file.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Serialise writers of ``path`` across processes with a sidecar lock file."""
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,202 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+from crew import main
+from crew.batch import item_key, load_checkpoint, parse_batch, run_batch
+from crew.llm_config import LLMConfigSnapshot
+from crew.test_support import without_metrics_sinks
+
+
+def read_lines(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+class ParseBatchTest(unittest.TestCase):
+    def test_json_array_and_jsonl_are_accepted(self):
+        items = [{"topic": "a", "workflow_id": "w"}, {"topic": "b", "workflow_id": "w"}]
+
+        self.assertEqual(parse_batch(json.dumps(items)), items)
+        self.assertEqual(
+            parse_batch("\n".join(json.dumps(item) for item in items) + "\n\n"), items
+        )
+
+    def test_malformed_or_empty_batches_are_rejected(self):
+        for raw in ("", "[", '{"topic": "a"}\nnot json', "[]"):
+            with self.subTest(raw=raw):
+                with self.assertRaises(ValueError):
+                    parse_batch(raw)
+
+
+class RunBatchTest(unittest.TestCase):
+    def test_items_are_validated_and_failures_isolated(self):
+        out = io.StringIO()
+
+        def runner(topic, workflow_id):
+            if topic == "explode":
+                raise RuntimeError("provider down")
+            return {"title": topic}
+
+        failures = run_batch(
+            [
+                {"topic": "ok", "workflow_id": "allowed", "id": "first"},
+                {"topic": "explode", "workflow_id": "allowed"},
+                {"topic": "ok", "workflow_id": "unknown"},
+                "not an object",
+            ],
+            {"allowed"},
+            out,
+            concurrency=2,
+            runner=runner,
+        )
+
+        records = {record["index"]: record for record in read_lines(out.getvalue())}
+        self.assertEqual(failures, 3)
+        self.assertEqual(records[0]["result"], {"title": "ok"})
+        self.assertEqual(records[0]["id"], "first")
+        self.assertEqual(records[1]["error"], "provider down")
+        self.assertEqual(records[2]["error"], "Unknown workflow_id")
+        self.assertEqual(records[3]["error"], "Request must be a JSON object")
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def runner(topic, workflow_id):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.03)
+            with lock:
+                active["now"] -= 1
+            return {}
+
+        items = [{"topic": str(index), "workflow_id": "w"} for index in range(8)]
+        run_batch(items, {"w"}, io.StringIO(), concurrency=3, runner=runner)
+
+        self.assertEqual(active["peak"], 3)
+
+    def test_checkpoint_skips_items_that_already_succeeded(self):
+        items = [{"topic": topic, "workflow_id": "w"} for topic in ("a", "b", "c")]
+        calls = []
+
+        def flaky(topic, workflow_id):
+            calls.append(topic)
+            if topic == "b":
+                raise RuntimeError("try again")
+            return {"topic": topic}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            checkpoint = os.path.join(temp_dir, "batch.jsonl")
+            self.assertEqual(run_batch(items, {"w"}, io.StringIO(), 1, checkpoint, flaky), 1)
+            self.assertEqual(
+                load_checkpoint(checkpoint), {item_key(0, items[0]), item_key(2, items[2])}
+            )
+
+            calls.clear()
+            out = io.StringIO()
+            self.assertEqual(
+                run_batch(items, {"w"}, out, 1, checkpoint, lambda topic, _: {"topic": topic}),
+                0,
+            )
+            self.assertEqual([record["index"] for record in read_lines(out.getvalue())], [1])
+            self.assertEqual(len(load_checkpoint(checkpoint)), 3)
+
+    def test_invalid_batch_input_exits_before_running_workflows(self):
+        completed = subprocess.run(
+            [sys.executable, "-m", "crew.run_workflow", "--batch"],
+            input="not json",
+            text=True,
+            capture_output=True,
+            check=False,
+        )
+
+        self.assertEqual(completed.returncode, 2)
+        self.assertEqual(completed.stdout, "")
+        self.assertIn("not valid JSON", completed.stderr)
+
+
+WORKFLOW = {"id": "w", "agents": [{"name": "Writer", "role": "作家"}], "tasks": [{"agent": "Writer"}]}
+
+
+class FakeCrew:
+    """Sets step callbacks the way crewai does: only on agents that have none."""
+
+    def __init__(self, agents, tasks, step_callback=None, task_callback=None, **options):
+        for agent in agents:
+            if not agent.step_callback:
+                agent.step_callback = step_callback
+        self.tasks = tasks
+
+    def kickoff(self):
+        for task in self.tasks:
+            task.agent.step_callback("step")
+        return "done"
+
+
+class DefaultRunnerTest(unittest.TestCase):
+    def setUp(self):
+        without_metrics_sinks(self)
+        os.environ.pop("WORKFLOW_RESULT_CACHE_PATH", None)
+        self.built = []
+        self.checked = []
+        self.snapshot = LLMConfigSnapshot(
+            providers={}, workflow_models={"w": {"workflowId": "w", "deadlineSeconds": 60}}
+        )
+        for patch in (
+            mock.patch.object(main, "llm_config_manager", SimpleNamespace(snapshot=lambda: self.snapshot)),
+            mock.patch.object(main, "load_workflow_config", lambda workflow_id: WORKFLOW),
+            mock.patch.object(main, "create_agents", self.create_agents),
+            mock.patch.object(main, "create_tasks", lambda config, agents, topic: [
+                SimpleNamespace(agent=agents["Writer"])
+            ]),
+            mock.patch.object(main, "check_cancelled", self.checked.append),
+            mock.patch.object(main, "parse_result", lambda raw, workflow_id, config: {"raw": raw}),
+            mock.patch("crewai.Crew", FakeCrew),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def create_agents(self, workflow_config, workflow_id, *args):
+        self.built.append(args)
+        return {"Writer": SimpleNamespace(step_callback=None)}
+
+    def test_reused_agents_check_each_runs_own_token_between_steps(self):
+        items = [{"topic": topic, "workflow_id": "w"} for topic in ("a", "b")]
+        out = io.StringIO()
+
+        self.assertEqual(run_batch(items, {"w"}, out, concurrency=1), 0)
+
+        self.assertEqual(len(self.built), 1)
+        # Each run checks its token once on entry and once at the agent's step.
+        first_entry, first_step, second_entry, second_step = self.checked
+        self.assertIsNot(first_entry, second_entry)
+        self.assertIs(first_step, first_entry)
+        self.assertIs(second_step, second_entry)
+
+    def test_agents_are_rebuilt_from_the_runs_snapshot_when_models_change(self):
+        items = [{"topic": topic, "workflow_id": "w"} for topic in ("a", "b", "c")]
+        snapshots = [
+            self.snapshot,
+            LLMConfigSnapshot(providers={}, workflow_models=dict(self.snapshot.workflow_models)),
+            LLMConfigSnapshot(providers={}, workflow_models={"w": {"workflowId": "w", "defaultModel": "k2"}}),
+        ]
+        next_snapshot = iter(snapshots)
+        main.llm_config_manager.snapshot = lambda: next(next_snapshot)
+
+        self.assertEqual(run_batch(items, {"w"}, io.StringIO(), concurrency=1), 0)
+
+        # An equal config reuses the agents; a changed one rebuilds them from it.
+        self.assertEqual(self.built, [(snapshots[0],), (snapshots[2],)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import io
+import time
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+import httpx
+import openai
+from crewai.llms.providers.openai.completion import OpenAICompletion
+
+from crew import main, managed_llm
+from crew.call_budgets import (
+    CallBudget,
+    agent_call_budget,
+    is_retryable,
+    retry_delay,
+    workflow_deadline,
+)
+from crew.cancellation import (
+    CancellationToken,
+    WorkflowCancelled,
+    check_deadline,
+    deadline_remaining,
+    run_deadline,
+)
+from crew.llm_clients import LLMClientRegistry
+from crew.llm_config import LLMConfigSnapshot
+from crew.test_support import isolate_managed_llm
+
+
+KIMI = {"baseURL": "https://api.moonshot.cn/v1", "apiKey": "kimi-key"}
+
+
+def status_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.moonshot.cn/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return openai.APIStatusError(f"status {status}", response=response, body=None)
+
+
+class CallBudgetTest(unittest.TestCase):
+    def test_agent_settings_become_llm_options(self):
+        budget = agent_call_budget(
+            {"agentName": "Writer", "maxTokens": 2000, "timeoutSeconds": 45, "maxRetries": 0}
+        )
+
+        self.assertEqual(budget, CallBudget(max_tokens=2000, timeout=45.0, max_retries=0))
+        self.assertEqual(budget.llm_options(), {"max_tokens": 2000, "timeout": 45.0, "max_retries": 0})
+        self.assertEqual(agent_call_budget({"agentName": "Writer"}).llm_options(), {})
+
+    def test_invalid_settings_are_reported_and_ignored(self):
+        stderr = io.StringIO()
+        with mock.patch("sys.stderr", stderr):
+            budget = agent_call_budget(
+                {"agentName": "Writer", "maxTokens": 1.5, "timeoutSeconds": 0, "maxRetries": True}
+            )
+            deadline = workflow_deadline({"workflowId": "w", "deadlineSeconds": "60"})
+
+        self.assertEqual(budget, CallBudget())
+        self.assertIsNone(deadline)
+        self.assertIn("Ignoring invalid maxTokens 1.5 for agent 'Writer'", stderr.getvalue())
+        self.assertIn("deadlineSeconds", stderr.getvalue())
+
+    def test_workflow_deadline(self):
+        self.assertEqual(workflow_deadline({"workflowId": "w", "deadlineSeconds": 90}), 90.0)
+        self.assertIsNone(workflow_deadline({"workflowId": "w"}))
+        self.assertIsNone(workflow_deadline(None))
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_transient_errors_are_retryable(self):
+        request = httpx.Request("POST", "https://api.moonshot.cn/v1/chat/completions")
+        wrapped = ConnectionError("Failed to connect to OpenAI API")
+        wrapped.__cause__ = openai.APITimeoutError(request=request)
+
+        for error in (wrapped, status_error(429), status_error(503), status_error(408)):
+            with self.subTest(error=error):
+                self.assertTrue(is_retryable(error))
+        for error in (status_error(400), status_error(401), ValueError("bad model"), RuntimeError("x")):
+            with self.subTest(error=error):
+                self.assertFalse(is_retryable(error))
+
+    def test_backoff_doubles_up_to_the_cap_and_honours_retry_after(self):
+        delays = [retry_delay(attempt, jitter=lambda: 0.0) for attempt in range(6)]
+
+        self.assertEqual(delays, [0.5, 1.0, 2.0, 4.0, 8.0, 8.0])
+        self.assertEqual(retry_delay(0, jitter=lambda: 1.0), 0.375)
+        self.assertEqual(retry_delay(0, status_error(429, {"retry-after": "3"}), lambda: 0.0), 3.0)
+        self.assertEqual(retry_delay(0, status_error(429, {"retry-after": "3600"}), lambda: 0.0), 0.5)
+
+
+class RunDeadlineTest(unittest.TestCase):
+    def test_deadline_cancels_the_token_and_is_visible_to_calls(self):
+        self.assertIsNone(deadline_remaining())
+        with run_deadline(None) as token:
+            self.assertIsNone(token)
+
+        with run_deadline(0.05) as token:
+            self.assertIsInstance(token, CancellationToken)
+            self.assertLessEqual(deadline_remaining(), 0.05)
+            check_deadline()
+            time.sleep(0.1)
+            self.assertTrue(token.cancelled)
+            self.assertEqual(token.reason, "Workflow deadline of 0.05s exceeded")
+            with self.assertRaisesRegex(WorkflowCancelled, "deadline of 0.05s"):
+                check_deadline()
+        self.assertIsNone(deadline_remaining())
+
+    def test_callers_token_is_kept(self):
+        token = CancellationToken()
+        with run_deadline(30, token) as deadline_token:
+            self.assertIs(deadline_token, token)
+        self.assertFalse(token.cancelled)
+
+
+class WorkflowBudgetTest(unittest.TestCase):
+    def test_agent_budgets_are_resolved_per_workflow_agent(self):
+        workflow = {"agents": [{"name": "Writer"}, {"name": "Editor"}]}
+        snapshot = LLMConfigSnapshot(providers={}, workflow_models={"w": {"agentConfigs": [
+            {"agentName": "Writer", "providerId": "kimi", "model": "k2", "maxTokens": 3000},
+        ]}})
+
+        self.assertEqual(
+            main.resolve_agent_budgets(workflow, "w", snapshot),
+            {"Writer": CallBudget(max_tokens=3000), "Editor": CallBudget()},
+        )
+
+    def test_runs_get_a_token_cancelled_at_the_workflow_deadline(self):
+        tokens = []
+        configs = []
+
+        @main.with_workflow_deadline
+        def run(topic, workflow_id, cancel_token=None, llm_config=None):
+            tokens.append(cancel_token)
+            configs.append(llm_config)
+            time.sleep(0.1)
+            return cancel_token and cancel_token.reason
+
+        snapshot = LLMConfigSnapshot(
+            providers={}, workflow_models={"slow": {"workflowId": "slow", "deadlineSeconds": 0.05}}
+        )
+        manager = SimpleNamespace(snapshot=lambda: snapshot)
+        with mock.patch.object(main, "llm_config_manager", manager):
+            self.assertEqual(run("topic", "slow"), "Workflow deadline of 0.05s exceeded")
+            self.assertEqual(run("topic", "other"), None)
+
+        self.assertIsNone(tokens[1])
+        # The snapshot the deadline came from is the one the run uses.
+        self.assertEqual(configs, [snapshot, snapshot])
+
+
+class ManagedRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        isolate_managed_llm(self, self.events)
+        retry_delay_patch = mock.patch.object(managed_llm, "retry_delay", lambda attempt, error: 0.01)
+        retry_delay_patch.start()
+        self.addCleanup(retry_delay_patch.stop)
+
+    def agent_llm(self, **options):
+        return LLMClientRegistry().crew_llm("kimi", KIMI, "kimi-latest", **options)
+
+    def test_budget_reaches_the_client_and_sdk_retries_are_off(self):
+        llm = self.agent_llm(max_tokens=800, timeout=30.0, max_retries=4)
+
+        self.assertEqual((llm.max_tokens, llm.timeout, llm.max_retries), (800, 30.0, 4))
+        self.assertEqual(llm._get_client_params()["max_retries"], 0)
+        self.assertEqual(llm._get_sync_client().timeout, 30.0)
+        with run_deadline(5):
+            self.assertLessEqual(llm._get_sync_client().timeout, 5)
+
+    def test_transient_failures_are_retried_up_to_max_retries(self):
+        attempts = []
+
+        def provider_call(self, messages, *args):
+            attempts.append(messages)
+            if len(attempts) < 3:
+                raise status_error(503)
+            return "done"
+
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call):
+            self.assertEqual(self.agent_llm(max_retries=2).call("hi"), "done")
+            attempts.clear()
+            with self.assertRaises(openai.APIStatusError):
+                self.agent_llm(max_retries=1).call("hi")
+
+        self.assertEqual(len(attempts), 2)
+        self.assertIn("kimi/kimi-latest 调用失败，0.0 秒后重试（1/2）", self.events[0]["message"])
+
+    def test_permanent_failures_are_not_retried(self):
+        attempts = []
+
+        def provider_call(self, messages, *args):
+            attempts.append(messages)
+            raise status_error(401)
+
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call):
+            with self.assertRaises(openai.APIStatusError):
+                self.agent_llm(max_retries=3).call("hi")
+
+        self.assertEqual(len(attempts), 1)
+
+    def test_a_call_cut_off_by_the_deadline_cancels_the_run(self):
+        def provider_call(self, messages, *args):
+            time.sleep(0.1)
+            raise status_error(503)
+
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call), \
+                run_deadline(0.05):
+            with self.assertRaisesRegex(WorkflowCancelled, "deadline"):
+                self.agent_llm(max_retries=5).call("hi")
+
+        self.assertEqual(self.events, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+from crew.file_cache import StatCache
+from crew.llm_config import LLMConfigManager
+
+
+def write_json(path, value):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as config_file:
+        json.dump(value, config_file)
+    os.replace(temp_path, path)
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as config_file:
+        return json.load(config_file)
+
+
+class StatCacheTest(unittest.TestCase):
+    def test_file_is_parsed_once_until_its_stat_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "config.json")
+            write_json(path, {"value": 1})
+            cache = StatCache(path, read_json, dict)
+
+            self.assertEqual(cache.get(), {"value": 1})
+            self.assertIs(cache.get(), cache.get())
+            self.assertEqual(cache.loads, 1)
+
+            write_json(path, {"value": 2, "extra": True})
+            self.assertEqual(cache.get(), {"value": 2, "extra": True})
+            self.assertEqual(cache.loads, 2)
+
+            os.unlink(path)
+            self.assertEqual(cache.get(), {})
+
+    def test_loader_errors_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "config.json")
+            with open(path, "w", encoding="utf-8") as config_file:
+                config_file.write("{")
+            cache = StatCache(path, read_json, dict)
+
+            with self.assertRaises(json.JSONDecodeError):
+                cache.get()
+            write_json(path, {"value": 3})
+            self.assertEqual(cache.get(), {"value": 3})
+
+
+class LLMConfigSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.providers_path = os.path.join(self.temp_dir.name, "llm-providers.json")
+        self.models_path = os.path.join(self.temp_dir.name, "workflow-models.json")
+        write_json(self.providers_path, [
+            {"id": "kimi", "type": "kimi", "baseURL": "https://kimi.invalid/v1",
+             "apiKey": "k", "defaultModel": "kimi-latest"},
+        ])
+        write_json(self.models_path, [
+            {"workflowId": "demo", "defaultProviderId": "kimi", "agentConfigs": []},
+        ])
+        self.manager = LLMConfigManager(self.providers_path, self.models_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_snapshot_is_reused_and_read_only(self):
+        first = self.manager.snapshot()
+        second = self.manager.snapshot()
+
+        self.assertIs(first.providers, second.providers)
+        self.assertIs(first.workflow_models, second.workflow_models)
+        with self.assertRaises(TypeError):
+            first.providers["other"] = {}
+        with self.assertRaises(TypeError):
+            first.providers["kimi"]["apiKey"] = "leaked"
+        with self.assertRaises(TypeError):
+            first.workflow_models["demo"]["agentConfigs"] += ({},)
+        self.assertEqual(first.workflow_models["demo"]["agentConfigs"], ())
+
+    def test_nested_entries_copy_into_plain_dicts_and_serialize(self):
+        provider = copy.deepcopy(self.manager.snapshot().providers["kimi"])
+
+        provider["apiKey"] = "other"
+        self.assertIs(type(provider), dict)
+        self.assertEqual(self.manager.snapshot().providers["kimi"]["apiKey"], "k")
+        self.assertIn('"workflowId": "demo"', json.dumps(self.manager.snapshot().workflow_models["demo"]))
+
+    def test_missing_workflow_models_are_an_empty_read_only_mapping(self):
+        manager = LLMConfigManager(
+            self.providers_path, os.path.join(self.temp_dir.name, "missing.json")
+        )
+
+        with self.assertRaises(TypeError):
+            manager.snapshot().workflow_models["demo"] = {}
+        self.assertEqual(dict(manager.snapshot().workflow_models), {})
+
+    def test_hot_reload_produces_a_new_snapshot_without_changing_old_ones(self):
+        before = self.manager.snapshot()
+        write_json(self.models_path, [
+            {"workflowId": "demo", "defaultProviderId": "kimi", "agentConfigs": []},
+            {"workflowId": "other", "defaultProviderId": "kimi", "agentConfigs": []},
+        ])
+        after = self.manager.snapshot()
+
+        self.assertEqual(set(before.workflow_models), {"demo"})
+        self.assertEqual(set(after.workflow_models), {"demo", "other"})
+        self.assertIs(before.providers, after.providers)
+
+
+if __name__ == "__main__":
+    unittest.main()
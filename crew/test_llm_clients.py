@@ -0,0 +1,53 @@
+import unittest
+
+from crew.llm_clients import LLMClientRegistry, credential_fingerprint
+from crew.test_support import FakeClock
+
+
+PROVIDER = {"baseURL": "https://kimi.invalid/v1", "apiKey": "kimi-key"}
+
+
+class LLMClientRegistryTest(unittest.TestCase):
+    def test_same_provider_model_and_temperature_reuse_one_client(self):
+        registry = LLMClientRegistry()
+        first = registry.crew_llm("kimi", PROVIDER, "kimi-latest", temperature=0.7)
+        second = registry.crew_llm("kimi", dict(PROVIDER), "kimi-latest", temperature=0.7)
+
+        self.assertIs(first, second)
+        self.assertEqual((registry.hits, registry.misses), (1, 1))
+        self.assertIsNot(first, registry.crew_llm("kimi", PROVIDER, "kimi-latest", temperature=0.2))
+        self.assertIsNot(
+            first,
+            registry.crew_llm("kimi", dict(PROVIDER, apiKey="other-key"), "kimi-latest"),
+        )
+
+    def test_http_clients_are_shared_per_endpoint_and_credential(self):
+        registry = LLMClientRegistry()
+        sync_client, async_client = registry.http_clients("https://a.invalid/v1", "key")
+
+        self.assertIs(registry.http_clients("https://a.invalid/v1", "key")[0], sync_client)
+        self.assertIsNot(registry.http_clients("https://b.invalid/v1", "key")[1], async_client)
+
+    def test_idle_and_least_recently_used_entries_are_evicted(self):
+        clock = FakeClock()
+        registry = LLMClientRegistry(idle_ttl=10, max_entries=2, clock=clock)
+        registry.get_or_create("a", object)
+        clock.now = 5
+        registry.get_or_create("b", object)
+        registry.get_or_create("c", object)
+        self.assertEqual(len(registry), 2)
+
+        clock.now = 20
+        registry.get_or_create("c", object)
+        self.assertEqual(len(registry), 1)
+
+    def test_credentials_are_fingerprinted(self):
+        fingerprint = credential_fingerprint("kimi-key")
+
+        self.assertNotIn("kimi-key", fingerprint)
+        self.assertEqual(fingerprint, credential_fingerprint("kimi-key"))
+        self.assertNotEqual(fingerprint, credential_fingerprint("kimi-key-2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
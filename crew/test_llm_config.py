@@ -1,7 +1,15 @@
 """
 Test LLM Configuration Manager
 """
-from crew.llm_config import llm_config_manager
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from crew.llm_config import LLMConfigManager, llm_config_manager
 
 def test_llm_config():
     print("🧪 Testing LLM Configuration Manager\n")
@@ -53,6 +61,112 @@ def test_llm_config():
     
     print("✅ All tests completed!")
 
+class LLMConstructionThreadSafetyTest(unittest.TestCase):
+    PROVIDERS = [
+        {"id": "alpha", "type": "custom", "baseURL": "https://alpha.invalid/v1",
+         "apiKey": "alpha-key", "defaultModel": "alpha-model"},
+        {"id": "beta", "type": "custom", "baseURL": "https://beta.invalid/v1",
+         "apiKey": "beta-key", "defaultModel": "beta-model"},
+        {"id": "gamma", "type": "custom", "baseURL": "https://gamma.invalid/v1",
+         "apiKey": "gamma-key", "defaultModel": "gamma-model"},
+    ]
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        providers_path = os.path.join(self.temp_dir.name, "llm-providers.json")
+        models_path = os.path.join(self.temp_dir.name, "workflow-models.json")
+        with open(providers_path, "w", encoding="utf-8") as f:
+            json.dump(self.PROVIDERS, f)
+        with open(models_path, "w", encoding="utf-8") as f:
+            json.dump([
+                {
+                    "workflowId": "demo",
+                    "defaultProviderId": "alpha",
+                    "agentConfigs": [
+                        {"agentName": p["id"], "providerId": p["id"], "model": p["defaultModel"]}
+                        for p in self.PROVIDERS
+                    ],
+                }
+            ], f)
+        self.manager = LLMConfigManager(providers_path, models_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parallel_construction_never_cross_wires_credentials(self):
+        decoy_env = {
+            "OPENAI_API_BASE": "https://decoy.invalid/v1",
+            "OPENAI_BASE_URL": "https://decoy.invalid/v1",
+            "OPENAI_API_KEY": "decoy-key",
+        }
+        rounds = 40
+        barrier = threading.Barrier(len(self.PROVIDERS) * 3)
+
+        def build(agent_name):
+            barrier.wait()
+            results = []
+            for _ in range(rounds):
+                llm = self.manager.get_llm_for_agent("demo", agent_name)
+                results.append((
+                    agent_name,
+                    llm.openai_api_key.get_secret_value(),
+                    llm.openai_api_base,
+                    str(llm.root_client.base_url).rstrip("/"),
+                    llm.model_name,
+                ))
+            return results
+
+        with mock.patch.dict(os.environ, decoy_env):
+            environ_before = dict(os.environ)
+            agent_names = [p["id"] for p in self.PROVIDERS] * 3
+            with ThreadPoolExecutor(max_workers=len(agent_names)) as executor:
+                batches = list(executor.map(build, agent_names))
+            self.assertEqual(dict(os.environ), environ_before)
+
+        expected = {
+            p["id"]: (f"{p['id']}-key", p["baseURL"], p["baseURL"], p["defaultModel"])
+            for p in self.PROVIDERS
+        }
+        for batch in batches:
+            self.assertEqual(len(batch), rounds)
+            for agent_name, *observed in batch:
+                self.assertEqual(tuple(observed), expected[agent_name])
+
+    def test_construction_does_not_touch_os_environ(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.manager.get_llm_for_agent("demo", "beta")
+            self.manager.get_default_llm()
+            self.assertNotIn("OPENAI_API_KEY", os.environ)
+            self.assertNotIn("OPENAI_API_BASE", os.environ)
+            self.assertNotIn("OPENAI_BASE_URL", os.environ)
+
+
+class AgentCallBudgetTest(unittest.TestCase):
+    def test_agent_budget_overrides_the_default_max_tokens(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            providers_path = os.path.join(temp_dir, "llm-providers.json")
+            models_path = os.path.join(temp_dir, "workflow-models.json")
+            with open(providers_path, "w", encoding="utf-8") as f:
+                json.dump(LLMConstructionThreadSafetyTest.PROVIDERS[:1], f)
+            with open(models_path, "w", encoding="utf-8") as f:
+                json.dump([{
+                    "workflowId": "demo",
+                    "defaultProviderId": "alpha",
+                    "agentConfigs": [{
+                        "agentName": "writer", "providerId": "alpha", "model": "alpha-model",
+                        "maxTokens": 1200, "timeoutSeconds": 20, "maxRetries": 5,
+                    }],
+                }], f)
+            manager = LLMConfigManager(providers_path, models_path)
+
+            llm = manager.get_llm_for_agent("demo", "writer")
+            other = manager.get_llm_for_agent("demo", "reviewer")
+
+        self.assertEqual((llm.max_tokens, llm.request_timeout, llm.max_retries), (1200, 20.0, 5))
+        self.assertEqual(other.max_tokens, 4000)
+
+
 if __name__ == '__main__':
     test_llm_config()
+    unittest.main()
 
@@ -0,0 +1,106 @@
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from crewai.llms.providers.openai.completion import OpenAICompletion
+
+from crew.llm_clients import LLMClientRegistry
+from crew.llm_memo import llm_memo_disabled, memo_key
+from crew.managed_llm import ManagedOpenAICompletion
+from crew.test_support import isolate_managed_llm
+
+
+PROVIDER = {"id": "kimi", "baseURL": "https://api.moonshot.cn/v1", "apiKey": "test-key"}
+MESSAGES = [{"role": "system", "content": "你是编辑"}, {"role": "user", "content": "写标题"}]
+
+
+class MemoKeyTest(unittest.TestCase):
+    def test_every_request_component_is_part_of_the_key(self):
+        base = ("https://a/v1", "m", 0.7, None, ["Observation:"], MESSAGES)
+        key = memo_key(*base)
+
+        self.assertEqual(key, memo_key(*base))
+        for position, changed in (
+            (0, "https://b/v1"),
+            (1, "other-model"),
+            (2, 0.2),
+            (3, 512),
+            (4, []),
+            (5, MESSAGES[:1]),
+        ):
+            with self.subTest(position=position):
+                variant = list(base)
+                variant[position] = changed
+                self.assertNotEqual(key, memo_key(*variant))
+
+    def test_string_prompts_match_the_equivalent_user_message(self):
+        self.assertEqual(
+            memo_key(None, "m", 0.7, None, [], "hi"),
+            memo_key(None, "m", 0.7, None, [], [{"role": "user", "content": "hi"}]),
+        )
+
+
+class MemoizedCompletionTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.memo_dir = os.path.join(temp_dir.name, "memo")
+        environment = mock.patch.dict(
+            os.environ, {"LLM_MEMO_ENABLED": "1", "LLM_MEMO_DIR": self.memo_dir}
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+        isolate_managed_llm(self, [], memo=True)
+        self.llm = LLMClientRegistry().crew_llm("kimi", PROVIDER, "kimi-latest")
+        self.provider_call = mock.patch.object(
+            OpenAICompletion, "call", side_effect=lambda *args, **kwargs: "标题一"
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_registry_builds_memoizing_clients(self):
+        self.assertIsInstance(self.llm, ManagedOpenAICompletion)
+
+    def test_identical_calls_are_replayed(self):
+        self.assertEqual(self.llm.call(MESSAGES), "标题一")
+        self.assertEqual(self.llm.call(MESSAGES), "标题一")
+        self.assertEqual(self.provider_call.call_count, 1)
+
+        self.llm.call(MESSAGES + [{"role": "user", "content": "再来"}])
+        self.assertEqual(self.provider_call.call_count, 2)
+
+    def test_failed_calls_are_not_stored(self):
+        self.provider_call.side_effect = RuntimeError("provider timeout")
+        with self.assertRaises(RuntimeError):
+            self.llm.call(MESSAGES)
+
+        self.provider_call.side_effect = lambda *args, **kwargs: "标题二"
+        self.assertEqual(self.llm.call(MESSAGES), "标题二")
+        self.assertEqual(self.provider_call.call_count, 2)
+
+    def test_store_is_private(self):
+        self.llm.call(MESSAGES)
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.memo_dir).st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.join(self.memo_dir, "memo.sqlite3")).st_mode), 0o600)
+
+    def test_memo_is_opt_in_and_can_be_disabled_per_run(self):
+        self.llm.call(MESSAGES)
+        with llm_memo_disabled():
+            self.llm.call(MESSAGES)
+        with mock.patch.dict(os.environ, {"LLM_MEMO_ENABLED": ""}):
+            self.llm.call(MESSAGES)
+
+        self.assertEqual(self.provider_call.call_count, 3)
+
+    def test_tool_calls_are_never_memoized(self):
+        tools = [{"type": "function", "function": {"name": "search"}}]
+        self.llm.call(MESSAGES, tools=tools)
+        self.llm.call(MESSAGES, tools=tools)
+
+        self.assertEqual(self.provider_call.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
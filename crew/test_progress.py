@@ -0,0 +1,84 @@
+import json
+import os
+import time
+import unittest
+
+from crew import progress
+from crew.progress import ProgressChannel, ProgressEncoder, progress_sink, send_progress
+from crew.test_support import FakeClock
+
+
+class ProgressChannelTest(unittest.TestCase):
+    def setUp(self):
+        self.read_fd, write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+        self.addCleanup(os.close, self.read_fd)
+        self.addCleanup(os.close, write_fd)
+        self.clock = FakeClock(100.0)
+        self.channel = ProgressChannel(
+            write_fd, flush_interval=0.05, clock=self.clock,
+            encoder=ProgressEncoder(clock=lambda: 1700000000.1234),
+        )
+        self.addCleanup(self.channel.close)
+
+    def frames(self):
+        try:
+            data = os.read(self.read_fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+    def test_frames_carry_version_sequence_and_timestamp(self):
+        self.channel.write({"type": "task", "message": "加载工作流配置..."})
+
+        self.assertEqual(
+            self.frames(),
+            [{"v": 1, "seq": 1, "ts": 1700000000.123, "type": "task", "message": "加载工作流配置..."}],
+        )
+
+    def test_bursts_are_buffered_until_the_flush_interval(self):
+        self.channel.write({"type": "stream", "message": "a"})
+        self.channel.write({"type": "stream", "message": "b"})
+        self.channel.write({"type": "stream", "message": "c"})
+        self.assertEqual([frame["message"] for frame in self.frames()], ["a"])
+
+        self.clock.now += 0.1
+        self.channel.write({"type": "stream", "message": "d"})
+        self.assertEqual([frame["message"] for frame in self.frames()], ["b", "c", "d"])
+
+    def test_buffered_frames_are_written_by_the_flush_thread_and_on_close(self):
+        self.channel.write({"type": "stream", "message": "a"})
+        self.channel.write({"type": "stream", "message": "b"})
+        self.frames()
+        time.sleep(0.2)
+        self.assertEqual([frame["message"] for frame in self.frames()], ["b"])
+
+        self.channel.write({"type": "stream", "message": "c"})
+        self.channel.close()
+        self.channel.write({"type": "stream", "message": "after close"})
+        self.assertEqual([frame["message"] for frame in self.frames()], ["c"])
+
+
+class SendProgressTest(unittest.TestCase):
+    def test_context_sink_wins_over_the_channel(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        channel = ProgressChannel(write_fd)
+        self.addCleanup(channel.close)
+        previous, progress._channel = progress._channel, channel
+        self.addCleanup(setattr, progress, "_channel", previous)
+
+        events = []
+        with progress_sink(events.append):
+            send_progress("task", "to the sink", "Writer")
+        send_progress("task", "to the channel")
+        channel.flush()
+
+        self.assertEqual(events, [{"type": "task", "message": "to the sink", "agent": "Writer"}])
+        frame = json.loads(os.read(read_fd, 1 << 16))
+        self.assertEqual((frame["seq"], frame["message"]), (1, "to the channel"))
+
+
+if __name__ == "__main__":
+    unittest.main()
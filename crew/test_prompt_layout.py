@@ -0,0 +1,52 @@
+import unittest
+from types import SimpleNamespace
+
+from crew.main import execute_tasks
+from crew.prompt_layout import (
+    TOPIC_REFERENCE,
+    agent_backstory,
+    prompt_layout,
+    task_description,
+    topic_context,
+)
+from crew.test_support import FakeTask
+
+
+class PromptLayoutTest(unittest.TestCase):
+    def test_inline_layout_substitutes_the_topic(self):
+        self.assertEqual(prompt_layout({}), "inline")
+        self.assertEqual(task_description("分析：{topic}，提取要点", "做饭", "inline"), "分析：做饭，提取要点")
+        self.assertEqual(agent_backstory("请分析：{topic}", "inline"), "请分析：{topic}")
+        self.assertIsNone(topic_context("做饭", "inline"))
+
+    def test_prefix_layout_keeps_prompts_identical_across_topics(self):
+        descriptions = {task_description("分析：{topic}，提取要点", topic, "prefix") for topic in ("做饭", "露营")}
+
+        self.assertEqual(descriptions, {f"分析：{TOPIC_REFERENCE}，提取要点"})
+        self.assertEqual(agent_backstory("请分析：{topic}", "prefix"), f"请分析：{TOPIC_REFERENCE}")
+        self.assertEqual(topic_context("做饭", "prefix"), "主题：做饭")
+
+    def test_unknown_layout_is_rejected(self):
+        with self.assertRaises(ValueError):
+            prompt_layout({"prompt_layout": "suffix"})
+
+
+class PrefixExecutionTest(unittest.TestCase):
+    def test_topic_starts_every_context_ahead_of_earlier_outputs(self):
+        workflow = {"id": "w", "tasks": [{"agent": "Analyst"}, {"agent": "Writer"}]}
+        agents = {name: SimpleNamespace() for name in ("Analyst", "Writer")}
+        tasks = [FakeTask(name, agents[name]) for name in ("Analyst", "Writer")]
+
+        result = execute_tasks(
+            workflow, agents, tasks,
+            lambda output, agent_name: None, lambda output, agent_name: None,
+            context_prefix="主题：做饭",
+        )
+
+        self.assertEqual(result, "Writer output")
+        self.assertEqual(tasks[0].contexts, ["主题：做饭"])
+        self.assertEqual(tasks[1].contexts, ["主题：做饭\n\nAnalyst output"])
+
+
+if __name__ == "__main__":
+    unittest.main()
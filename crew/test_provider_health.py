@@ -0,0 +1,239 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+import unittest
+import uuid
+from unittest import mock
+
+from crewai.llms.base_llm import call_stop_override
+from crewai.llms.providers.openai.completion import OpenAICompletion
+
+from crew import managed_llm
+from crew.llm_clients import LLMClientRegistry
+from crew.llm_config import LLMConfigSnapshot
+from crew.provider_health import ProviderHealth, percentile
+from crew.rate_limiter import RateLimiter
+from crew.test_support import FakeClock, isolate_managed_llm
+from crew.token_stream import StreamingCallbackHandler, stream_tokens
+
+
+KIMI = {"baseURL": "https://api.moonshot.cn/v1", "apiKey": "kimi-key"}
+TUZI = {"baseURL": "https://api.tu-zi.com/v1", "apiKey": "tuzi-key"}
+
+
+class ProviderHealthTest(unittest.TestCase):
+    def test_stats_cover_recent_calls_only(self):
+        clock = FakeClock(100.0)
+        health = ProviderHealth(max_age=60, clock=clock)
+        for latency in (1.0, 2.0, 3.0, 4.0):
+            health.record(("kimi", "k2"), latency, True)
+        health.record(("kimi", "k2"), 9.0, False)
+
+        stats = health.stats(("kimi", "k2"))
+        self.assertEqual(stats["calls"], 5)
+        self.assertAlmostEqual(stats["error_rate"], 0.2)
+        self.assertEqual((stats["p50"], stats["p95"]), (2.0, 4.0))
+        self.assertEqual(health.hedge_delay(("kimi", "k2")), 4.0)
+
+        clock.now += 61
+        self.assertEqual(health.stats(("kimi", "k2"))["calls"], 0)
+        self.assertIsNone(health.hedge_delay(("kimi", "k2")))
+
+    def test_samples_are_shared_between_processes_through_the_state_dir(self):
+        clock = FakeClock(100.0)
+        with tempfile.TemporaryDirectory() as state_dir:
+            # Each spawned run makes one call; together they enable hedging.
+            for latency in (1.0, 2.0, 3.0, 4.0):
+                ProviderHealth(clock=clock, state_dir=state_dir).record(("kimi", "k2"), latency, True)
+            health = ProviderHealth(window=3, max_age=60, clock=clock, state_dir=state_dir)
+
+            self.assertEqual(health.stats(("kimi", "k2"))["calls"], 4)
+            self.assertEqual(health.hedge_delay(("kimi", "k2")), 4.0)
+            self.assertIsNone(health.hedge_delay(("tuzi", "claude")))
+
+            health.record(("kimi", "k2"), 5.0, False)
+            self.assertEqual(health.stats(("kimi", "k2"))["calls"], 3)
+            clock.now += 61
+            self.assertEqual(health.stats(("kimi", "k2"))["calls"], 0)
+            health.clear()
+            self.assertEqual(os.listdir(state_dir), [])
+
+    def test_unhealthy_candidates_are_tried_last(self):
+        health = ProviderHealth()
+        for _ in range(4):
+            health.record("kimi", 1.0, False)
+        health.record("tuzi", 1.0, False)
+
+        self.assertEqual(health.order(["kimi", "tuzi", "glm"], key=str), ["tuzi", "glm", "kimi"])
+
+    def test_percentile_uses_nearest_rank(self):
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([5.0], 0.95), 5.0)
+        self.assertEqual(percentile([float(value) for value in range(1, 21)], 0.95), 19.0)
+
+
+class FailoverTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.health = isolate_managed_llm(self, self.events)
+
+    def agent_llm(self, hedge=False):
+        return LLMClientRegistry().crew_llm(
+            "kimi", KIMI, "kimi-latest", fallbacks=[("tuzi", TUZI, "claude")], hedge=hedge
+        )
+
+    def test_failed_call_moves_to_the_next_provider_with_the_same_stop_words(self):
+        seen_stop = {}
+
+        def provider_call(self, messages, *args):
+            seen_stop[self.provider_id] = self.stop_sequences
+            if self.provider_id == "kimi":
+                raise RuntimeError("upstream 502")
+            return "from tuzi"
+
+        llm = self.agent_llm()
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call), \
+                call_stop_override(llm, ["\nObservation:"]):
+            self.assertEqual(llm.call("hi"), "from tuzi")
+
+        self.assertEqual(seen_stop["tuzi"], ["\nObservation:"])
+        self.assertEqual(self.health.stats(("kimi", "kimi-latest"))["error_rate"], 1.0)
+        self.assertEqual(self.health.stats(("tuzi", "claude"))["calls"], 1)
+        self.assertIn("kimi/kimi-latest 调用失败，切换到 tuzi/claude", self.events[0]["message"])
+
+    def test_last_error_is_raised_when_every_provider_fails(self):
+        def provider_call(self, messages, *args):
+            raise RuntimeError(f"{self.provider_id} down")
+
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call):
+            with self.assertRaisesRegex(RuntimeError, "tuzi down"):
+                self.agent_llm().call("hi")
+
+    def test_slow_primary_is_hedged_after_its_p95(self):
+        for _ in range(4):
+            self.health.record(("kimi", "kimi-latest"), 0.05, True)
+        release_primary = threading.Event()
+        self.addCleanup(release_primary.set)
+
+        def provider_call(self, messages, *args):
+            if self.provider_id == "kimi":
+                release_primary.wait(5)
+                return "from kimi"
+            return "from tuzi"
+
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call):
+            self.assertEqual(self.agent_llm(hedge=True).call("hi"), "from tuzi")
+            # The slower side still finishes in the background and is sampled.
+            release_primary.set()
+            deadline = time.monotonic() + 5
+            while self.health.stats(("kimi", "kimi-latest"))["calls"] < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertIn("同时请求 tuzi/claude", self.events[0]["message"])
+        self.assertEqual(self.health.stats(("kimi", "kimi-latest"))["calls"], 5)
+
+    def test_the_losing_side_is_cancelled_and_releases_its_lease_at_once(self):
+        for _ in range(4):
+            self.health.record(("kimi", "kimi-latest"), 0.05, True)
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        limiter = RateLimiter(state_dir.name)
+        winner_picked = threading.Event()
+        self.addCleanup(winner_picked.set)
+        primary_streaming = threading.Event()
+        primary_stopped = threading.Event()
+        primary_errors = []
+        provider_calls = []
+
+        def provider_call(self, messages, *args):
+            provider_calls.append(self.provider_id)
+            if self.provider_id == "tuzi":
+                primary_streaming.wait(5)
+                return "from tuzi"
+            self._emit_stream_chunk_event(chunk="kimi 1")
+            primary_streaming.set()
+            winner_picked.wait(5)
+            try:
+                self._emit_stream_chunk_event(chunk="kimi 2")
+            except Exception as error:
+                primary_errors.append(error)
+                raise
+            finally:
+                primary_stopped.set()
+            return "from kimi"
+
+        streamed = []
+        handler = StreamingCallbackHandler(
+            "Writer", max_delay=60, send=lambda kind, message, agent: streamed.append((kind, message))
+        )
+        agent = SimpleNamespace(role="作家", id=uuid.uuid4())
+        kimi = {**KIMI, "rateLimits": {"maxConcurrent": 1}}
+        llm = LLMClientRegistry().crew_llm(
+            "kimi", kimi, "kimi-latest", fallbacks=[("tuzi", TUZI, "claude")], hedge=True
+        )
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call), \
+                mock.patch.object(managed_llm, "rate_limiter", limiter), \
+                stream_tokens({agent.id: handler}):
+            self.assertEqual(llm.call("hi", from_agent=agent), "from tuzi")
+            # The primary is still blocked in its request, yet its slot is free.
+            with open(os.path.join(state_dir.name, "kimi.json"), encoding="utf-8") as state:
+                self.assertEqual(json.load(state)["in_flight"], {})
+            winner_picked.set()
+            self.assertTrue(primary_stopped.wait(5))
+            # Let the cancelled side unwind past its health bookkeeping.
+            time.sleep(0.1)
+
+        self.assertIsInstance(primary_errors[0], managed_llm.HedgeCancelled)
+        self.assertEqual([message for kind, message in streamed if kind == "stream"], ["kimi 1"])
+        self.assertEqual(sorted(provider_calls), ["kimi", "tuzi"])
+        self.assertEqual(self.health.stats(("kimi", "kimi-latest"))["error_rate"], 0.0)
+
+
+class ResolveAgentFallbacksTest(unittest.TestCase):
+    def test_fallbacks_are_resolved_and_locked_like_primary_models(self):
+        from crew.main import resolve_agent_fallbacks
+
+        snapshot = LLMConfigSnapshot(
+            providers={
+                "kimi": dict(KIMI, defaultModel="kimi-latest"),
+                "deepseek": {
+                    "type": "deepseek",
+                    "baseURL": "https://proxy.invalid/v1",
+                    "apiKey": "deepseek-key",
+                },
+            },
+            workflow_models={
+                "example": {
+                    "workflowId": "example",
+                    "agentConfigs": [
+                        {
+                            "agentName": "Writer",
+                            "providerId": "kimi",
+                            "model": "kimi-latest",
+                            "fallbacks": [
+                                {"providerId": "missing", "model": "x"},
+                                {"providerId": "deepseek", "model": "deepseek-v4-pro"},
+                            ],
+                            "hedge": True,
+                        }
+                    ],
+                }
+            },
+        )
+        workflow_config = {"agents": [{"name": "Writer"}, {"name": "Editor"}]}
+
+        with mock.patch("sys.stderr"):
+            resolved = resolve_agent_fallbacks(workflow_config, "example", snapshot)
+
+        (provider_id, provider, model), = resolved["Writer"][0]
+        self.assertEqual((provider_id, model), ("deepseek", "deepseek-v4-flash"))
+        self.assertEqual(provider["baseURL"], "https://api.deepseek.com/v1")
+        self.assertTrue(resolved["Writer"][1])
+        self.assertEqual(resolved["Editor"], ([], False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from crew.rate_limiter import (
+    ProviderLimits,
+    RateLimiter,
+    RateLimitTimeout,
+    estimate_tokens,
+    provider_limits,
+)
+from crew.test_support import FakeClock, isolate_managed_llm
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.state_dir = temp_dir.name
+        self.clock = FakeClock(1000.0)
+
+    def limiter(self, max_wait=300):
+        return RateLimiter(self.state_dir, max_wait, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_limits_are_read_from_the_provider_config(self):
+        limits = provider_limits(
+            {"rateLimits": {"maxConcurrent": 2, "requestsPerMinute": 60, "tokensPerMinute": 0}}
+        )
+
+        self.assertEqual(limits, ProviderLimits(2, 60, None))
+        self.assertFalse(provider_limits({"defaultModel": "m"}).enabled)
+        self.assertFalse(provider_limits({"rateLimits": {"maxConcurrent": "4"}}).enabled)
+
+    def test_cjk_text_counts_at_least_one_token_per_character(self):
+        self.assertEqual(estimate_tokens("露营装备怎么选？"), 8)
+        self.assertEqual(estimate_tokens("camping gear"), 4)
+        self.assertEqual(estimate_tokens("选 gear"), 1 + 2)
+        # Messages are measured as JSON, which keeps CJK text unescaped.
+        self.assertGreaterEqual(estimate_tokens([{"role": "user", "content": "你好" * 50}]), 100)
+
+    def test_requests_per_minute_delays_the_burst_overflow(self):
+        limiter = self.limiter()
+        limits = ProviderLimits(requests_per_minute=2)
+
+        waits = []
+        for _ in range(3):
+            lease = limiter.acquire("kimi", limits)
+            waits.append(lease.waited)
+            limiter.release(lease, limits)
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 30.0)
+
+    def test_tokens_are_reconciled_with_reported_usage(self):
+        limiter = self.limiter()
+        limits = ProviderLimits(tokens_per_minute=600)
+
+        lease = limiter.acquire("kimi", limits, estimated_tokens=100)
+        lease.actual_tokens = 500
+        limiter.release(lease, limits)
+
+        # 100 tokens left; the next 300-token prompt waits for 200 more at 10/s.
+        self.assertAlmostEqual(limiter.acquire("kimi", limits, 300).waited, 20.0)
+
+    def test_concurrent_releases_of_one_lease_refund_it_once(self):
+        limiter = self.limiter()
+        limits = ProviderLimits(tokens_per_minute=600)
+        lease = limiter.acquire("kimi", limits, estimated_tokens=100)
+        lease.actual_tokens = 400
+        start = threading.Barrier(8)
+
+        def release():
+            start.wait()
+            limiter.release(lease, limits)
+
+        threads = [threading.Thread(target=release) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(os.path.join(self.state_dir, "kimi.json"), encoding="utf-8") as state:
+            self.assertAlmostEqual(json.load(state)["tokens"], 600 - 400)
+        self.assertTrue(lease.released)
+        self.assertFalse(lease.claim_release())
+
+    def test_in_flight_limit_is_shared_through_the_state_directory(self):
+        limits = ProviderLimits(max_in_flight=1)
+        first = self.limiter().acquire("deepseek", limits)
+
+        with self.assertRaises(RateLimitTimeout):
+            self.limiter(max_wait=1).acquire("deepseek", limits)
+
+        self.limiter().release(first, limits)
+        self.assertEqual(self.limiter().acquire("deepseek", limits).waited, 0.0)
+
+    def test_leases_of_dead_processes_are_reclaimed(self):
+        finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                                  capture_output=True, text=True, check=True)
+        dead_pid = int(finished.stdout)
+        with open(os.path.join(self.state_dir, "tuzi.json"), "w", encoding="utf-8") as state:
+            json.dump({"in_flight": {"leaked": [dead_pid, self.clock.now]}}, state)
+
+        lease = self.limiter(max_wait=1).acquire("tuzi", ProviderLimits(max_in_flight=1))
+        self.assertEqual(lease.waited, 0.0)
+
+    def test_provider_ids_cannot_escape_the_state_directory(self):
+        limiter = self.limiter()
+        limiter.acquire("../../escape", ProviderLimits(max_in_flight=5))
+
+        self.assertEqual(len(os.listdir(self.state_dir)), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.state_dir, "..", "..", "escape.json")))
+
+
+class ManagedCompletionRateLimitTest(unittest.TestCase):
+    def test_calls_report_waits_and_return_usage(self):
+        from crewai.llms.providers.openai.completion import OpenAICompletion
+
+        from crew import managed_llm
+        from crew.llm_clients import LLMClientRegistry
+
+        events = []
+        isolate_managed_llm(self, events)
+        with tempfile.TemporaryDirectory() as state_dir:
+            clock = FakeClock(1000.0)
+            limiter = RateLimiter(state_dir, clock=clock, sleep=clock.sleep)
+            provider = {
+                "baseURL": "https://api.moonshot.cn/v1",
+                "apiKey": "test-key",
+                "rateLimits": {"requestsPerMinute": 1, "tokensPerMinute": 6000},
+            }
+            llm = LLMClientRegistry().crew_llm("kimi", provider, "kimi-latest")
+
+            def provider_call(self, messages, *args):
+                self._track_token_usage_internal(
+                    {"prompt_tokens": 40, "completion_tokens": 60, "total_tokens": 100}
+                )
+                return "ok"
+
+            with mock.patch.object(managed_llm, "rate_limiter", limiter), \
+                    mock.patch.object(OpenAICompletion, "call", autospec=True,
+                                      side_effect=provider_call):
+                llm.call("hi")
+                llm.call("hi")
+
+            with open(os.path.join(state_dir, "kimi.json"), encoding="utf-8") as state:
+                tokens = json.load(state)["tokens"]
+
+        self.assertEqual(len(events), 1)
+        self.assertIn("kimi 限流排队 60.0 秒", events[0]["message"])
+        # Two calls of 100 reported tokens, with one minute of refill between them.
+        self.assertAlmostEqual(tokens, 6000 - 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from crew.result_cache import ResultCache, result_cache_key
+from crew.test_support import FakeClock
+
+
+WORKFLOW = {"id": "w", "agents": [{"name": "Writer"}], "tasks": [{"agent": "Writer"}]}
+MODELS = {"Writer": ("deepseek", {"baseURL": "https://api.deepseek.com/v1", "apiKey": "k1"}, "m")}
+
+
+class ResultCacheKeyTest(unittest.TestCase):
+    def test_topic_whitespace_and_width_are_normalized(self):
+        self.assertEqual(
+            result_cache_key("  AI   趋势\n", WORKFLOW, MODELS),
+            result_cache_key("ＡＩ 趋势", WORKFLOW, MODELS),
+        )
+
+    def test_config_changes_produce_a_new_key(self):
+        key = result_cache_key("topic", WORKFLOW, MODELS)
+        edited_workflow = dict(WORKFLOW, tasks=[{"agent": "Writer", "description": "new"}])
+        other_model = {"Writer": (MODELS["Writer"][0], MODELS["Writer"][1], "other")}
+
+        self.assertNotEqual(key, result_cache_key("topic", edited_workflow, MODELS))
+        self.assertNotEqual(key, result_cache_key("topic", WORKFLOW, other_model))
+        self.assertNotEqual(key, result_cache_key("other topic", WORKFLOW, MODELS))
+
+    def test_credentials_do_not_affect_the_key(self):
+        rotated = {"Writer": ("deepseek", dict(MODELS["Writer"][1], apiKey="k2"), "m")}
+
+        self.assertEqual(
+            result_cache_key("topic", WORKFLOW, MODELS),
+            result_cache_key("topic", WORKFLOW, rotated),
+        )
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "results.sqlite3")
+        self.clock = FakeClock(1000.0)
+
+    def test_hits_and_misses_are_counted(self):
+        cache = ResultCache(self.path, clock=self.clock)
+
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", {"title": "标题"})
+        self.assertEqual(cache.get("k"), {"title": "标题"})
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = ResultCache(self.path, ttl_seconds=60, clock=self.clock)
+        cache.put("k", {"title": "t"})
+
+        self.clock.now += 61
+        self.assertIsNone(cache.get("k"))
+        cache.put("other", {})
+        self.assertEqual(len(cache), 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(self.path, max_entries=2, clock=self.clock)
+        cache.put("a", {"v": "a"})
+        self.clock.now += 1
+        cache.put("b", {"v": "b"})
+        self.clock.now += 1
+        cache.get("a")
+        self.clock.now += 1
+        cache.put("c", {"v": "c"})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"v": "a"})
+        self.assertEqual(cache.get("c"), {"v": "c"})
+
+    def test_entries_are_shared_between_instances(self):
+        ResultCache(self.path, clock=self.clock).put("k", {"v": 1})
+
+        self.assertEqual(ResultCache(self.path, clock=self.clock).get("k"), {"v": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+
+from crew.result_parsers import (
+    BUILTIN_OUTPUTS,
+    ResultStream,
+    create_parser,
+    output_config,
+    parse_output,
+)
+
+
+WECHAT_OUTPUT = {
+    "parser": "sections",
+    "match": "heading",
+    "default_title": "微信标题方案",
+    "sections": [
+        {"field": "title", "markers": ["推荐标题"], "single_line": True},
+        {"field": "summary", "markers": ["使用建议"]},
+    ],
+}
+
+WECHAT_REPORT = """## 评分排序
+1. 标题甲 9 分
+2. 标题乙 8 分
+
+## ⭐️ 推荐标题
+**标题甲：三个习惯让你效率翻倍**
+
+## 使用建议
+适合周一早上推送。
+配合封面图使用。
+
+## 敏感内容提醒
+无
+"""
+
+
+class SectionParserTest(unittest.TestCase):
+    def test_tech_writer_sections_keep_the_legacy_format(self):
+        raw = "标题: 深入理解协程\n摘要: 协程让异步代码像同步一样好写。\n正文:\n第一段。\n第二段。"
+
+        result = parse_output(raw, output_config("tech_writer"))
+
+        self.assertEqual(result, {
+            "title": "深入理解协程",
+            "summary": "协程让异步代码像同步一样好写。",
+            "article": "第一段。\n第二段。",
+        })
+
+    def test_missing_fields_fall_back_to_the_output(self):
+        raw = "没有任何结构的一段文字" * 30
+
+        result = parse_output(raw, output_config("marketing_writer"))
+
+        self.assertEqual(result["title"], "营销文案")
+        self.assertEqual(result["article"], raw)
+        self.assertEqual(result["summary"], raw[:200] + "...")
+
+    def test_heading_mode_ignores_markers_in_body_lines(self):
+        raw = "## 分析\n请参考使用建议。\n" + WECHAT_REPORT
+
+        result = parse_output(raw, WECHAT_OUTPUT)
+
+        self.assertEqual(result["title"], "标题甲：三个习惯让你效率翻倍")
+        self.assertEqual(result["summary"], "适合周一早上推送。\n配合封面图使用。")
+        self.assertEqual(result["article"], raw.strip())
+
+    def test_fields_complete_while_the_output_streams(self):
+        parser = create_parser(WECHAT_OUTPUT)
+        completed = []
+        for index in range(0, len(WECHAT_REPORT), 7):
+            completed.append(parser.feed(WECHAT_REPORT[index:index + 7]))
+        completed.append(parser.finish())
+
+        fields = [field for chunk in completed for field in chunk]
+        self.assertEqual(fields, ["title", "summary"])
+        # Both are known before the report ends: the next heading closes the summary.
+        self.assertEqual(completed[-1], {})
+        summary_chunk = next(i for i, chunk in enumerate(completed) if "summary" in chunk)
+        self.assertLess(summary_chunk * 7, WECHAT_REPORT.index("无"))
+
+    def test_unknown_parsers_and_fields_are_rejected(self):
+        with self.assertRaises(ValueError):
+            create_parser({"parser": "xml"})
+        with self.assertRaises(ValueError):
+            create_parser({"parser": "sections", "sections": [{"field": "body", "markers": ["x"]}]})
+
+
+class JsonParserTest(unittest.TestCase):
+    OUTPUT = {
+        "parser": "json",
+        "schema": {"properties": {"title": {"type": "string"}, "summary": {"type": "string"}}},
+    }
+
+    def test_string_fields_complete_before_the_object_closes(self):
+        parser = create_parser(self.OUTPUT)
+
+        self.assertEqual(parser.feed('{"title": "标题\\n一"'), {"title": "标题\n一"})
+        self.assertEqual(parser.feed(', "summary": "短'), {})
+        self.assertEqual(parser.feed('摘要"}'), {"summary": "短摘要"})
+
+    def test_result_reads_the_object_inside_surrounding_text(self):
+        raw = '结果如下：\n```json\n{"title": "A", "summary": "B", "extra": 1}\n```'
+
+        result = parse_output(raw, self.OUTPUT)
+
+        self.assertEqual((result["title"], result["summary"]), ("A", "B"))
+        self.assertEqual(result["article"], raw)
+
+
+class ResultStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.stream = ResultStream(WECHAT_OUTPUT, send=self.events.append)
+
+    def run_call(self, text, size=5):
+        self.stream.on_llm_start()
+        for index in range(0, len(text), size):
+            self.stream.on_llm_new_token(text[index:index + size])
+        self.stream.on_llm_end()
+
+    def fields(self):
+        return [(event["field"], event["message"]) for event in self.events]
+
+    def test_only_the_final_answer_of_an_armed_task_is_parsed(self):
+        answer = "Thought: 推荐标题已确定\nFinal Answer: " + WECHAT_REPORT
+        self.run_call(answer)
+        self.assertEqual(self.events, [])
+
+        self.stream.arm()
+        self.run_call("Thought: 先写 ## 推荐标题\n草稿", size=3)
+        self.assertEqual(self.events, [])
+
+        self.run_call(answer, size=3)
+        self.assertEqual(self.fields(), [
+            ("title", "标题甲：三个习惯让你效率翻倍"),
+            ("summary", "适合周一早上推送。\n配合封面图使用。"),
+        ])
+        self.assertTrue(all(event["type"] == "result_field" for event in self.events))
+
+    def test_repeated_calls_send_each_value_once(self):
+        self.stream.arm()
+        answer = "Final Answer: " + WECHAT_REPORT
+        self.run_call(answer)
+        self.run_call(answer)
+
+        self.assertEqual([field for field, _ in self.fields()], ["title", "summary"])
+
+    def test_a_failed_call_is_not_finished_as_a_partial_answer(self):
+        self.stream.arm()
+        self.stream.on_llm_start()
+        self.stream.on_llm_new_token("Final Answer: ## 推荐标题\n**标题甲")
+        self.stream.on_llm_error()
+        self.stream.on_llm_end()
+        self.assertEqual(self.events, [])
+
+        self.run_call("Final Answer: " + WECHAT_REPORT)
+        self.assertEqual(self.fields()[0], ("title", "标题甲：三个习惯让你效率翻倍"))
+
+
+class OutputConfigTest(unittest.TestCase):
+    def test_workflow_output_overrides_the_builtin(self):
+        self.assertIs(output_config("tech_writer", {"output": WECHAT_OUTPUT}), WECHAT_OUTPUT)
+        self.assertIs(output_config("tech_writer", {}), BUILTIN_OUTPUTS["tech_writer"])
+        self.assertEqual(output_config("custom", None), {"parser": "text"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import io
+import os
+import stat
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from crew import run_workflow
+from crew.main import execute_tasks
+from crew.run_checkpoint import RunCheckpoint, new_run_id, purge_expired_runs
+from crew.test_support import FakeTask
+
+
+WORKFLOW = {
+    "id": "w",
+    "tasks": [{"agent": "Analyst"}, {"agent": "Writer"}, {"agent": "Editor"}],
+}
+
+
+class RunCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = temp_dir.name
+        self.run_id = new_run_id()
+
+    def open(self, resume=False, topic="topic", workflow=WORKFLOW, run_id=None):
+        return RunCheckpoint.open(
+            run_id or self.run_id, topic, "w", workflow, resume=resume, root=self.root
+        )
+
+    def test_saved_tasks_are_restored_on_resume(self):
+        checkpoint = self.open()
+        checkpoint.save_task(0, "Analyst", SimpleNamespace(raw="analysis", summary="a"))
+        checkpoint.save_task(1, "Writer", "draft")
+
+        self.assertEqual(self.open(resume=True).completed_outputs(), {0: "analysis", 1: "draft"})
+
+    def test_checkpoints_are_private_and_discarded(self):
+        checkpoint = self.open()
+        checkpoint.save_task(0, "Analyst", "analysis")
+
+        self.assertEqual(stat.S_IMODE(os.stat(checkpoint.run_dir).st_mode), 0o700)
+        for name in os.listdir(checkpoint.run_dir):
+            with self.subTest(name=name):
+                self.assertEqual(stat.S_IMODE(os.stat(os.path.join(checkpoint.run_dir, name)).st_mode), 0o600)
+        checkpoint.discard()
+        self.assertFalse(os.path.exists(checkpoint.run_dir))
+
+    def test_resume_requires_the_same_request_and_workflow(self):
+        self.open()
+        changed_workflow = dict(WORKFLOW, tasks=WORKFLOW["tasks"][:2])
+
+        with self.assertRaisesRegex(ValueError, "different request"):
+            self.open(resume=True, topic="other topic")
+        with self.assertRaisesRegex(ValueError, "different request"):
+            self.open(resume=True, workflow=changed_workflow)
+        with self.assertRaisesRegex(ValueError, "not found"):
+            self.open(resume=True, run_id=new_run_id())
+
+    def test_run_ids_cannot_escape_the_run_directory(self):
+        for run_id in ("../../etc", "ABC", "", new_run_id() + "/x"):
+            with self.subTest(run_id=run_id):
+                with self.assertRaisesRegex(ValueError, "Invalid run id"):
+                    RunCheckpoint.open(run_id, "t", "w", WORKFLOW, resume=True, root=self.root)
+
+    def test_expired_runs_are_purged(self):
+        checkpoint = self.open()
+        meta_path = os.path.join(checkpoint.run_dir, "meta.json")
+        old = time.time() - 100
+        os.utime(meta_path, (old, old))
+
+        self.assertEqual(purge_expired_runs(self.root, ttl_seconds=50), 1)
+        self.assertFalse(os.path.exists(checkpoint.run_dir))
+
+
+class ResumeExecutionTest(unittest.TestCase):
+    def test_resumed_sequential_run_skips_finished_tasks(self):
+        with tempfile.TemporaryDirectory() as root:
+            checkpoint = RunCheckpoint.open(new_run_id(), "t", "w", WORKFLOW, root=root)
+            checkpoint.save_task(0, "Analyst", "stored analysis")
+            agents = {name: SimpleNamespace() for name in ("Analyst", "Writer", "Editor")}
+            tasks = [
+                FakeTask(config["agent"], agents[config["agent"]])
+                for config in WORKFLOW["tasks"]
+            ]
+            finished = []
+
+            result = execute_tasks(
+                WORKFLOW,
+                agents,
+                tasks,
+                lambda output, agent_name: None,
+                lambda output, agent_name: finished.append(agent_name),
+                checkpoint,
+            )
+
+            self.assertEqual(result, "Editor output")
+            self.assertEqual(tasks[0].contexts, [])
+            self.assertEqual(tasks[1].contexts, ["stored analysis"])
+            self.assertEqual(tasks[2].contexts, ["stored analysis\n\nWriter output"])
+            self.assertEqual(finished, ["Writer", "Editor"])
+            self.assertEqual(len(checkpoint.completed_outputs()), 3)
+
+
+class ExecuteCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = temp_dir.name
+        self.checkpoints = []
+        self.outcome = "done"
+        for patch in (
+            mock.patch.dict(os.environ, {"WORKFLOW_RUN_DIR": self.root}),
+            mock.patch.object(run_workflow, "read_request", lambda: ("t", "w", False, None)),
+            mock.patch.object(run_workflow, "workflow_catalog", SimpleNamespace(get=lambda workflow_id: WORKFLOW)),
+            mock.patch.object(run_workflow, "run_request", self.run_request),
+            mock.patch("sys.stdout", io.StringIO()),
+            mock.patch("sys.stderr", io.StringIO()),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_request(self, topic, workflow_id, streaming, bypass_cache, checkpoint, verbosity):
+        self.checkpoints.append(checkpoint)
+        if checkpoint is not None:
+            checkpoint.save_task(0, "Analyst", "analysis")
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+    def test_runs_are_not_checkpointed_unless_enabled(self):
+        self.assertEqual(run_workflow.execute(False), 0)
+
+        self.assertEqual(self.checkpoints, [None])
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_checkpoints_are_kept_only_for_failed_runs(self):
+        with mock.patch.dict(os.environ, {"WORKFLOW_RUN_CHECKPOINTS": "1"}):
+            self.assertEqual(run_workflow.execute(False), 0)
+            self.outcome = RuntimeError("provider down")
+            self.assertEqual(run_workflow.execute(False), 1)
+
+        succeeded, failed = self.checkpoints
+        self.assertFalse(os.path.exists(succeeded.run_dir))
+        self.assertEqual(failed.completed_outputs(), {0: "analysis"})
+        self.assertEqual(os.listdir(self.root), [failed.run_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
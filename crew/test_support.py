@@ -0,0 +1,67 @@
+"""Fakes and fixtures shared by the crew tests (this module has no tests)."""
+
+from contextlib import ExitStack
+import os
+from unittest import mock
+
+from crew.progress import progress_sink
+
+
+METRICS_ENV = ("WORKFLOW_METRICS_JSONL_PATH", "WORKFLOW_METRICS_PROM_PATH")
+
+
+class FakeClock:
+    """A clock that only moves when a test moves it (or ``sleep`` is called)."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeTask:
+    """Stands in for a crewai ``Task``, recording the context it was run with."""
+
+    def __init__(self, name, agent):
+        self.name = name
+        self.agent = agent
+        self.contexts = []
+
+    def execute_sync(self, agent, context=None):
+        self.contexts.append(context)
+        return f"{self.name} output"
+
+
+def without_metrics_sinks(test):
+    """Keep the runs of ``test`` out of the metrics files named in the environment."""
+    environment = mock.patch.dict(os.environ)
+    environment.start()
+    test.addCleanup(environment.stop)
+    for name in METRICS_ENV:
+        os.environ.pop(name, None)
+
+
+def isolate_managed_llm(test, events, memo=False):
+    """Run ``ManagedOpenAICompletion`` calls in ``test`` without process-wide state.
+
+    Health samples go to a fresh in-memory ``ProviderHealth`` (returned), the
+    response memo is off unless ``memo`` is set, no metrics files are written
+    and progress events are appended to ``events``. Everything is undone when
+    the test finishes.
+    """
+    from crew import managed_llm
+    from crew.provider_health import ProviderHealth
+
+    health = ProviderHealth()
+    stack = ExitStack()
+    test.addCleanup(stack.close)
+    stack.enter_context(mock.patch.object(managed_llm, "provider_health", health))
+    if not memo:
+        stack.enter_context(mock.patch.object(managed_llm, "llm_memo", lambda: None))
+    stack.enter_context(progress_sink(events.append))
+    without_metrics_sinks(test)
+    return health
@@ -0,0 +1,108 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from crew.main import execute_tasks
+from crew.rate_limiter import estimate_tokens
+from crew.task_context import (
+    DEFAULT_CONTEXT_TOKENS,
+    TRUNCATION_MARK,
+    ContextPolicy,
+    context_policy,
+    extractive_summary,
+    limit_context,
+    limits_context,
+)
+from crew.test_support import FakeTask
+
+
+class ContextPolicyTest(unittest.TestCase):
+    def test_modes_are_read_from_a_name_or_an_object(self):
+        self.assertEqual(context_policy({}), ContextPolicy("full", DEFAULT_CONTEXT_TOKENS))
+        # crewai's own ``context`` (upstream tasks) is not a policy.
+        self.assertEqual(context_policy({"context": ["research"]}), ContextPolicy())
+        self.assertEqual(context_policy({"context_policy": "last"}), ContextPolicy("last", DEFAULT_CONTEXT_TOKENS))
+        self.assertEqual(
+            context_policy({"context_policy": {"mode": "tail", "max_tokens": 200}}), ContextPolicy("tail", 200)
+        )
+        self.assertFalse(limits_context({"tasks": [{"agent": "a"}, {"agent": "b", "context_policy": "full"}]}))
+        self.assertTrue(limits_context({"tasks": [{"agent": "a"}, {"agent": "b", "context_policy": "last"}]}))
+
+    def test_invalid_policies_are_rejected(self):
+        for config in ("head", 3, {"mode": "summary", "max_tokens": 0}, {"mode": "tail", "max_tokens": True}):
+            with self.subTest(config=config), self.assertRaises(ValueError):
+                context_policy({"context_policy": config})
+
+
+class LimitContextTest(unittest.TestCase):
+    outputs = ["调研" * 600, "大纲" * 600, "初稿" * 600]
+
+    def test_full_and_last(self):
+        self.assertEqual(limit_context(self.outputs, ContextPolicy("full")), self.outputs)
+        self.assertEqual(limit_context(self.outputs, ContextPolicy("last")), self.outputs[-1:])
+        self.assertEqual(limit_context([], ContextPolicy("last")), [])
+
+    def test_tail_keeps_the_end_within_the_budget(self):
+        (tail,) = limit_context(self.outputs, ContextPolicy("tail", 100))
+
+        self.assertEqual(estimate_tokens(tail), 100)
+        self.assertTrue(tail.startswith(TRUNCATION_MARK))
+        self.assertTrue(tail.endswith("初稿"))
+        self.assertEqual(limit_context(["short"], ContextPolicy("tail", 100)), ["short"])
+
+        (mixed,) = limit_context(["draft " * 100 + "初稿" * 100], ContextPolicy("tail", 60))
+        self.assertEqual(estimate_tokens(mixed), 60)
+        self.assertTrue(mixed.endswith("初稿"))
+
+    def test_summary_keeps_the_last_output_and_shrinks_the_rest(self):
+        limited = limit_context(self.outputs, ContextPolicy("summary", 200))
+
+        self.assertEqual(limited[-1], self.outputs[-1])
+        self.assertEqual(len(limited), 3)
+        self.assertLessEqual(sum(estimate_tokens(output) for output in limited[:-1]), 200)
+
+    def test_extractive_summary_prefers_sentences_on_the_main_subject(self):
+        text = (
+            "露营装备的选择决定了露营体验。"
+            "今天天气不错。"
+            "帐篷是露营装备里最重要的一件。"
+            "顺便一提，午饭吃了面条。"
+            "选露营装备要看季节和人数。"
+        )
+
+        summary = extractive_summary(text, 30)
+
+        self.assertIn("露营装备的选择决定了露营体验。", summary)
+        self.assertNotIn("午饭", summary)
+        self.assertLessEqual(estimate_tokens(summary), 30)
+        self.assertLess(summary.index("露营装备的选择"), summary.index("选露营装备"))
+        self.assertEqual(extractive_summary("很短。", 30), "很短。")
+
+
+class LimitedExecutionTest(unittest.TestCase):
+    def test_limited_tasks_run_outside_the_crew_and_report_token_counts(self):
+        workflow = {
+            "id": "w",
+            "tasks": [{"agent": "A"}, {"agent": "B"}, {"agent": "C", "context_policy": "last"}],
+        }
+        agents = {name: SimpleNamespace() for name in "ABC"}
+        tasks = [FakeTask(name, agents[name]) for name in "ABC"]
+
+        with mock.patch("crew.main.add_span") as add_span:
+            result = execute_tasks(
+                workflow, agents, tasks,
+                lambda output, agent_name: None, lambda output, agent_name: None,
+            )
+
+        self.assertEqual(result, "C output")
+        self.assertEqual(tasks[1].contexts, ["A output"])
+        self.assertEqual(tasks[2].contexts, ["B output"])
+        spans = [call.kwargs for call in add_span.call_args_list]
+        self.assertEqual(
+            [(span["context_tokens_full"], span["context_tokens"]) for span in spans],
+            [(0, 0), (3, 3), (6, 3)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
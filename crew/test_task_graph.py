@@ -0,0 +1,129 @@
+import contextvars
+import threading
+import time
+import unittest
+
+from crew.task_graph import (
+    DEFAULT_MAX_PARALLEL_TASKS,
+    build_task_graph,
+    max_parallel_tasks,
+    run_task_graph,
+    uses_task_graph,
+)
+
+
+request_label = contextvars.ContextVar("request_label", default=None)
+
+
+class BuildTaskGraphTest(unittest.TestCase):
+    def test_dependencies_resolve_by_id_or_index(self):
+        tasks = [
+            {"id": "research"},
+            {"id": "outline"},
+            {"depends_on": ["research", 1]},
+        ]
+
+        self.assertEqual(build_task_graph(tasks), [[], [], [0, 1]])
+
+    def test_sequential_workflows_do_not_use_the_graph(self):
+        self.assertFalse(uses_task_graph({"tasks": [{"agent": "a"}, {"agent": "b"}]}))
+        self.assertTrue(uses_task_graph({"tasks": [{"agent": "a"}, {"depends_on": []}]}))
+
+    def test_invalid_references_are_rejected(self):
+        invalid_graphs = [
+            [{"id": "a"}, {"depends_on": ["missing"]}],
+            [{"depends_on": [5]}],
+            [{"depends_on": [True]}],
+            [{"id": "a", "depends_on": ["a"]}],
+            [{"id": "a"}, {"id": "a"}],
+            [{"id": "a", "depends_on": ["b"]}, {"id": "b", "depends_on": ["a"]}],
+        ]
+        for tasks in invalid_graphs:
+            with self.subTest(tasks=tasks):
+                with self.assertRaises(ValueError):
+                    build_task_graph(tasks)
+
+    def test_max_parallel_tasks_must_be_a_positive_integer(self):
+        self.assertEqual(max_parallel_tasks({}), DEFAULT_MAX_PARALLEL_TASKS)
+        self.assertEqual(max_parallel_tasks({"max_parallel_tasks": 2}), 2)
+        for limit in (0, -1, "2", True, 1.5):
+            with self.subTest(limit=limit):
+                with self.assertRaises(ValueError):
+                    max_parallel_tasks({"max_parallel_tasks": limit})
+
+
+class RunTaskGraphTest(unittest.TestCase):
+    def test_independent_tasks_overlap_up_to_the_limit(self):
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def run_task(index, context_outputs):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return index
+
+        outputs = run_task_graph([[], [], [], [], [0, 1, 2, 3]], run_task, max_parallel=2)
+
+        self.assertEqual(outputs, [0, 1, 2, 3, 4])
+        self.assertEqual(active["peak"], 2)
+
+    def test_tasks_only_receive_their_declared_dependencies(self):
+        received = {}
+
+        def run_task(index, context_outputs):
+            received[index] = context_outputs
+            return f"out-{index}"
+
+        run_task_graph([[], [0], [0, 1], [1]], run_task, max_parallel=4)
+
+        self.assertEqual(received[0], [])
+        self.assertEqual(received[1], ["out-0"])
+        self.assertEqual(received[2], ["out-0", "out-1"])
+        self.assertEqual(received[3], ["out-1"])
+
+    def test_failure_stops_dependents_and_is_reraised(self):
+        started = []
+
+        def run_task(index, context_outputs):
+            started.append(index)
+            if index == 0:
+                raise RuntimeError("boom")
+            return index
+
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            run_task_graph([[], [0]], run_task, max_parallel=2)
+        self.assertEqual(started, [0])
+
+    def test_completed_tasks_are_not_run_again(self):
+        started = []
+
+        def run_task(index, context_outputs):
+            started.append((index, context_outputs))
+            return f"out-{index}"
+
+        outputs = run_task_graph(
+            [[], [0], [0, 1]], run_task, max_parallel=2, completed={0: "restored"}
+        )
+
+        self.assertEqual(outputs, ["restored", "out-1", "out-2"])
+        self.assertEqual(started, [(1, ["restored"]), (2, ["restored", "out-1"])])
+
+    def test_context_variables_follow_tasks_into_worker_threads(self):
+        def run_task(index, context_outputs):
+            return request_label.get()
+
+        token = request_label.set("run-1")
+        try:
+            outputs = run_task_graph([[], [0]], run_task, max_parallel=2)
+        finally:
+            request_label.reset(token)
+
+        self.assertEqual(outputs, ["run-1", "run-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+from contextlib import ExitStack
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+from crew.cancellation import WorkflowCancelled
+from crew.progress import progress_sink
+from crew.telemetry import (
+    RunTelemetry,
+    add_span,
+    current_run,
+    name_agents,
+    prometheus_samples,
+    queued_since,
+    record_llm_call,
+    run_telemetry,
+    span,
+    update_prometheus_textfile,
+)
+from crew.test_support import FakeClock, isolate_managed_llm, without_metrics_sinks
+
+
+class RunTelemetryTest(unittest.TestCase):
+    def test_summary_totals_phases_agents_and_providers(self):
+        clock = FakeClock(50.0)
+        events = []
+        telemetry = RunTelemetry("tech_writer", emit=events.append, clock=clock)
+
+        with telemetry.span("create_agents"):
+            clock.now += 2
+        telemetry.add_span(
+            "llm_call", 52.0, 55.0, agent="Writer", provider="kimi", model="k2",
+            prompt_tokens=100, completion_tokens=40, cached_prompt_tokens=64, ok=True,
+            first_token=0.5,
+        )
+        telemetry.add_span(
+            "llm_call", 55.0, 55.0, agent="Writer", provider="kimi", model="k2",
+            prompt_tokens=0, completion_tokens=0, ok=True, memo_hit=True,
+        )
+        clock.now = 60.0
+
+        summary = telemetry.summary("ok")
+        self.assertEqual(summary["duration"], 10.0)
+        self.assertEqual(summary["phases"], {"create_agents": 2.0})
+        # The first delta of the streamed call, not the end of its response.
+        self.assertEqual(summary["time_to_first_token"], 2.5)
+        self.assertEqual(
+            summary["agents"]["Writer"],
+            {
+                "calls": 2, "seconds": 3.0, "prompt_tokens": 100, "completion_tokens": 40,
+                "cached_prompt_tokens": 64,
+            },
+        )
+        self.assertEqual(summary["providers"]["kimi/k2"]["calls"], 2)
+        self.assertEqual(events[0]["type"], "span")
+        self.assertEqual(events[0]["span"]["name"], "create_agents")
+
+    def test_helpers_are_no_ops_outside_a_run(self):
+        with span("load_config"):
+            pass
+        add_span("task", 0.0, 1.0)
+        record_llm_call("Writer", "kimi", "k2", 0.0, 1.0, {})
+        self.assertIsNone(current_run())
+
+
+class RunTelemetryContextTest(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        stack.enter_context(progress_sink(self.events.append))
+        without_metrics_sinks(self)
+
+    def test_nested_runs_join_the_outer_one_and_llm_calls_use_agent_names(self):
+        with queued_since(0.0), run_telemetry("tech_writer") as outer:
+            with run_telemetry("tech_writer") as inner:
+                self.assertIs(inner, outer)
+                name_agents({"agents": [{"name": "Writer", "role": "技术作家"}]})
+                record_llm_call(
+                    "技术作家", "kimi", "k2", outer.started, outer.started + 1,
+                    {"prompt_tokens": 7, "completion_tokens": 3, "cached_prompt_tokens": 4}, ok=True,
+                )
+
+        metrics = [event for event in self.events if event["type"] == "metrics"]
+        self.assertEqual(len(metrics), 1)
+        summary = metrics[0]["metrics"]
+        self.assertEqual(summary["status"], "ok")
+        self.assertIn("queue", summary["phases"])
+        self.assertEqual(summary["agents"]["Writer"]["prompt_tokens"], 7)
+        self.assertIn("10 tokens（缓存命中 4）", metrics[0]["message"])
+
+    def test_cancelled_and_failed_runs_are_labelled(self):
+        with self.assertRaises(WorkflowCancelled):
+            with run_telemetry("a"):
+                raise WorkflowCancelled("gone")
+        with self.assertRaises(RuntimeError):
+            with run_telemetry("b"):
+                raise RuntimeError("boom")
+
+        statuses = [event["metrics"]["status"] for event in self.events if event["type"] == "metrics"]
+        self.assertEqual(statuses, ["cancelled", "error"])
+
+    def test_runs_are_appended_to_the_jsonl_and_prometheus_sinks(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jsonl_path = os.path.join(temp_dir, "runs.jsonl")
+            prom_path = os.path.join(temp_dir, "workflows.prom")
+            os.environ["WORKFLOW_METRICS_JSONL_PATH"] = jsonl_path
+            os.environ["WORKFLOW_METRICS_PROM_PATH"] = prom_path
+
+            for _ in range(2):
+                with run_telemetry("tech_writer") as telemetry:
+                    record_llm_call(
+                        "Writer", "kimi", "k2", telemetry.started, telemetry.started + 1,
+                        {"prompt_tokens": 10, "completion_tokens": 5}, ok=True,
+                    )
+
+            with open(jsonl_path, encoding="utf-8") as jsonl_file:
+                runs = [json.loads(line) for line in jsonl_file]
+            with open(prom_path, encoding="utf-8") as prom_file:
+                prom = prom_file.read()
+
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(runs[0]["spans"][0]["name"], "llm_call")
+        self.assertIn(
+            'qiaoagent_workflow_runs_total{workflow_id="tech_writer",status="ok"} 2.0', prom
+        )
+        self.assertIn(
+            'qiaoagent_llm_tokens_total{workflow_id="tech_writer",provider="kimi",'
+            'model="k2",kind="prompt"} 20.0',
+            prom,
+        )
+        self.assertIn("# TYPE qiaoagent_agent_tokens_total counter", prom)
+
+
+class PrometheusTextfileTest(unittest.TestCase):
+    def test_label_values_are_escaped(self):
+        summary = {
+            "workflow_id": 'quote"and\\slash',
+            "status": "ok",
+            "duration": 1.5,
+            "phases": {},
+            "agents": {},
+            "providers": {},
+        }
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "workflows.prom")
+            update_prometheus_textfile(path, prometheus_samples(summary))
+            update_prometheus_textfile(path, prometheus_samples(summary))
+            with open(path, encoding="utf-8") as prom_file:
+                prom = prom_file.read()
+
+        self.assertIn(
+            'qiaoagent_workflow_run_seconds_total{workflow_id="quote\\"and\\\\slash"} 3.0', prom
+        )
+
+
+class ManagedCompletionTelemetryTest(unittest.TestCase):
+    def test_llm_calls_are_recorded_with_provider_usage(self):
+        from crewai.llms.providers.openai.completion import OpenAICompletion
+
+        from crew.llm_clients import LLMClientRegistry
+
+        llm = LLMClientRegistry().crew_llm(
+            "kimi", {"baseURL": "https://api.moonshot.cn/v1", "apiKey": "key"}, "kimi-latest"
+        )
+
+        def provider_call(self, messages, *args):
+            # DeepSeek reports prefix cache hits outside prompt_tokens_details.
+            response = SimpleNamespace(usage=SimpleNamespace(
+                prompt_tokens=12, completion_tokens=8, total_tokens=20,
+                prompt_tokens_details=None, completion_tokens_details=None,
+                prompt_cache_hit_tokens=10,
+            ))
+            self._track_token_usage_internal(self._extract_openai_token_usage(response))
+            return "ok"
+
+        events = []
+        isolate_managed_llm(self, events)
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call), \
+                run_telemetry("tech_writer"):
+            llm.call("hi")
+
+        (call_span,) = [event["span"] for event in events if event["type"] == "span"]
+        self.assertEqual(call_span["provider"], "kimi")
+        self.assertEqual(call_span["model"], "kimi-latest")
+        self.assertEqual((call_span["prompt_tokens"], call_span["completion_tokens"]), (12, 8))
+        self.assertEqual(call_span["cached_prompt_tokens"], 10)
+        self.assertTrue(call_span["ok"])
+
+
+    def test_cached_prompt_tokens_are_read_from_each_providers_field(self):
+        from crew.managed_llm import cached_prompt_tokens
+
+        openai = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=128))
+        deepseek = SimpleNamespace(prompt_tokens_details=None, prompt_cache_hit_tokens=64)
+        moonshot = SimpleNamespace(cached_tokens=32)
+        self.assertEqual(
+            [cached_prompt_tokens(usage) for usage in (openai, deepseek, moonshot, None)],
+            [128, 64, 32, 0],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
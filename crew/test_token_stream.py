@@ -0,0 +1,236 @@
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from crew.progress import progress_sink
+from crew.test_support import FakeClock, isolate_managed_llm
+from crew.token_stream import StreamingCallbackHandler, stream_tokens, token_stream_for
+
+
+class FakeAgent:
+    def __init__(self, role):
+        self.role = role
+        self.id = uuid.uuid4()
+
+
+class StreamingCallbackHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(10.0)
+        self.events = []
+        self.handler = StreamingCallbackHandler(
+            "Writer", max_delay=0.1, max_chars=10,
+            send=lambda kind, message, agent: self.events.append((kind, message)),
+            clock=self.clock,
+        )
+
+    def streamed(self):
+        return [message for kind, message in self.events if kind == "stream"]
+
+    def test_first_token_is_sent_at_once_and_the_rest_is_coalesced(self):
+        self.handler.on_llm_start()
+        for token in ["He", "llo", " wo", "rld"]:
+            self.handler.on_llm_new_token(token)
+            self.clock.now += 0.01
+
+        self.assertEqual(self.streamed(), ["He"])
+        self.handler.on_llm_end()
+        self.assertEqual(self.streamed(), ["He", "llo world"])
+        self.assertEqual(self.events[-1], ("thinking", "思考完成"))
+
+    def test_buffer_is_flushed_by_size_and_by_time(self):
+        self.handler.on_llm_start()
+        self.handler.on_llm_new_token("a")
+        self.handler.on_llm_new_token("0123456789")
+        self.handler.on_llm_new_token("b")
+        self.clock.now += 0.2
+        self.handler.on_llm_new_token("c")
+
+        self.assertEqual(self.streamed(), ["a", "0123456789", "bc"])
+
+    def test_buffered_tokens_are_flushed_when_the_stream_goes_quiet(self):
+        events = []
+        handler = StreamingCallbackHandler(
+            "Writer", max_delay=0.05,
+            send=lambda kind, message, agent: events.append((kind, message)),
+        )
+        handler.on_llm_start()
+        handler.on_llm_new_token("a")
+        handler.on_llm_new_token("b")
+        handler.on_llm_new_token("c")
+        self.assertEqual([message for kind, message in events if kind == "stream"], ["a"])
+
+        time.sleep(0.2)
+        self.assertEqual([message for kind, message in events if kind == "stream"], ["a", "bc"])
+        handler.on_llm_end()
+        self.assertEqual([message for kind, message in events if kind == "stream"], ["a", "bc"])
+
+    def test_quiet_flush_reaches_the_callers_progress_sink(self):
+        events = []
+        handler = StreamingCallbackHandler("Writer", max_delay=0.05)
+        with progress_sink(events.append):
+            handler.on_llm_start()
+            handler.on_llm_new_token("a")
+            handler.on_llm_new_token("b")
+        time.sleep(0.2)
+
+        self.assertEqual([event["message"] for event in events if event["type"] == "stream"], ["a", "b"])
+
+    def test_each_call_sends_its_first_token_at_once(self):
+        for text in ["one", "two"]:
+            self.handler.on_llm_start()
+            self.handler.on_llm_new_token(text)
+            self.handler.on_llm_end()
+
+        self.assertEqual(self.streamed(), ["one", "two"])
+
+    def test_a_failed_call_that_streamed_text_is_reset(self):
+        self.handler.on_llm_start()
+        self.handler.on_llm_new_token("Fin")
+        self.handler.on_llm_new_token("al")
+        self.handler.on_llm_error()
+        self.handler.on_llm_end()
+        self.handler.on_llm_start()
+        self.handler.on_llm_error()
+        self.handler.on_llm_end()
+
+        kinds = [kind for kind, message in self.events if kind != "thinking"]
+        # The buffered "al" is dropped; a call that sent nothing needs no reset.
+        self.assertEqual(kinds, ["stream", "stream_reset"])
+        self.assertEqual(self.streamed(), ["Fin"])
+
+    def test_listeners_see_every_token_before_coalescing(self):
+        calls = []
+        listener = mock.Mock(
+            on_llm_start=lambda: calls.append("start"),
+            on_llm_new_token=calls.append,
+            on_llm_end=lambda: calls.append("end"),
+        )
+        self.handler.add_listener(listener)
+        self.handler.on_llm_start()
+        for token in ["a", "b", "", "c"]:
+            self.handler.on_llm_new_token(token)
+        self.handler.on_llm_end()
+
+        self.assertEqual(calls, ["start", "a", "b", "c", "end"])
+        self.assertEqual(self.streamed(), ["a", "bc"])
+
+
+class StreamTokensTest(unittest.TestCase):
+    def test_handlers_are_found_by_agent_id_not_role(self):
+        writer, other_writer = FakeAgent("作家"), FakeAgent("作家")
+        handler, other_handler = StreamingCallbackHandler("Writer"), StreamingCallbackHandler("Writer2")
+        self.assertIsNone(token_stream_for(writer))
+        with stream_tokens({writer.id: handler, other_writer.id: other_handler}):
+            self.assertIs(token_stream_for(writer), handler)
+            self.assertIs(token_stream_for(other_writer), other_handler)
+            self.assertIsNone(token_stream_for(FakeAgent("编辑")))
+            with stream_tokens(None):
+                self.assertIsNone(token_stream_for(writer))
+
+
+class ManagedCompletionStreamingTest(unittest.TestCase):
+    def setUp(self):
+        from crew.llm_clients import LLMClientRegistry
+
+        self.llm = LLMClientRegistry().crew_llm(
+            "kimi", {"baseURL": "https://api.moonshot.cn/v1", "apiKey": "key"}, "kimi-latest"
+        )
+        self.events = []
+        isolate_managed_llm(self, self.events)
+
+    def test_deltas_reach_the_agents_handler_only_while_streaming(self):
+        from crewai.llms.providers.openai.completion import OpenAICompletion
+
+        seen_stream_modes = []
+
+        def provider_call(self, messages, tools, callbacks, available_functions,
+                          from_task, from_agent, response_model):
+            seen_stream_modes.append(self._effective_stream())
+            for chunk in ["Thought: done\n", "Final Answer: hi"]:
+                self._emit_stream_chunk_event(chunk=chunk)
+            return "Thought: done\nFinal Answer: hi"
+
+        handler = StreamingCallbackHandler("Writer", max_delay=60)
+        writer = FakeAgent("作家")
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call):
+            self.llm.call("hi", from_agent=FakeAgent("编辑"))
+            with stream_tokens({writer.id: handler}):
+                self.llm.call("hi", from_agent=writer)
+
+        self.assertEqual(seen_stream_modes, [False, True])
+        streamed = [event for event in self.events if event["type"] == "stream"]
+        self.assertEqual(
+            [event["message"] for event in streamed], ["Thought: done\n", "Final Answer: hi"]
+        )
+        self.assertTrue(all(event["agent"] == "Writer" for event in streamed))
+
+    def test_a_retried_call_resets_the_text_its_failed_attempt_streamed(self):
+        import httpx
+        import openai
+        from crewai.llms.providers.openai.completion import OpenAICompletion
+
+        from crew import managed_llm
+
+        attempts = []
+
+        def provider_call(self, *args):
+            attempts.append(self.provider_id)
+            self._emit_stream_chunk_event(chunk="Final Answer: ")
+            if len(attempts) == 1:
+                request = httpx.Request("POST", "https://api.moonshot.cn/v1/chat/completions")
+                raise openai.APIStatusError(
+                    "status 503", response=httpx.Response(503, request=request), body=None
+                )
+            self._emit_stream_chunk_event(chunk="hi")
+            return "Final Answer: hi"
+
+        writer = FakeAgent("作家")
+        handler = StreamingCallbackHandler("Writer", max_delay=60)
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call), \
+                mock.patch.object(managed_llm, "retry_delay", lambda attempt, error: 0.01), \
+                stream_tokens({writer.id: handler}):
+            self.assertEqual(self.llm.call("hi", from_agent=writer), "Final Answer: hi")
+
+        frames = [
+            (event["type"], event["message"]) for event in self.events
+            if event["type"] in ("stream", "stream_reset")
+        ]
+        self.assertEqual(frames, [
+            ("stream", "Final Answer: "),
+            ("stream_reset", "输出中断，重新生成..."),
+            ("stream", "Final Answer: "),
+            ("stream", "hi"),
+        ])
+
+    def test_streamed_calls_record_when_the_first_delta_arrived(self):
+        from crewai.llms.providers.openai.completion import OpenAICompletion
+
+        from crew.telemetry import run_telemetry
+
+        def provider_call(self, *args):
+            time.sleep(0.05)
+            if self._effective_stream():
+                self._emit_stream_chunk_event(chunk="Final Answer: hi")
+            time.sleep(0.1)
+            return "Final Answer: hi"
+
+        writer = FakeAgent("作家")
+        with mock.patch.object(OpenAICompletion, "call", autospec=True, side_effect=provider_call), \
+                run_telemetry("w"), \
+                stream_tokens({writer.id: StreamingCallbackHandler("Writer")}):
+            self.llm.call("hi", from_agent=writer)
+            self.llm.call("hi")
+
+        streamed, unstreamed = [event["span"] for event in self.events if event["type"] == "span"]
+        self.assertGreaterEqual(streamed["first_token"], 0.05)
+        self.assertLess(streamed["first_token"], streamed["duration"] - 0.05)
+        self.assertNotIn("first_token", unstreamed)
+        (metrics,) = [event["metrics"] for event in self.events if event["type"] == "metrics"]
+        self.assertAlmostEqual(
+            metrics["time_to_first_token"], streamed["start"] + streamed["first_token"], places=6
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import io
+import os
+import unittest
+from unittest import mock
+
+from crew.verbosity import (
+    crewai_verbose,
+    current_verbosity,
+    log_summary,
+    parse_verbosity,
+    run_verbosity,
+)
+
+
+class VerbosityTest(unittest.TestCase):
+    def test_default_comes_from_the_environment(self):
+        with mock.patch.dict(os.environ, {"WORKFLOW_VERBOSITY": "DEBUG"}):
+            self.assertEqual(current_verbosity(), "debug")
+        with mock.patch.dict(os.environ, {"WORKFLOW_VERBOSITY": "chatty"}):
+            self.assertEqual(current_verbosity(), "summary")
+
+    def test_run_level_overrides_the_default_for_its_context(self):
+        with mock.patch.dict(os.environ, {"WORKFLOW_VERBOSITY": "debug"}):
+            with run_verbosity("off"):
+                self.assertFalse(crewai_verbose())
+                with run_verbosity(None):
+                    self.assertEqual(current_verbosity(), "off")
+            self.assertTrue(crewai_verbose())
+
+    def test_unknown_levels_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "off, summary, debug"):
+            parse_verbosity("loud")
+        with self.assertRaises(ValueError):
+            with run_verbosity(1):
+                pass
+
+    def test_summary_lines_are_dropped_when_off(self):
+        stderr = io.StringIO()
+        with mock.patch("sys.stderr", stderr):
+            with run_verbosity("off"):
+                log_summary("hidden")
+            with run_verbosity("summary"):
+                log_summary("shown")
+
+        self.assertEqual(stderr.getvalue(), "shown\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
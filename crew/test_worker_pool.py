@@ -0,0 +1,115 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from crew.progress import progress_sink, send_progress
+from crew.worker_pool import PRELOAD_MODULES, current_rss_mb, handle_connection
+
+
+def request_lines(socket_path, payload, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(socket_path)
+            break
+        except (FileNotFoundError, ConnectionRefusedError):
+            client.close()
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+    with client:
+        client.settimeout(timeout)
+        client.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with client.makefile("r", encoding="utf-8") as reader:
+            return reader.read().splitlines()
+
+
+class WorkerPoolTest(unittest.TestCase):
+    def test_preload_imports_the_modules_crew_main_defers(self):
+        script = (
+            "import sys\n"
+            "from crew.worker_pool import PRELOAD_MODULES, preload_workflow_engine\n"
+            "before = 'crewai' in sys.modules\n"
+            "preload_workflow_engine()\n"
+            "print(before, [module for module in PRELOAD_MODULES if module not in sys.modules])\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, timeout=120
+        )
+
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.strip(), "False []")
+        self.assertIn("crewai", PRELOAD_MODULES)
+
+    def test_progress_sink_captures_events_instead_of_stderr(self):
+        events = []
+        with progress_sink(events.append):
+            send_progress("task", "hello", "Writer")
+
+        self.assertEqual(events, [{"type": "task", "message": "hello", "agent": "Writer"}])
+
+    def test_connection_rejects_unknown_workflow_with_validation_code(self):
+        server, client = socket.socketpair()
+        with server, client:
+            client.sendall(b'{"topic": "safe", "workflow_id": "unknown"}\n')
+            handle_connection(server)
+            server.close()
+            lines = client.makefile("r", encoding="utf-8").read().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith("ERROR:"))
+        self.assertEqual(
+            json.loads(lines[0][len("ERROR:"):]),
+            {"error": "Unknown workflow_id", "code": 2},
+        )
+
+    def test_connection_rejects_invalid_json(self):
+        server, client = socket.socketpair()
+        with server, client:
+            client.sendall(b"not json\n")
+            handle_connection(server)
+            server.close()
+            lines = client.makefile("r", encoding="utf-8").read().splitlines()
+
+        self.assertIn("valid JSON", lines[0])
+
+    def test_rss_is_reported_in_megabytes(self):
+        self.assertGreater(current_rss_mb(), 1)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "worker pool requires fork")
+    def test_recycled_workers_keep_serving_requests(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "workers.sock")
+            supervisor = subprocess.Popen(
+                [
+                    sys.executable, "-m", "crew.run_workflow",
+                    "--serve", socket_path, "--workers", "1", "--max-jobs", "1",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                for _ in range(2):
+                    lines = request_lines(
+                        socket_path, {"topic": "safe", "workflow_id": "unknown"}
+                    )
+                    self.assertEqual(len(lines), 1)
+                    self.assertIn('"code": 2', lines[0])
+                self.assertEqual(oct(os.stat(socket_path).st_mode & 0o777), "0o600")
+            finally:
+                supervisor.send_signal(signal.SIGTERM)
+                supervisor.wait(timeout=30)
+
+            self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+
+from crew.run_workflow import load_allowed_workflow_ids
+from crew.workflow_catalog import WorkflowCatalog, build_index, workflow_catalog
+
+
+def write_catalog(path, workflows):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as catalog_file:
+        json.dump({"workflows": workflows}, catalog_file)
+    os.replace(temp_path, path)
+
+
+class WorkflowCatalogTest(unittest.TestCase):
+    def test_index_by_id_agent_and_task(self):
+        index = build_index({"workflows": [
+            {
+                "id": "demo",
+                "name": "Demo",
+                "agents": [{"name": "Writer", "role": "writer"}],
+                "tasks": [{"agent": "Writer", "description": "{topic}"}],
+            },
+            {"name": "missing id"},
+            "not a workflow",
+        ]})
+
+        self.assertEqual(index.workflow_ids, frozenset({"demo"}))
+        self.assertEqual(index.workflows["demo"]["agents"][0]["role"], "writer")
+        self.assertEqual(index.summaries, ({"id": "demo", "name": "Demo"},))
+
+    def test_malformed_catalogs_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "'workflows' list"):
+            build_index({"workflows": {}})
+        with self.assertRaisesRegex(ValueError, "Duplicate workflow id 'demo'"):
+            build_index({"workflows": [{"id": "demo"}, {"id": "demo"}]})
+
+    def test_catalog_reloads_only_after_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "workflows.json")
+            write_catalog(path, [{"id": "first"}])
+            catalog = WorkflowCatalog(path)
+
+            self.assertIs(catalog.index(), catalog.index())
+            self.assertEqual(load_allowed_workflow_ids(path), {"first"})
+
+            write_catalog(path, [{"id": "first"}, {"id": "second"}])
+            self.assertEqual(catalog.workflow_ids(), {"first", "second"})
+            with self.assertRaisesRegex(ValueError, "Workflow 'third' not found"):
+                catalog.get("third")
+
+    def test_shipped_catalog_is_served_from_the_shared_instance(self):
+        self.assertIn("wechat_title_creator", load_allowed_workflow_ids())
+        self.assertIs(
+            workflow_catalog.get("wechat_title_creator"),
+            workflow_catalog.index().workflows["wechat_title_creator"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -48,6 +48,21 @@ class WorkflowRunnerSecurityTest(unittest.TestCase):
             self.assertIn("Unknown workflow_id", completed.stderr)
             self.assertFalse(os.path.exists(sentinel))
 
+    def test_resuming_an_unknown_run_is_rejected_before_running(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            completed = subprocess.run(
+                [sys.executable, "-m", "crew.run_workflow", "--resume", "0" * 32],
+                input=json.dumps({"topic": "safe", "workflow_id": "wechat_title_creator"}),
+                text=True,
+                capture_output=True,
+                check=False,
+                env=dict(os.environ, WORKFLOW_RUN_DIR=temp_dir),
+            )
+
+        self.assertEqual(completed.returncode, 2)
+        self.assertIn("not found", completed.stderr)
+        self.assertEqual(completed.stdout, "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from crew.zygote import forward_to_zygote, read_options
+
+
+class ReadOptionsTest(unittest.TestCase):
+    def test_progress_fd_is_installed_after_stdio(self):
+        options = read_options({"stream": True, "progress_fd": 3}, [7, 8, 9, 10])
+
+        self.assertEqual(options["targets"], [0, 1, 2, 3])
+        self.assertTrue(options["stream"])
+        self.assertIsNone(options["resume"])
+
+    def test_invalid_headers_are_rejected(self):
+        for header, fds in [
+            ([], [7, 8, 9]),
+            ({"progress_fd": True}, [7, 8, 9, 10]),
+            ({"progress_fd": 1}, [7, 8, 9, 10]),
+            ({"resume": 5}, [7, 8, 9]),
+            ({"progress_fd": 3}, [7, 8, 9]),
+            ({}, [7, 8]),
+        ]:
+            with self.subTest(header=header, fds=fds), self.assertRaises(ValueError):
+                read_options(header, fds)
+
+
+class ForwardToZygoteTest(unittest.TestCase):
+    def test_unreachable_zygote_leaves_the_request_to_the_caller(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "missing.sock")
+            self.assertIsNone(forward_to_zygote(socket_path, False, None, None))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "zygote requires fork")
+    def test_forked_children_use_the_callers_stdio(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "zygote.sock")
+            zygote = subprocess.Popen(
+                [sys.executable, "-m", "crew.run_workflow", "--zygote", socket_path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                deadline = time.monotonic() + 60
+                while not os.path.exists(socket_path):
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.1)
+                env = dict(os.environ, WORKFLOW_ZYGOTE_SOCKET=socket_path)
+                for _ in range(2):
+                    completed = subprocess.run(
+                        [sys.executable, "-m", "crew.run_workflow"],
+                        input=b'{"topic": "safe", "workflow_id": "unknown"}',
+                        capture_output=True,
+                        env=env,
+                        timeout=60,
+                    )
+                    self.assertEqual(completed.returncode, 2)
+                    self.assertEqual(completed.stdout, b"")
+                    self.assertEqual(
+                        json.loads(completed.stderr.splitlines()[-1]),
+                        {"error": "Unknown workflow_id"},
+                    )
+                self.assertEqual(oct(os.stat(socket_path).st_mode & 0o777), "0o600")
+            finally:
+                zygote.send_signal(signal.SIGTERM)
+                zygote.wait(timeout=30)
+
+            self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
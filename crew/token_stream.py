@@ -0,0 +1,157 @@
+"""Incremental agent output for the progress channel.
+
+While ``stream_tokens`` is active, ``ManagedOpenAICompletion`` requests a
+streamed completion for every agent that has a handler and feeds each text
+delta to it. Sending one event per token would flood the channel, so a
+handler coalesces deltas and sends a ``stream`` event when either:
+
+- the first delta of a call arrives (time to first visible token is what
+  editors notice most, so it is never held back);
+- ``max_chars`` characters are buffered;
+- ``max_delay`` seconds have passed since the last event, even when no
+  further delta arrives (a provider pausing mid-answer still shows what it
+  has written so far).
+
+Whatever is still buffered is sent when the call ends. A call that fails
+after some of its text was sent is followed by a ``stream_reset`` event, so
+consumers can drop that partial output before a retry or fallback provider
+streams the answer again. Handlers are looked
+up by the crewai agent's ``id``, since two agents may share a role. Listeners added with
+``add_listener`` (such as ``crew.result_parsers.ResultStream``) see every
+delta as it arrives, before coalescing.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+from crew.progress import send_progress
+
+
+FLUSH_SECONDS = 0.1
+FLUSH_CHARS = 200
+
+_token_streams: contextvars.ContextVar[Optional[Dict[Hashable, "StreamingCallbackHandler"]]] = (
+    contextvars.ContextVar("token_streams", default=None)
+)
+
+
+class StreamingCallbackHandler:
+    """Coalesces one agent's streamed tokens into ``stream`` progress events."""
+
+    def __init__(
+        self,
+        agent_name: str = "Agent",
+        max_delay: float = FLUSH_SECONDS,
+        max_chars: int = FLUSH_CHARS,
+        send: Callable[..., None] = send_progress,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.agent_name = agent_name
+        self.max_delay = max_delay
+        self.max_chars = max_chars
+        self._send = send
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.current_text = ""
+        self._last_flush: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._listeners: List[Any] = []
+
+    def add_listener(self, listener: Any) -> None:
+        """Also pass ``on_llm_start``/``on_llm_new_token``/``on_llm_end``/``on_llm_error`` calls to ``listener``."""
+        self._listeners.append(listener)
+
+    def on_llm_start(self) -> None:
+        with self._lock:
+            self._cancel_timer()
+            self.current_text = ""
+            self._last_flush = None
+        self._send("thinking", "开始思考...", self.agent_name)
+        for listener in self._listeners:
+            listener.on_llm_start()
+
+    def on_llm_new_token(self, token: str) -> None:
+        if not token:
+            return
+        for listener in self._listeners:
+            listener.on_llm_new_token(token)
+        with self._lock:
+            self.current_text += token
+            now = self._clock()
+            if (
+                self._last_flush is None
+                or len(self.current_text) >= self.max_chars
+                or now - self._last_flush >= self.max_delay
+            ):
+                self._flush(now)
+            elif self._timer is None:
+                self._start_timer(self.max_delay - (now - self._last_flush))
+
+    def on_llm_error(self) -> None:
+        """Discard the failed call's output; ``on_llm_end`` still follows."""
+        with self._lock:
+            self._cancel_timer()
+            self.current_text = ""
+            streamed = self._last_flush is not None
+            self._last_flush = None
+        if streamed:
+            self._send("stream_reset", "输出中断，重新生成...", self.agent_name)
+        for listener in self._listeners:
+            listener.on_llm_error()
+
+    def on_llm_end(self) -> None:
+        with self._lock:
+            self._cancel_timer()
+            if self.current_text:
+                self._flush(self._clock())
+        self._send("thinking", "思考完成", self.agent_name)
+        for listener in self._listeners:
+            listener.on_llm_end()
+
+    def _flush(self, now: float) -> None:
+        self._cancel_timer()
+        text, self.current_text = self.current_text, ""
+        self._last_flush = now
+        self._send("stream", text, self.agent_name)
+
+    def _start_timer(self, delay: float) -> None:
+        # Run in the caller's context so the event reaches its progress sink.
+        context = contextvars.copy_context()
+        self._timer = threading.Timer(max(delay, 0.0), context.run, args=(self._flush_due,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_due(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self.current_text:
+                self._flush(self._clock())
+
+
+@contextmanager
+def stream_tokens(handlers: Optional[Dict[Hashable, StreamingCallbackHandler]]) -> Iterator[None]:
+    """Stream LLM output of the agents in ``handlers`` (keyed by agent id) in this context.
+
+    ``None`` turns streaming off, e.g. for a hedged call whose output would
+    interleave with the primary's.
+    """
+    token = _token_streams.set(handlers)
+    try:
+        yield
+    finally:
+        _token_streams.reset(token)
+
+
+def token_stream_for(agent: Any) -> Optional[StreamingCallbackHandler]:
+    handlers = _token_streams.get()
+    if not handlers:
+        return None
+    return handlers.get(getattr(agent, "id", None))
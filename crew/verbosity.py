@@ -0,0 +1,58 @@
+"""How much a workflow run logs besides its progress events.
+
+- ``off``: nothing; CrewAI agents and crews run with ``verbose=False``;
+- ``summary`` (default): one stderr line per finished task;
+- ``debug``: CrewAI's full verbose output (every prompt, thought and answer)
+  plus ``[DEBUG]`` progress events from the step and task callbacks.
+
+Structured progress events are sent at every level. The process default
+comes from ``WORKFLOW_VERBOSITY``; a request can override it for its run.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import os
+import sys
+from typing import Any, Iterator, Optional
+
+
+VERBOSITY_LEVELS = ("off", "summary", "debug")
+DEFAULT_VERBOSITY = "summary"
+
+_verbosity: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "workflow_verbosity", default=None
+)
+
+
+def parse_verbosity(value: Any) -> str:
+    if value not in VERBOSITY_LEVELS:
+        raise ValueError(f"verbosity must be one of: {', '.join(VERBOSITY_LEVELS)}")
+    return value
+
+
+def default_verbosity() -> str:
+    value = os.getenv("WORKFLOW_VERBOSITY", DEFAULT_VERBOSITY).strip().lower()
+    return value if value in VERBOSITY_LEVELS else DEFAULT_VERBOSITY
+
+
+def current_verbosity() -> str:
+    return _verbosity.get() or default_verbosity()
+
+
+@contextmanager
+def run_verbosity(level: Optional[str]) -> Iterator[None]:
+    """Use ``level`` for runs in this context; ``None`` keeps the current level."""
+    token = _verbosity.set(parse_verbosity(level) if level is not None else _verbosity.get())
+    try:
+        yield
+    finally:
+        _verbosity.reset(token)
+
+
+def crewai_verbose() -> bool:
+    return current_verbosity() == "debug"
+
+
+def log_summary(message: str) -> None:
+    if current_verbosity() != "off":
+        print(message, file=sys.stderr, flush=True)
@@ -0,0 +1,194 @@
+"""Pre-forked pool of warm workflow workers listening on a local Unix socket.
+
+Each connection carries one request line using the same JSON contract as the
+``crew.run_workflow`` stdin payload (including the optional ``verbosity``),
+plus an optional boolean ``stream`` flag.
+The worker answers with ``PROGRESS:{json}`` lines (events in the versioned
+envelope of ``crew.progress``) followed by exactly one ``RESULT:{json}`` or
+``ERROR:{json}`` line and then closes the connection.
+
+Workers import the workflow engine once and serve many jobs. A worker exits
+after ``max_jobs`` requests or once its RSS passes ``max_rss_mb``, and the
+supervisor forks a replacement.
+"""
+
+import importlib
+import json
+import os
+import resource
+import signal
+import socket
+import sys
+import threading
+from typing import Any, Dict, Set
+
+from crew.progress import ProgressEncoder, progress_sink
+from crew.run_workflow import (
+    MAX_STDIN_LENGTH,
+    decode_payload,
+    load_allowed_workflow_ids,
+    read_verbosity,
+    run_request,
+    validate_payload,
+)
+
+
+REQUEST_READ_TIMEOUT_SECONDS = 10
+LISTEN_BACKLOG = 64
+# crew.main imports these only when it builds agents, so long-lived workers
+# (and the zygote) import them explicitly before their first job.
+PRELOAD_MODULES = (
+    "crew.main",
+    "crewai",
+    "crewai.llms.providers.openai.completion",
+    "langchain_openai",
+    "crew.managed_llm",
+)
+
+
+def preload_workflow_engine() -> None:
+    """Import the workflow engine and its heavy dependencies ahead of the first job."""
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class ConnectionWriter:
+    """Line writer that stops writing once the client has gone away."""
+
+    def __init__(self, conn: socket.socket):
+        self._file = conn.makefile("wb")
+        self._lock = threading.Lock()
+        self.disconnected = False
+
+    def write(self, kind: str, value: Dict[str, Any]) -> None:
+        line = f"{kind}:{json.dumps(value, ensure_ascii=False)}\n".encode("utf-8")
+        with self._lock:
+            if self.disconnected:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+            except OSError:
+                self.disconnected = True
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+        except OSError:
+            pass
+
+
+def handle_connection(conn: socket.socket) -> None:
+    writer = ConnectionWriter(conn)
+    try:
+        conn.settimeout(REQUEST_READ_TIMEOUT_SECONDS)
+        with conn.makefile("rb") as reader:
+            raw_line = reader.readline(MAX_STDIN_LENGTH * 4 + 1)
+        conn.settimeout(None)
+
+        try:
+            payload = decode_payload(raw_line.decode("utf-8"))
+        except UnicodeDecodeError as error:
+            raise ValueError("Request must be UTF-8 encoded JSON") from error
+        topic, workflow_id = validate_payload(payload, load_allowed_workflow_ids())
+        streaming = payload.get("stream") is True
+        bypass_cache = payload.get("bypass_cache") is True
+        verbosity = read_verbosity(payload)
+
+        encoder = ProgressEncoder()
+        with progress_sink(lambda event: writer.write("PROGRESS", encoder.envelope(event))):
+            result = run_request(
+                topic, workflow_id, streaming, bypass_cache, verbosity=verbosity
+            )
+        writer.write("RESULT", result)
+    except ValueError as error:
+        writer.write("ERROR", {"error": str(error), "code": 2})
+    except Exception as error:
+        writer.write("ERROR", {"error": str(error), "code": 1})
+    finally:
+        writer.close()
+
+
+def serve_worker(listener: socket.socket, max_jobs: int, max_rss_mb: int) -> None:
+    # Pay the crewai/langchain import once per worker instead of once per job.
+    preload_workflow_engine()
+
+    jobs = 0
+    while max_jobs <= 0 or jobs < max_jobs:
+        conn, _ = listener.accept()
+        with conn:
+            handle_connection(conn)
+        jobs += 1
+        if max_rss_mb > 0 and current_rss_mb() > max_rss_mb:
+            break
+
+
+def bind_listener(socket_path: str) -> socket.socket:
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    previous_umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(previous_umask)
+    listener.listen(LISTEN_BACKLOG)
+    return listener
+
+
+def fork_worker(listener: socket.socket, max_jobs: int, max_rss_mb: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        serve_worker(listener, max_jobs, max_rss_mb)
+    except BaseException:
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def serve(socket_path: str, workers: int, max_jobs: int, max_rss_mb: int) -> int:
+    """Run the supervisor until SIGTERM/SIGINT, keeping ``workers`` warm workers alive."""
+    if workers < 1:
+        raise ValueError("At least one worker is required")
+
+    listener = bind_listener(socket_path)
+    children: Set[int] = set()
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while True:
+            while len(children) < workers:
+                children.add(fork_worker(listener, max_jobs, max_rss_mb))
+            pid, _ = os.wait()
+            children.discard(pid)
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
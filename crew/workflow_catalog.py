@@ -0,0 +1,85 @@
+"""Indexed, stat-validated view of ``public/workflows.json``.
+
+The catalog is parsed and validated once per file change and shared by the
+workflow engine, the subprocess entry point and the Python API routes.
+Returned workflow dicts are shared between callers and must not be mutated.
+"""
+
+from dataclasses import dataclass
+import json
+import os
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Tuple
+
+from crew.file_cache import StatCache
+
+
+WORKFLOWS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "public", "workflows.json"
+)
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    data: Dict[str, Any]
+    workflow_ids: FrozenSet[str]
+    workflows: Mapping[str, Dict[str, Any]]
+    summaries: Tuple[Dict[str, str], ...]
+
+
+def build_index(data: Any) -> CatalogIndex:
+    if not isinstance(data, dict) or not isinstance(data.get("workflows", []), list):
+        raise ValueError("workflows.json must contain a 'workflows' list")
+
+    workflows: Dict[str, Dict[str, Any]] = {}
+    summaries = []
+
+    for workflow in data.get("workflows", []):
+        if not isinstance(workflow, dict) or not isinstance(workflow.get("id"), str):
+            continue
+        workflow_id = workflow["id"]
+        if not workflow_id:
+            continue
+        if workflow_id in workflows:
+            raise ValueError(f"Duplicate workflow id '{workflow_id}'")
+
+        workflows[workflow_id] = workflow
+        summaries.append({"id": workflow_id, "name": workflow.get("name", workflow_id)})
+
+    return CatalogIndex(
+        data=data,
+        workflow_ids=frozenset(workflows),
+        workflows=MappingProxyType(workflows),
+        summaries=tuple(summaries),
+    )
+
+
+def _parse_catalog(path: str) -> CatalogIndex:
+    with open(path, "r", encoding="utf-8") as workflow_file:
+        return build_index(json.load(workflow_file))
+
+
+class WorkflowCatalog:
+    """Workflow definitions indexed by id, reloaded only when the file changes."""
+
+    def __init__(self, path: str = WORKFLOWS_PATH):
+        self.path = path
+        self._cache = StatCache(path, _parse_catalog, self._missing)
+
+    def _missing(self) -> CatalogIndex:
+        raise FileNotFoundError(f"Workflow catalog not found: {self.path}")
+
+    def index(self) -> CatalogIndex:
+        return self._cache.get()
+
+    def workflow_ids(self) -> FrozenSet[str]:
+        return self.index().workflow_ids
+
+    def get(self, workflow_id: str) -> Dict[str, Any]:
+        workflow = self.index().workflows.get(workflow_id)
+        if workflow is None:
+            raise ValueError(f"Workflow '{workflow_id}' not found")
+        return workflow
+
+
+workflow_catalog = WorkflowCatalog()
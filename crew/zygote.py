@@ -0,0 +1,247 @@
+"""Fork server that starts each workflow run from a pre-imported interpreter.
+
+``python3 -m crew.run_workflow --zygote SOCKET`` imports the workflow engine
+once and then waits on a Unix socket. With ``WORKFLOW_ZYGOTE_SOCKET`` set, a
+per-request ``crew.run_workflow`` process does not run the workflow itself:
+it sends its stdin, stdout, stderr (and progress fd) to the zygote with
+``SCM_RIGHTS``. The zygote forks a child that takes over those descriptors
+and runs the request exactly like a cold process would: same stdin JSON,
+same single stdout JSON, same exit codes. The child shares the warm imports
+copy-on-write but nothing else, so each run is still isolated and a crash
+only takes down that run.
+
+The client waits for the child's exit code, which the zygote sends as one
+JSON line. If the client goes away (for example because the run was
+cancelled), the zygote terminates the child.
+"""
+
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from crew.worker_pool import REQUEST_READ_TIMEOUT_SECONDS, bind_listener, preload_workflow_engine
+
+
+MAX_HEADER_BYTES = 1024
+STDIO_FDS = (0, 1, 2)
+
+
+def read_options(header: Any, fds: Sequence[int]) -> Dict[str, Any]:
+    """Validate a client header against the descriptors that came with it."""
+    if not isinstance(header, dict):
+        raise ValueError("Zygote request must be a JSON object")
+    stream = header.get("stream") is True
+    progress_fd = header.get("progress_fd")
+    resume = header.get("resume")
+    if progress_fd is not None and (
+        not isinstance(progress_fd, int) or isinstance(progress_fd, bool) or not 3 <= progress_fd <= 255
+    ):
+        raise ValueError("progress_fd must be an fd number from 3 to 255")
+    if resume is not None and not isinstance(resume, str):
+        raise ValueError("resume must be a run id")
+    targets = list(STDIO_FDS) + ([progress_fd] if progress_fd is not None else [])
+    if len(fds) != len(targets):
+        raise ValueError(f"Expected {len(targets)} file descriptors, got {len(fds)}")
+    return {"stream": stream, "progress_fd": progress_fd, "resume": resume, "targets": targets}
+
+
+def install_fds(fds: Sequence[int], targets: Sequence[int]) -> None:
+    # Move the received descriptors out of the way first so that installing
+    # one target can never overwrite another descriptor that is still needed.
+    import fcntl
+
+    moved = [fcntl.fcntl(fd, fcntl.F_DUPFD_CLOEXEC, 256) for fd in fds]
+    for fd in fds:
+        os.close(fd)
+    for fd, target in zip(moved, targets):
+        os.dup2(fd, target)
+        os.close(fd)
+
+
+def run_child(fds: Sequence[int], options: Dict[str, Any]) -> int:
+    """Run one request in a freshly forked child; returns its exit code."""
+    from crew.progress import open_progress_channel
+    from crew.run_workflow import execute
+
+    install_fds(fds, options["targets"])
+    channel = None
+    if options["progress_fd"] is not None:
+        channel = open_progress_channel(options["progress_fd"])
+    try:
+        return execute(options["stream"], options["resume"])
+    finally:
+        # os._exit skips atexit handlers, so flush everything here.
+        if channel is not None:
+            channel.close()
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def fork_child(fds: Sequence[int], options: Dict[str, Any], inherited: Sequence[Any]) -> int:
+    """Fork a child for one request; ``inherited`` are the zygote's own fds and sockets."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        for fd in fds:
+            os.close(fd)
+        return pid
+
+    signal.set_wakeup_fd(-1)
+    for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    for resource in inherited:
+        if isinstance(resource, int):
+            os.close(resource)
+        else:
+            resource.close()
+    exit_code = 1
+    try:
+        exit_code = run_child(fds, options)
+    except BaseException:
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def send_reply(conn: socket.socket, reply: Dict[str, Any]) -> None:
+    try:
+        conn.sendall((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+    conn.close()
+
+
+def serve_zygote(socket_path: str) -> int:
+    """Fork one child per client until SIGTERM/SIGINT."""
+    # The whole point: pay the crewai/langchain import once.
+    preload_workflow_engine()
+    from crew.workflow_catalog import workflow_catalog
+
+    workflow_catalog.workflow_ids()
+
+    listener = bind_listener(socket_path)
+    wake_read, wake_write = os.pipe()
+    os.set_blocking(wake_read, False)
+    os.set_blocking(wake_write, False)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(wake_read, selectors.EVENT_READ)
+    children: Dict[int, socket.socket] = {}
+    # Connections of children already told to stop; no longer selected.
+    abandoned: Set[socket.socket] = set()
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        raise SystemExit(0)
+
+    # SIGCHLD only needs to wake the selector; children are reaped below.
+    signal.set_wakeup_fd(wake_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    def accept() -> None:
+        conn, _ = listener.accept()
+        fds: List[int] = []
+        try:
+            conn.settimeout(REQUEST_READ_TIMEOUT_SECONDS)
+            data, fds, _, _ = socket.recv_fds(conn, MAX_HEADER_BYTES, len(STDIO_FDS) + 1)
+            conn.settimeout(None)
+            options = read_options(json.loads(data or b"null"), fds)
+        except (OSError, ValueError) as error:
+            for fd in fds:
+                os.close(fd)
+            send_reply(conn, {"exit": 2, "error": str(error)})
+            return
+        inherited = [listener, selector, wake_read, wake_write, *children.values(), conn]
+        pid = fork_child(fds, options, inherited)
+        children[pid] = conn
+        selector.register(conn, selectors.EVENT_READ, pid)
+
+    def reap() -> None:
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            conn = children.pop(pid, None)
+            if conn is not None:
+                if conn in abandoned:
+                    abandoned.discard(conn)
+                else:
+                    selector.unregister(conn)
+                send_reply(conn, {"exit": os.waitstatus_to_exitcode(status)})
+
+    try:
+        while True:
+            for key, _ in selector.select():
+                if key.fileobj is listener:
+                    accept()
+                elif key.fileobj == wake_read:
+                    while True:
+                        try:
+                            if not os.read(wake_read, 512):
+                                break
+                        except BlockingIOError:
+                            break
+                elif key.data in children:
+                    # Clients only ever close their end: the run was abandoned.
+                    try:
+                        os.kill(key.data, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+                    selector.unregister(key.fileobj)
+                    abandoned.add(key.fileobj)
+            reap()
+    finally:
+        signal.set_wakeup_fd(-1)
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def forward_to_zygote(
+    socket_path: str, stream: bool, progress_fd: Optional[int], resume: Optional[str]
+) -> Optional[int]:
+    """Run this process's request in a zygote child and return its exit code.
+
+    Returns ``None`` without consuming stdin when the zygote is not reachable,
+    so the caller can run the request itself.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+
+    header = {"stream": stream, "progress_fd": progress_fd, "resume": resume}
+    fds = list(STDIO_FDS) + ([progress_fd] if progress_fd is not None else [])
+    with client:
+        try:
+            socket.send_fds(client, [json.dumps(header).encode("utf-8")], fds)
+            with client.makefile("rb") as reader:
+                line = reader.readline(MAX_HEADER_BYTES)
+            reply = json.loads(line) if line else {}
+        except (OSError, ValueError):
+            reply = {}
+
+    exit_code = reply.get("exit") if isinstance(reply, dict) else None
+    if not isinstance(exit_code, int):
+        error = "Workflow zygote closed the connection"
+    elif exit_code < 0:
+        error = f"Workflow process was killed by signal {-exit_code}"
+    else:
+        if reply.get("error"):
+            print(json.dumps({"error": reply["error"]}, ensure_ascii=False), file=sys.stderr)
+        return exit_code
+    print(json.dumps({"error": error}, ensure_ascii=False), file=sys.stderr)
+    return 1
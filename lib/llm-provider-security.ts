@@ -123,6 +123,12 @@ export function lockDeepSeekWorkflowConfig(
       model: isDeepSeekId(agentConfig.providerId)
         ? DEEPSEEK_FLASH_MODEL
         : agentConfig.model,
+      ...(agentConfig.fallbacks && {
+        fallbacks: agentConfig.fallbacks.map(fallback => ({
+          ...fallback,
+          model: isDeepSeekId(fallback.providerId) ? DEEPSEEK_FLASH_MODEL : fallback.model,
+        })),
+      }),
     })),
   }
 }
@@ -1,12 +1,37 @@
-import { spawn, type ChildProcessWithoutNullStreams } from 'node:child_process'
+import { spawn, type ChildProcess } from 'node:child_process'
+import { EventEmitter } from 'node:events'
 import fs from 'node:fs'
+import net from 'node:net'
 import path from 'node:path'
+import { PassThrough, type Readable } from 'node:stream'
+import { StringDecoder } from 'node:string_decoder'
 
 export const MAX_TOPIC_LENGTH = 20_000
 
+// Streaming runs write progress frames to this inherited fd (see crew/progress.py),
+// keeping them apart from CrewAI's log output on stderr.
+export const PROGRESS_FD = 3
+export const PROGRESS_PROTOCOL_VERSION = 1
+
+export interface ProgressEvent {
+  v: number
+  seq: number
+  ts: number
+  type: string
+  message?: string
+  agent?: string
+  [key: string]: unknown
+}
+
+// How much CrewAI logs during a run (see crew/verbosity.py). Unset runs use
+// the worker's WORKFLOW_VERBOSITY default.
+export const WORKFLOW_VERBOSITY_LEVELS = ['off', 'summary', 'debug'] as const
+export type WorkflowVerbosity = (typeof WORKFLOW_VERBOSITY_LEVELS)[number]
+
 export interface WorkflowRunInput {
   topic: string
   workflowId: string
+  verbosity?: WorkflowVerbosity
 }
 
 export type WorkflowRunValidation =
@@ -41,7 +66,8 @@ export function loadAllowedWorkflowIds(
 export function validateWorkflowRunInput(
   topic: unknown,
   workflowId: unknown,
-  allowedWorkflowIds: ReadonlySet<string>
+  allowedWorkflowIds: ReadonlySet<string>,
+  verbosity: unknown = undefined
 ): WorkflowRunValidation {
   if (typeof topic !== 'string' || !topic.trim()) {
     return { ok: false, status: 400, error: 'Topic is required' }
@@ -59,27 +85,202 @@ export function validateWorkflowRunInput(
     return { ok: false, status: 400, error: 'Unknown workflow_id' }
   }
 
-  return { ok: true, value: { topic, workflowId } }
+  if (verbosity === undefined || verbosity === null) {
+    return { ok: true, value: { topic, workflowId } }
+  }
+  if (!WORKFLOW_VERBOSITY_LEVELS.includes(verbosity as WorkflowVerbosity)) {
+    return { ok: false, status: 400, error: 'Unknown verbosity' }
+  }
+
+  return { ok: true, value: { topic, workflowId, verbosity: verbosity as WorkflowVerbosity } }
+}
+
+function workflowRequestPayload(input: WorkflowRunInput) {
+  return {
+    topic: input.topic,
+    workflow_id: input.workflowId,
+    ...(input.verbosity ? { verbosity: input.verbosity } : {}),
+  }
 }
 
 export function buildWorkflowProcessSpec(input: WorkflowRunInput, streaming: boolean) {
   return {
     command: 'python3',
-    args: ['-u', '-m', 'crew.run_workflow', ...(streaming ? ['--stream'] : [])],
-    stdin: JSON.stringify({ topic: input.topic, workflow_id: input.workflowId }),
+    args: [
+      '-u',
+      '-m',
+      'crew.run_workflow',
+      ...(streaming ? ['--stream', '--progress-fd', String(PROGRESS_FD)] : []),
+    ],
+    stdin: JSON.stringify(workflowRequestPayload(input)),
   }
 }
 
-export function spawnWorkflowProcess(
+export interface WorkflowProcess {
+  stdout: { on(event: 'data', listener: (data: Buffer) => void): unknown }
+  stderr: { on(event: 'data', listener: (data: Buffer) => void): unknown }
+  /** Newline-delimited progress frames; only streaming runs write any. */
+  progress: { on(event: 'data', listener: (data: Buffer) => void): unknown }
+  on(event: 'close', listener: (code: number | null) => void): unknown
+  on(event: 'error', listener: (error: Error) => void): unknown
+  kill(signal?: NodeJS.Signals): boolean
+}
+
+/**
+ * Splits progress channel data into frames and passes each event of the
+ * supported protocol version to `onEvent`. Malformed frames are skipped.
+ */
+export function createProgressFrameReader(onEvent: (event: ProgressEvent) => void) {
+  const decoder = new StringDecoder('utf8')
+  let buffer = ''
+
+  const handleFrame = (frame: string) => {
+    if (!frame) return
+    try {
+      const event = JSON.parse(frame) as ProgressEvent
+      if (event?.v === PROGRESS_PROTOCOL_VERSION && typeof event.type === 'string') {
+        onEvent(event)
+      }
+    } catch {
+      // Ignore a frame cut short by a killed worker.
+    }
+  }
+
+  return {
+    push(data: Buffer | string) {
+      buffer += typeof data === 'string' ? data : decoder.write(data)
+      let newlineIndex = buffer.indexOf('\n')
+      while (newlineIndex !== -1) {
+        handleFrame(buffer.slice(0, newlineIndex))
+        buffer = buffer.slice(newlineIndex + 1)
+        newlineIndex = buffer.indexOf('\n')
+      }
+    },
+    end() {
+      handleFrame(buffer + decoder.end())
+      buffer = ''
+    },
+  }
+}
+
+type ColdWorkflowProcess = ChildProcess & WorkflowProcess
+
+function spawnColdWorkflowProcess(
   input: WorkflowRunInput,
   streaming: boolean
-): ChildProcessWithoutNullStreams {
+): ColdWorkflowProcess {
   const spec = buildWorkflowProcessSpec(input, streaming)
+  // With WORKFLOW_ZYGOTE_SOCKET in the environment this process hands its
+  // stdio and progress pipe to a child forked from the warm zygote instead.
+  // Non-streaming runs get no progress pipe: nobody would drain it.
   const child = spawn(spec.command, spec.args, {
     cwd: process.cwd(),
-    stdio: ['pipe', 'pipe', 'pipe'],
+    stdio: ['pipe', 'pipe', 'pipe', streaming ? 'pipe' : 'ignore'],
   })
 
-  child.stdin.end(spec.stdin)
-  return child
+  child.stdin?.end(spec.stdin)
+  const progress = (child.stdio[PROGRESS_FD] as Readable | null) ?? new PassThrough()
+  return Object.assign(child, { progress }) as ColdWorkflowProcess
+}
+
+/**
+ * Runs one request on the warm worker pool started with
+ * `python3 -m crew.run_workflow --serve <socket>`, exposing the same
+ * stdout/stderr/close surface as a spawned workflow process. If the pool is
+ * not reachable the request falls back to a one-off subprocess.
+ */
+class PooledWorkflowProcess extends EventEmitter implements WorkflowProcess {
+  readonly stdout = new EventEmitter()
+  readonly stderr = new EventEmitter()
+  readonly progress = new EventEmitter()
+  private socket: net.Socket | null
+  private child: ColdWorkflowProcess | null = null
+  private connected = false
+  private exitCode: number | null = null
+  private closed = false
+
+  constructor(socketPath: string, input: WorkflowRunInput, streaming: boolean) {
+    super()
+    const socket = net.createConnection(socketPath)
+    this.socket = socket
+    let buffer = ''
+
+    socket.setEncoding('utf8')
+    socket.on('connect', () => {
+      this.connected = true
+      socket.write(`${JSON.stringify({ ...workflowRequestPayload(input), stream: streaming })}\n`)
+    })
+    socket.on('data', (chunk: string) => {
+      buffer += chunk
+      let newlineIndex = buffer.indexOf('\n')
+      while (newlineIndex !== -1) {
+        this.handleLine(buffer.slice(0, newlineIndex))
+        buffer = buffer.slice(newlineIndex + 1)
+        newlineIndex = buffer.indexOf('\n')
+      }
+    })
+    socket.on('error', () => {
+      if (!this.connected && !this.closed) {
+        this.socket = null
+        this.fallBackToSpawn(input, streaming)
+      }
+    })
+    socket.on('close', () => {
+      if (this.connected) this.finish(this.exitCode ?? 1)
+    })
+  }
+
+  kill(signal: NodeJS.Signals = 'SIGTERM'): boolean {
+    if (this.child) return this.child.kill(signal)
+    this.socket?.destroy()
+    this.finish(null)
+    return true
+  }
+
+  private handleLine(line: string) {
+    if (line.startsWith('PROGRESS:')) {
+      this.progress.emit('data', Buffer.from(`${line.slice('PROGRESS:'.length)}\n`))
+    } else if (line.startsWith('RESULT:')) {
+      this.exitCode = 0
+      this.stdout.emit('data', Buffer.from(line.slice('RESULT:'.length)))
+    } else if (line.startsWith('ERROR:')) {
+      let code = 1
+      try {
+        const parsed = JSON.parse(line.slice('ERROR:'.length)) as { code?: unknown }
+        if (typeof parsed.code === 'number') code = parsed.code
+      } catch {
+        // Keep the generic failure code for malformed worker output.
+      }
+      this.exitCode = code
+      this.stderr.emit('data', Buffer.from(`${line.slice('ERROR:'.length)}\n`))
+    }
+  }
+
+  private fallBackToSpawn(input: WorkflowRunInput, streaming: boolean) {
+    const child = spawnColdWorkflowProcess(input, streaming)
+    this.child = child
+    child.stdout.on('data', data => this.stdout.emit('data', data))
+    child.stderr.on('data', data => this.stderr.emit('data', data))
+    child.progress.on('data', data => this.progress.emit('data', data))
+    child.on('close', code => this.finish(code))
+    child.on('error', error => this.emit('error', error))
+  }
+
+  private finish(code: number | null) {
+    if (this.closed) return
+    this.closed = true
+    this.emit('close', code)
+  }
+}
+
+export function spawnWorkflowProcess(
+  input: WorkflowRunInput,
+  streaming: boolean
+): WorkflowProcess {
+  const socketPath = process.env.WORKFLOW_WORKER_SOCKET
+  if (socketPath) {
+    return new PooledWorkflowProcess(socketPath, input, streaming)
+  }
+
+  return spawnColdWorkflowProcess(input, streaming)
 }
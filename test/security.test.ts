@@ -114,7 +114,14 @@ test('workflow subprocess receives hostile request strings only through JSON std
     true
   )
 
-  assert.deepEqual(spec.args, ['-u', '-m', 'crew.run_workflow', '--stream'])
+  assert.deepEqual(spec.args, [
+    '-u',
+    '-m',
+    'crew.run_workflow',
+    '--stream',
+    '--progress-fd',
+    '3',
+  ])
   assert.equal(spec.args.includes('-c'), false)
   assert.equal(spec.args.some(arg => arg.includes(hostileTopic)), false)
   assert.equal(spec.args.some(arg => arg.includes(hostileWorkflow)), false)
@@ -235,6 +242,33 @@ test('workflow models are locked for every registered DeepSeek provider id', ()
   assert.equal(locked.agentConfigs[1].model, 'kimi-latest')
 })
 
+test('workflow model fallbacks are locked like primary models', () => {
+  const config: WorkflowModelConfig = {
+    workflowId: 'example',
+    defaultProviderId: 'kimi',
+    defaultModel: 'kimi-latest',
+    agentConfigs: [
+      {
+        agentName: 'A',
+        providerId: 'kimi',
+        model: 'kimi-latest',
+        fallbacks: [
+          { providerId: 'custom-deepseek', model: 'deepseek-chat' },
+          { providerId: 'tuzi', model: 'claude-sonnet-4-5-20250929' },
+        ],
+        hedge: true,
+      },
+    ],
+  }
+
+  const locked = lockDeepSeekWorkflowConfig(config, new Set(['deepseek', 'custom-deepseek']))
+  assert.deepEqual(locked.agentConfigs[0].fallbacks, [
+    { providerId: 'custom-deepseek', model: DEEPSEEK_FLASH_MODEL },
+    { providerId: 'tuzi', model: 'claude-sonnet-4-5-20250929' },
+  ])
+  assert.equal(locked.agentConfigs[0].hedge, true)
+})
+
 test('workflow config overlay removes historical duplicates and submitted config wins', () => {
   const first: WorkflowModelConfig = {
     workflowId: 'example',
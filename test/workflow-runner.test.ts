@@ -0,0 +1,64 @@
+import assert from 'node:assert/strict'
+import test from 'node:test'
+import {
+  buildWorkflowProcessSpec,
+  createProgressFrameReader,
+  validateWorkflowRunInput,
+  type ProgressEvent,
+} from '../lib/workflow-runner.ts'
+
+test('progress frames are reassembled across chunks, including split UTF-8 characters', () => {
+  const events: ProgressEvent[] = []
+  const reader = createProgressFrameReader(event => events.push(event))
+  const frames = Buffer.from(
+    '{"v":1,"seq":1,"ts":1.5,"type":"stream","message":"标题","agent":"Writer"}\n' +
+      '{"v":1,"seq":2,"ts":1.6,"type":"thinking","message":"思考完成"}',
+    'utf8'
+  )
+
+  // Cut inside the first multi-byte character and inside the second frame.
+  reader.push(frames.subarray(0, 53))
+  reader.push(frames.subarray(53, 100))
+  assert.equal(events.length, 1)
+  reader.push(frames.subarray(100))
+  reader.end()
+
+  assert.deepEqual(
+    events.map(event => [event.seq, event.message]),
+    [
+      [1, '标题'],
+      [2, '思考完成'],
+    ]
+  )
+})
+
+test('malformed frames and unknown protocol versions are skipped', () => {
+  const events: ProgressEvent[] = []
+  const reader = createProgressFrameReader(event => events.push(event))
+
+  reader.push('not json\n{"v":2,"seq":1,"ts":0,"type":"task"}\n{"v":1,"seq":2,"ts":0,"type":"task"}\n')
+  reader.end()
+
+  assert.deepEqual(events.map(event => event.seq), [2])
+})
+
+test('verbosity is validated and sent to the worker on stdin', () => {
+  const allowed = new Set(['wechat_title_creator'])
+
+  const quiet = validateWorkflowRunInput('主题', 'wechat_title_creator', allowed, 'off')
+  assert.equal(quiet.ok, true)
+  if (quiet.ok) {
+    assert.deepEqual(JSON.parse(buildWorkflowProcessSpec(quiet.value, false).stdin), {
+      topic: '主题',
+      workflow_id: 'wechat_title_creator',
+      verbosity: 'off',
+    })
+  }
+
+  const unset = validateWorkflowRunInput('主题', 'wechat_title_creator', allowed, null)
+  assert.equal(unset.ok && 'verbosity' in JSON.parse(buildWorkflowProcessSpec(unset.value, false).stdin), false)
+
+  const loud = validateWorkflowRunInput('主题', 'wechat_title_creator', allowed, 'loud')
+  assert.equal(loud.ok, false)
+  if (!loud.ok) assert.equal(loud.status, 400)
+})
@@ -28,14 +28,37 @@ export interface LLMProvider {
   defaultModel: string
   enabled: boolean
   description?: string
+  rateLimits?: LLMProviderRateLimits
   createdAt?: number
   updatedAt?: number
 }
 
+/** Per-provider limits shared by every workflow process on the node */
+export interface LLMProviderRateLimits {
+  maxConcurrent?: number
+  requestsPerMinute?: number
+  tokensPerMinute?: number
+}
+
+export interface ModelFallback {
+  providerId: string
+  model: string
+}
+
 export interface AgentModelConfig {
   agentName: string
   providerId: string
   model: string
+  /** Tried in order when the primary provider fails or is unhealthy */
+  fallbacks?: ModelFallback[]
+  /** Also send a call to the first fallback once it runs past the primary's p95 latency */
+  hedge?: boolean
+  /** Completion tokens per call */
+  maxTokens?: number
+  /** Per request attempt */
+  timeoutSeconds?: number
+  /** Further attempts after a transient failure, with backoff (default 2) */
+  maxRetries?: number
 }
 
 export interface WorkflowModelConfig {
@@ -43,6 +66,8 @@ export interface WorkflowModelConfig {
   defaultProviderId: string
   defaultModel: string
   agentConfigs: AgentModelConfig[]
+  /** Whole-run limit; the run is cancelled and calls in flight time out */
+  deadlineSeconds?: number
 }
 
 /**